@@ -0,0 +1,86 @@
+"""
+Compares the analysis of a capture through the live read path with radio.analysis.
+
+A synthetic capture of a tuning session - meter polls while keyed, TX, PC, FA and MD
+replies - is analyzed twice: frame by frame through the Framer and RadioParser with a
+listener collecting the readings (the only way before radio.analysis), and with the
+vectorized extract() plus summarize().
+
+Usage: python benchmarks/analyze_capture.py [--megabytes 32]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from radio import analysis
+from radio.framer import Framer
+from radio.radioparser import RadioParser
+from radio.recorder import METER_IDS
+
+
+def session(size: int, seed: int = 1) -> bytes:
+    generator = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        cycle = [b"FA%09d;" % generator.randrange(1800000, 30000000), b"MD02;"]
+        cycle.append(b"PC%03d;TX1;" % generator.randrange(5, 101))
+        for _ in range(generator.randrange(10, 100)):
+            cycle.append(
+                b"RM6%03d000;RM5%03d000;RM4%03d000;"
+                % (
+                    generator.randrange(40, 90),
+                    generator.randrange(100, 200),
+                    generator.randrange(256),
+                )
+            )
+        cycle.append(b"TX0;")
+        chunk = b"".join(cycle)
+        parts.append(chunk)
+        length += len(chunk)
+    return b"".join(parts)
+
+
+def per_frame(data: bytes) -> int:
+    parser = RadioParser()
+    framer = Framer(parser.parsers)
+    readings = []
+    for meter_id in METER_IDS.values():
+        parser.subscribe_meter(meter_id, readings.append)
+    for i in range(0, len(data), 4096):
+        for frame in framer.feed(data[i : i + 4096]):
+            parser.parse_frame(frame)
+    return len(readings)
+
+
+def vectorized(data: bytes) -> int:
+    capture = analysis.extract(data)
+    analysis.summarize(capture)
+    return sum(len(capture.series[name]) for name in METER_IDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--megabytes", type=float, default=32)
+    args = parser.parse_args()
+
+    data = session(int(args.megabytes * 1024 * 1024))
+    results = {}
+    for name, function in (("per frame", per_frame), ("vectorized", vectorized)):
+        started = time.perf_counter()
+        readings = function(data)
+        elapsed = time.perf_counter() - started
+        results[name] = elapsed
+        print(
+            "%-10s %8.3f s  %7.1f MB/s  %d meter readings"
+            % (name, elapsed, len(data) / elapsed / 1e6, readings)
+        )
+    print("speedup    %.1fx" % (results["per frame"] / results["vectorized"]))
+
+
+if __name__ == "__main__":
+    main()
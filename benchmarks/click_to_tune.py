@@ -0,0 +1,99 @@
+"""
+Measures click-to-RF latency of the GUI's tune path against a simulated FTDX10.
+
+"legacy" replays what RadioGUI.toggle_transmit used to do on every click: open a
+new Radio, read VFO/mode/power with three blocking round trips, set mode and power,
+spin on get_txpower() and key up. "session" uses a RadioSession that stays
+connected and keys up with a single write.
+
+The latency is measured from the "click" until the simulated rig actually processed
+the TX1 command, so both paths are measured the same way. Opening a real serial port
+is not simulated, which makes the numbers for the legacy path optimistic.
+
+Usage: python benchmarks/click_to_tune.py [--runs 20] [--baudrate 38400] [--turnaround 0.01]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from radio.radio import Radio
+from radio.session import RadioSession
+from radio.simulator import SimulatedRig
+
+
+def legacy_click(rig: SimulatedRig, txpower: int) -> float:
+    click = time.perf_counter()
+    rig.open()
+    radio = Radio("sim", rig.baudrate, command_delay=0, serial_port=rig)
+    radio.get_active_vfo(blocking=True)
+    original_mode = radio.get_mode(blocking=True)
+    original_txpower = radio.get_txpower(blocking=True)
+    radio.set_mode("FM")
+    radio.set_txpower(txpower)
+    while radio.get_txpower(blocking=True) != txpower:
+        pass
+    radio.set_transmit(True)
+    radio.command_queue.join(1)
+    latency = rig.keyed_at - click
+
+    radio.set_transmit(False)
+    radio.set_mode(original_mode)
+    radio.set_txpower(original_txpower)
+    radio.disconnect()
+    return latency
+
+
+def session_click(session: RadioSession, rig: SimulatedRig, txpower: int) -> float:
+    click = time.perf_counter()
+    session.start_tune("FM", txpower)
+    latency = rig.keyed_at - click
+    session.stop_tune()
+    return latency
+
+
+def report(name: str, latencies: list) -> None:
+    latencies = [x * 1000 for x in latencies]
+    print(
+        "%-8s runs=%-4d min=%7.2f ms  median=%7.2f ms  max=%7.2f ms"
+        % (
+            name,
+            len(latencies),
+            min(latencies),
+            statistics.median(latencies),
+            max(latencies),
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--baudrate", type=int, default=38400)
+    parser.add_argument("--turnaround", type=float, default=0.01)
+    parser.add_argument("--txpower", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    rig = SimulatedRig(baudrate=args.baudrate, turnaround=args.turnaround)
+    report("legacy", [legacy_click(rig, args.txpower) for _ in range(args.runs)])
+
+    rig = SimulatedRig(baudrate=args.baudrate, turnaround=args.turnaround)
+    session = RadioSession("sim", args.baudrate, serial_port=rig)
+    session.connect()
+    try:
+        report(
+            "session",
+            [session_click(session, rig, args.txpower) for _ in range(args.runs)],
+        )
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Measures the cost of preparing commands for the serial port, str vs. bytes.
+
+"str" is the path the commands took before radio.encoding: generate_*() strings
+joined into a batch, queued, split again to count the expected replies and encoded
+by the writer thread. "bytes" is the current path: pre-encoded batches from
+CommandEncoder, a cached reply count and no encoding. Both go through a real
+CommandQueue; the serial write itself is left out.
+
+The telemetry poll is the GUI's meter poll (SWR, PO and one of ALC/COMP/IDD/VDD in
+turn), sent ten times a second for as long as the radio transmits.
+
+Usage: python benchmarks/encode_commands.py [--iterations 200000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from radio.commandqueue import CommandQueue
+from radio.encoding import CommandEncoder
+from radio.radioparser import RadioParser
+
+SECONDARY = ("alc", "comp", "idd", "vdd")
+
+
+def count_queries_uncached(parser: RadioParser, commands: str) -> int:
+    # RadioParser.count_queries() before its cache
+    count = 0
+    for command in commands.split(";")[:-1]:
+        if parser.QUERY_LENGTHS.get(command[:2]) == len(command) + 1:
+            count += 1
+    return count
+
+
+def writer_str(queue: CommandQueue, parser: RadioParser) -> bytes:
+    command = queue.get()
+    count_queries_uncached(parser, command)
+    data = command.encode()
+    queue.task_done()
+    return data
+
+
+def writer_bytes(queue: CommandQueue, parser: RadioParser) -> bytes:
+    command = queue.get()
+    parser.count_queries(command)
+    data = command.encode() if isinstance(command, str) else command
+    queue.task_done()
+    return data
+
+
+def poll_str(parser, encoder, queue, i):
+    secondary = (
+        parser.generate_get_alc_meter,
+        parser.generate_get_comp_meter,
+        parser.generate_get_idd_meter,
+        parser.generate_get_vdd_meter,
+    )
+    batch = "".join(
+        [
+            parser.generate_get_swr_meter(),
+            parser.generate_get_po_meter(),
+            secondary[i % len(secondary)](),
+        ]
+    )
+    queue.put(batch, True)
+    return writer_str(queue, parser)
+
+
+def poll_bytes(parser, encoder, queue, i):
+    queue.put(encoder.get_meters(("swr", "po", SECONDARY[i % len(SECONDARY)])), True)
+    return writer_bytes(queue, parser)
+
+
+def set_str(parser, encoder, queue, i):
+    queue.put(parser.generate_set_frequency(parser.VFO_A, 14000000 + i))
+    writer_str(queue, parser)
+    queue.put(parser.generate_set_txpower(5 + i % 96))
+    writer_str(queue, parser)
+    queue.put(parser.generate_set_mode("usb" if i % 2 else "fm"))
+    return writer_str(queue, parser)
+
+
+def set_bytes(parser, encoder, queue, i):
+    queue.put(encoder.set_frequency(parser.VFO_A, 14000000 + i))
+    writer_bytes(queue, parser)
+    queue.put(encoder.set_txpower(5 + i % 96))
+    writer_bytes(queue, parser)
+    queue.put(encoder.set_mode("usb" if i % 2 else "fm"))
+    return writer_bytes(queue, parser)
+
+
+def measure(function, iterations: int) -> float:
+    parser = RadioParser()
+    encoder = CommandEncoder()
+    queue = CommandQueue(256)
+    started = time.perf_counter()
+    for i in range(iterations):
+        function(parser, encoder, queue, i)
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    for name, legacy, current in (
+        ("telemetry poll", poll_str, poll_bytes),
+        ("FA+PC+MD set", set_str, set_bytes),
+    ):
+        before = measure(legacy, args.iterations)
+        after = measure(current, args.iterations)
+        print(
+            "%-15s str=%6.2f us  bytes=%6.2f us  (%.1fx)"
+            % (name, before * 1e6, after * 1e6, before / after)
+        )
+
+
+if __name__ == "__main__":
+    main()
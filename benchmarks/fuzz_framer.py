@@ -0,0 +1,147 @@
+"""
+Fuzzes the read path (Framer + RadioParser) with corrupted CAT streams.
+
+A stream of valid replies is corrupted at a given rate - bytes flipped to random
+values, noise inserted, terminators deleted - and fed in random sized chunks, like
+serial reads. For every corruption rate it reports the throughput, the share of
+frames that still got through and the framer's drop counters. Any exception out of
+the read path is a failure.
+
+Usage: python benchmarks/fuzz_framer.py [--frames 100000] [--seed 1]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from radio.framer import Framer
+from radio.listener import RadioListener
+from radio.radioparser import RadioParser
+
+REPLIES = (
+    b"FA014074000;",
+    b"FB007074000;",
+    b"MD02;",
+    b"PC050;",
+    b"TX0;",
+    b"TX1;",
+    b"VS0;",
+    b"RM5085000;",
+    b"RM6030000;",
+    b"SM0012;",
+    b"IF001014074000+000000200000;",
+    b"OI001007074000+000000100000;",
+)
+
+
+class CountingListener(RadioListener):
+    def __init__(self):
+        self.events = 0
+
+    def on_frequency(self, event):
+        self.events += 1
+
+    def on_mode(self, event):
+        self.events += 1
+
+    def on_tx_power(self, event):
+        self.events += 1
+
+    def on_transmit(self, event):
+        self.events += 1
+
+    def on_active_vfo(self, event):
+        self.events += 1
+
+    def on_po_meter(self, event):
+        self.events += 1
+
+    def on_swr_meter(self, event):
+        self.events += 1
+
+    def on_s_meter(self, event):
+        self.events += 1
+
+    def on_transceiver_info(self, event):
+        self.events += 1
+
+    def on_not_supported(self, event):
+        self.events += 1
+
+
+def corrupt(stream: bytes, rate: float, rng: random.Random) -> bytes:
+    if not rate:
+        return stream
+    data = bytearray(stream)
+    for _ in range(int(len(data) * rate)):
+        i = rng.randrange(len(data))
+        kind = rng.random()
+        if kind < 0.5:
+            data[i] = rng.randrange(256)  # Flipped byte
+        elif kind < 0.8:
+            data[i:i] = bytes(rng.randrange(256) for _ in range(rng.randint(1, 8)))
+        elif data[i] == ord(";"):
+            del data[i]  # Lost terminator
+    return bytes(data)
+
+
+def run(frames: int, rate: float, seed: int) -> None:
+    rng = random.Random(seed)
+    stream = b"".join(rng.choice(REPLIES) for _ in range(frames))
+    stream = corrupt(stream, rate, rng)
+
+    parser = RadioParser()
+    listener = CountingListener()
+    parser.add_listener(listener)
+    framer = Framer(parser.parsers)
+
+    started = time.perf_counter()
+    position = 0
+    while position < len(stream):
+        size = rng.randint(1, 64)
+        for frame in framer.feed(stream[position : position + size]):
+            parser.parse_frame(frame)
+        position += size
+    elapsed = time.perf_counter() - started
+
+    stats = framer.stats()
+    print(
+        "rate=%-6g frames/s=%9.0f  delivered=%6.2f%%  recovered=%-6d "
+        "dropped_frames=%-6d dropped_bytes=%-7d malformed=%-5d buffered=%d"
+        % (
+            rate,
+            frames / elapsed,
+            100.0 * stats["frames"] / frames,
+            stats["recovered"],
+            stats["dropped_frames"],
+            stats["dropped_bytes"],
+            parser.malformed,
+            stats["buffered"],
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--rates",
+        type=float,
+        nargs="+",
+        default=[0, 0.0001, 0.001, 0.01, 0.1],
+        help="Corruptions per byte of the stream",
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    for rate in args.rates:
+        run(args.frames, rate, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Startup-time benchmark for the GUI and the headless CLI.
+
+Every measurement runs in a fresh interpreter, so nothing is cached between runs:
+  - interpreter: an empty "python -c pass"
+  - import main: time spent importing main.py (the GUI module)
+  - first paint: from the start of the import until the window has been drawn once
+    (needs a display, otherwise reported as null)
+  - import radio.cli: time spent importing the headless entry point
+
+The medians are printed as JSON. With --budget-ms the script exits with status 1
+if "first paint" (or "import main" when there is no display) is over the budget.
+
+Usage: python benchmarks/startup.py [--runs 5] [--budget-ms 250]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GUI_PROBE = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+painted = None
+try:
+    import tkinter as tk
+    root = tk.Tk()
+    gui = main.RadioGUI(root)
+    root.update()
+    painted = time.perf_counter()
+    gui.close()
+except Exception:
+    pass
+print(json.dumps({
+    "import": imported - started,
+    "paint": None if painted is None else painted - started,
+}))
+"""
+
+CLI_PROBE = """
+import json, time
+started = time.perf_counter()
+import radio.cli
+print(json.dumps({"import": time.perf_counter() - started}))
+"""
+
+
+def run_probe(code: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def interpreter_time() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - started
+
+
+def median_ms(values: list):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return round(statistics.median(values) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    gui = [run_probe(GUI_PROBE) for _ in range(args.runs)]
+    cli = [run_probe(CLI_PROBE) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "interpreter_ms": median_ms([interpreter_time() for _ in range(args.runs)]),
+        "import_main_ms": median_ms([run["import"] for run in gui]),
+        "first_paint_ms": median_ms([run["paint"] for run in gui]),
+        "import_radio_cli_ms": median_ms([run["import"] for run in cli]),
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.budget_ms is not None:
+        measured = report["first_paint_ms"]
+        if measured is None:
+            measured = report["import_main_ms"]
+        if measured > args.budget_ms:
+            print(f"Over budget: {measured} ms > {args.budget_ms} ms", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Drives one Radio on a simulated FTDX10 from many threads at once.
+
+Every thread of a scenario repeats one operation - blocking getters, setters, sync()
+snapshots, meter reads and fire-and-forget meter polls - for the given duration. The
+rig records the history of its TX power and transmit state, so afterwards every value
+a getter returned is checked against what the rig actually held during the call: a
+value the rig never had then is a misrouted reply (the answer to another thread's
+query). Replies the rig sent that never reached the parser are counted as lost.
+
+For every operation it reports the throughput, latency percentiles, timeouts, errors
+and misrouted replies. --json saves the results, --compare prints the change against
+results saved before (e.g. by another version of the code).
+
+Usage: python benchmarks/stress.py [--scenario mixed] [--duration 5]
+       python benchmarks/stress.py --mix get_txpower=4 set_txpower=2 poll=2
+       python benchmarks/stress.py --json before.json
+       python benchmarks/stress.py --compare before.json
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from bisect import bisect_right
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from radio.commandqueue import CommandQueue
+from radio.radio import Radio
+from radio.simulator import SimulatedRig
+
+# Scenario name -> operation -> number of threads
+SCENARIOS = {
+    "getters": {"get_txpower": 4, "get_transmit": 4},
+    "mixed": {"get_txpower": 2, "get_transmit": 2, "set_txpower": 2, "poll": 2},
+    "polling": {"get_txpower": 2, "read_swr_po": 2, "poll": 6},
+    "sync": {"sync": 4, "set_txpower": 2, "poll": 2},
+}
+
+
+class RecordingRig(SimulatedRig):
+    """
+    SimulatedRig that keeps the history of the values the getters are checked
+    against and counts the replies it sends.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replies = 0
+        self.history = {
+            "txpower": ([0.0], [self.txpower]),
+            "transmit": ([0.0], [self.transmit]),
+        }
+
+    def _execute(self, command: str):
+        # Called with the rig's lock held
+        reply = super()._execute(command)
+        if reply:
+            self.replies += 1
+        now = time.perf_counter()
+        for key, (times, values) in self.history.items():
+            value = getattr(self, key)
+            if value != values[-1]:
+                times.append(now)
+                values.append(value)
+        return reply
+
+    def sending(self) -> bool:
+        """
+        :return: Whether replies are still waiting to go out on the (simulated) wire.
+        """
+        with self._lock:
+            return bool(self._output)
+
+    def held(self, key: str, value, start: float, end: float) -> bool:
+        """
+        :return: Whether the rig held the value at some time between start and end.
+        """
+        times, values = self.history[key]
+        first = max(0, bisect_right(times, start) - 1)
+        last = bisect_right(times, end)
+        return value in values[first:last]
+
+
+def op_get_txpower(radio, rng):
+    return {"txpower": radio.get_txpower(blocking=True)}
+
+
+def op_get_transmit(radio, rng):
+    return {"transmit": radio.get_transmit(blocking=True)}
+
+
+def op_set_txpower(radio, rng):
+    radio.set_txpower(rng.choice((5, 10, 25, 50, 100)))
+
+
+def op_sync(radio, rng):
+    state = radio.sync()
+    return {"txpower": state.txpower, "transmit": state.transmit}
+
+
+def op_read_swr_po(radio, rng):
+    radio.read_swr_po()
+
+
+def op_poll(radio, rng):
+    radio.poll_meters(("swr", "po"))
+
+
+OPERATIONS = {
+    "get_txpower": op_get_txpower,
+    "get_transmit": op_get_transmit,
+    "set_txpower": op_set_txpower,
+    "sync": op_sync,
+    "read_swr_po": op_read_swr_po,
+    "poll": op_poll,
+}
+
+# Operations that do not wait for the radio, they pause for --think between calls
+FIRE_AND_FORGET = ("set_txpower", "poll")
+
+
+def percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def worker(radio, operation, seed, end, think, calls):
+    rng = random.Random(seed)
+    function = OPERATIONS[operation]
+    think = think if operation in FIRE_AND_FORGET else 0
+    while time.perf_counter() < end:
+        started = time.perf_counter()
+        try:
+            checked = function(radio, rng)
+            outcome = "ok"
+        except TimeoutError:
+            checked, outcome = None, "timeout"
+        except Exception:
+            checked, outcome = None, "error"
+        calls.append((started, time.perf_counter(), outcome, checked))
+        if think:
+            time.sleep(think)
+
+
+def run(scenario: dict, args) -> dict:
+    rig = RecordingRig(baudrate=args.baudrate, turnaround=args.turnaround)
+    radio = Radio(
+        "sim",
+        args.baudrate,
+        command_delay=args.command_delay,
+        queue_size=args.queue_size,
+        overflow_policy=args.policy,
+        serial_port=rig,
+    )
+    radio.sync()  # Fills the state the blocking getters return
+
+    end = time.perf_counter() + args.duration
+    calls = {operation: [] for operation in scenario}
+    threads = []
+    for operation, count in scenario.items():
+        for i in range(count):
+            thread = threading.Thread(
+                target=worker,
+                args=(
+                    radio,
+                    operation,
+                    args.seed + len(threads),
+                    end,
+                    args.think,
+                    calls[operation],
+                ),
+            )
+            thread.daemon = True
+            threads.append(thread)
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stopped = time.perf_counter()
+    # Let the replies still on their way arrive before counting the lost ones - at a
+    # low baud rate the wire can be seconds behind the commands
+    radio.command_queue.join(10)
+    settle = time.perf_counter() + 30
+    while rig.sending() and time.perf_counter() < settle:
+        time.sleep(0.01)
+    time.sleep(0.1)  # The reader's last read
+    drained = time.perf_counter() - stopped
+    radio.disconnect()
+
+    results = {}
+    for operation, records in calls.items():
+        latencies = sorted(end - start for start, end, outcome, _ in records)
+        misrouted = 0
+        for start, end, outcome, checked in records:
+            for key, value in (checked or {}).items():
+                if not rig.held(key, value, start, end):
+                    misrouted += 1
+        results[operation] = {
+            "threads": scenario[operation],
+            "calls": len(records),
+            "per_second": len(records) / args.duration,
+            "p50": percentile(latencies, 0.5),
+            "p90": percentile(latencies, 0.9),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else 0.0,
+            "timeouts": sum(1 for r in records if r[2] == "timeout"),
+            "errors": sum(1 for r in records if r[2] == "error"),
+            "misrouted": misrouted,
+        }
+    framer = radio.get_framer_stats()
+    queue = radio.get_queue_stats()
+    results["radio"] = {
+        "commands": rig.commands_received,
+        "replies_sent": rig.replies,
+        "replies_received": framer["frames"],
+        "lost": rig.replies - framer["frames"],
+        "drain_time": drained,
+        "queue_high_water_mark": queue["high_water_mark"],
+        "queue_dropped": queue["dropped"],
+        "queue_rejected": queue["rejected"],
+    }
+    return results
+
+
+def report(name: str, results: dict, baseline: dict = None) -> None:
+    print("scenario %s" % name)
+    for operation, r in results.items():
+        if operation == "radio":
+            continue
+        line = (
+            "  %-13s threads=%-2d calls/s=%8.1f  p50=%7.2f ms  p90=%7.2f ms  "
+            "p99=%7.2f ms  max=%7.2f ms  timeouts=%-4d errors=%-4d misrouted=%d"
+            % (
+                operation,
+                r["threads"],
+                r["per_second"],
+                r["p50"] * 1000,
+                r["p90"] * 1000,
+                r["p99"] * 1000,
+                r["max"] * 1000,
+                r["timeouts"],
+                r["errors"],
+                r["misrouted"],
+            )
+        )
+        before = (baseline or {}).get(operation)
+        if before and before["per_second"] and before["p99"]:
+            line += "  (calls/s %+.0f%%, p99 %+.0f%%)" % (
+                100.0 * (r["per_second"] / before["per_second"] - 1),
+                100.0 * (r["p99"] / before["p99"] - 1),
+            )
+        print(line)
+    print(
+        "  radio         commands=%(commands)d replies sent=%(replies_sent)d "
+        "received=%(replies_received)d lost=%(lost)d drain=%(drain_time).2f s "
+        "queue high water=%(queue_high_water_mark)d dropped=%(queue_dropped)d "
+        "rejected=%(queue_rejected)d" % results["radio"]
+    )
+
+
+def parse_mix(items: list) -> dict:
+    scenario = {}
+    for item in items:
+        operation, _, count = item.partition("=")
+        if operation not in OPERATIONS:
+            raise SystemExit(
+                "Unknown operation %s, one of: %s" % (operation, ", ".join(OPERATIONS))
+            )
+        scenario[operation] = int(count or 1)
+    return scenario
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scenario",
+        nargs="+",
+        choices=sorted(SCENARIOS),
+        default=sorted(SCENARIOS),
+    )
+    parser.add_argument(
+        "--mix", nargs="+", help="Custom scenario as operation=threads pairs"
+    )
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--baudrate", type=int, default=38400)
+    parser.add_argument("--turnaround", type=float, default=0.005)
+    parser.add_argument("--command-delay", type=float, default=0.01)
+    parser.add_argument("--queue-size", type=int, default=256)
+    parser.add_argument(
+        "--policy",
+        choices=(CommandQueue.BLOCK, CommandQueue.DROP_OLDEST, CommandQueue.REJECT),
+        default=CommandQueue.BLOCK,
+    )
+    parser.add_argument(
+        "--think",
+        type=float,
+        default=0.01,
+        help="Seconds between the calls of the operations that do not wait for a reply",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Save the results to this file")
+    parser.add_argument("--compare", help="Results saved with --json to compare to")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    scenarios = {"mix": parse_mix(args.mix)} if args.mix else {
+        name: SCENARIOS[name] for name in args.scenario
+    }
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    all_results = {}
+    for name, scenario in scenarios.items():
+        all_results[name] = run(scenario, args)
+        report(name, all_results[name], baseline.get(name))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(all_results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
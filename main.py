@@ -1,28 +1,356 @@
 import logging
+import queue
+import sys
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk
-from radio.radio import Radio
-import time
-import serial.tools.list_ports
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# The radio package (pyserial, overrides) is imported by RadioWorker on its own
+# thread when it is first needed, so that it does not delay the first paint.
+# Logging is configured from logging.conf on the same thread.
+
+
+class RadioWorker:
+    """
+    Runs every interaction with the radio on a background thread so that a slow or
+    absent radio never freezes the window.
+
+    Actions are queued with list_ports()/start_tune()/stop_tune(). Their outcome and
+    the meter readings (forwarded from the radio's events) are put on the `results`
+    queue as (kind, value) tuples; the GUI drains it from the Tk thread with root.after().
+
+    With out_of_process the radio is driven by a radio.engine.SerialEngine process
+    instead; it polls the meters itself and the GUI reads them from shared memory.
+    """
+
+    POLL_INTERVAL = 0.1  # Seconds between meter requests while transmitting
+    MAX_KEY_DOWN = 60.0  # Seconds of transmission before the watchdog unkeys
+    HEARTBEAT_TIMEOUT = 2.0  # Seconds without GUI heartbeat before it unkeys
+
+    def __init__(self, out_of_process: bool = False):
+        self.out_of_process = out_of_process
+        self.session = None  # Kept open between transmissions
+        self.engine = None  # Used instead of session with out_of_process
+        self.watchdog = None  # radio.watchdog.TXWatchdog of the session
+        self.transmitting = False
+        self.poll_count = 0
+        self.actions = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def list_ports(self):
+        self.actions.put(("ports", self._list_ports, ()))
+        self.actions.put(("cached", self._load_cached, ()))
+        # Then load the radio package so that the first click does not pay for it
+        self.actions.put(("loaded", self._load_radio, ()))
+
+    def discover(self):
+        self.actions.put(("discovered", self._discover, ()))
+
+    def start_tune(self, port: str, baudrate: int, mode: str, txpower: int):
+        self.actions.put(("tuned", self._start_tune, (port, baudrate, mode, txpower)))
+
+    def stop_tune(self):
+        self.actions.put(("untuned", self._stop_tune, ()))
+
+    def heartbeat(self):
+        """
+        Called regularly by the GUI, the radio is unkeyed when the calls stop.
+        """
+        watchdog = self.watchdog
+        if watchdog:
+            watchdog.heartbeat()
+        engine = self.engine
+        if engine:
+            engine.heartbeat()  # For the watchdog in the engine process
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Closes the session and stops the thread.
+        """
+        self.actions.put(None)
+        self.thread.join(timeout)
+
+    def _run(self):
+        from radio.log import configure_logging
+
+        configure_logging()
+        next_poll = time.monotonic()
+        while True:
+            timeout = None
+            if self.transmitting and self.engine is None:
+                timeout = max(0.0, next_poll - time.monotonic())
+            try:
+                action = self.actions.get(timeout=timeout)
+            except queue.Empty:
+                try:
+                    self._poll_meters()
+                except Exception as e:
+                    logging.error("Error polling the meters: %s", e)
+                next_poll = time.monotonic() + self.POLL_INTERVAL
+                continue
+
+            if action is None:
+                break
+            kind, function, args = action
+            try:
+                self.results.put((kind, function(*args)))
+            except Exception as e:
+                logging.error("Error in %s: %s", function.__name__, e)
+                self._close_session()
+                self.results.put(("error", e))
+        self._close_session()
+
+    def _list_ports(self):
+        import serial.tools.list_ports
+
+        return [port.device for port in serial.tools.list_ports.comports()]
+
+    def _load_cached(self):
+        from radio.discovery import load_cached
+
+        return load_cached()
+
+    def _discover(self):
+        from radio.discovery import discover
+
+        if self.session or self.engine:
+            # The port of the open session cannot be probed
+            self._close_session()
+        return discover()
+
+    def _load_radio(self):
+        import radio.forwarder
+        import radio.session
+        import radio.watchdog
+
+        if self.out_of_process:
+            import radio.engine
+
+    def _start_tune(self, port: str, baudrate: int, mode: str, txpower: int):
+        from radio.discovery import save_cached
+        from radio.forwarder import MeterForwarder
+        from radio.session import RadioSession
+        from radio.watchdog import TXWatchdog
+
+        if self.out_of_process:
+            return self._start_engine_tune(port, baudrate, mode, txpower)
+
+        # Reuse the open session unless the port settings were changed
+        if self.session is None or not self.session.matches(port, baudrate):
+            self._close_session()
+            self.session = RadioSession(port, baudrate)
+            self.session.connect()
+            self.session.radio.add_listener(MeterForwarder(self.results))
+            self.watchdog = TXWatchdog(
+                self.session.radio,
+                max_key_down=self.MAX_KEY_DOWN,
+                heartbeat_timeout=self.HEARTBEAT_TIMEOUT,
+                on_trip=self._on_watchdog_trip,
+            )
+            save_cached(port, baudrate)  # Offered first next time
+        result = self.session.start_tune(mode, txpower)
+        self.transmitting = True
+        return result
+
+    def _start_engine_tune(self, port: str, baudrate: int, mode: str, txpower: int):
+        from radio.discovery import save_cached
+        from radio.engine import SerialEngine
+
+        if self.engine is None or not self.engine.matches(port, baudrate):
+            self._close_session()
+            self.engine = SerialEngine(
+                port,
+                baudrate,
+                poll_interval=self.POLL_INTERVAL,
+                max_key_down=self.MAX_KEY_DOWN,
+                heartbeat_timeout=self.HEARTBEAT_TIMEOUT,
+            )
+            # The GUI attaches to the shared state by its name
+            self.results.put(("engine", self.engine.state.name))
+            save_cached(port, baudrate)
+        result = self.engine.start_tune(mode, txpower)
+        self.transmitting = True
+        return result
+
+    def _stop_tune(self):
+        self.transmitting = False
+        if self.engine:
+            return self.engine.stop_tune()
+        return self.session.stop_tune()
+
+    def _poll_meters(self):
+        self.session.radio.poll_tune_meters(self.poll_count)
+        self.poll_count += 1
+
+    def _on_watchdog_trip(self, reason: str):
+        # Called on the watchdog thread once the radio is unkeyed
+        self.transmitting = False
+        self.results.put(("watchdog", reason))
+
+    def _close_session(self):
+        self.transmitting = False
+        self.watchdog = None  # Stopped by the radio on disconnect
+        if self.session:
+            self.session.close()
+            self.session = None
+        if self.engine:
+            self.engine.close()
+            self.engine = None
+
+
+class MeterWidget:
+    """
+    Horizontal bar for a 0-255 RM meter reading with a peak-hold marker.
+
+    add_sample() only does arithmetic and can be called for every reading. The canvas
+    is touched in redraw() and only when the bar or the peak marker actually moved.
+    """
+
+    MAX_VALUE = 255
+    MARGIN = 8  # Room for the scale labels at both ends
+
+    def __init__(
+        self,
+        root,
+        row: int,
+        text: str,
+        scale=(),
+        peak_hold: float = 1.0,
+        peak_decay: float = 150.0,
+    ):
+        """
+        :param row: Grid row of the meter.
+        :param text: Label shown left of the bar.
+        :param scale: (value, text) tuples printed under the bar.
+        :param peak_hold: Seconds the peak marker stays at the highest reading.
+        :param peak_decay: Speed (units/s) at which the peak marker falls after that.
+        """
+        self.peak_hold = peak_hold
+        self.peak_decay = peak_decay
+        self.value = 0
+        self.peak = 0
+        self.peak_time = 0.0
+        self.drawn = None  # (value, peak) currently on the canvas
+
+        self.label = tk.Label(root, text=text)
+        self.label.grid(row=row, column=0)
+        self.canvas = tk.Canvas(
+            root,
+            width=self.MAX_VALUE + 2 * self.MARGIN,
+            height=34 if scale else 16,
+            highlightthickness=0,
+        )
+        self.canvas.grid(row=row, column=1)
+        self.canvas.create_rectangle(
+            self.MARGIN, 2, self.MARGIN + self.MAX_VALUE, 14, outline="grey"
+        )
+        self.bar = self.canvas.create_rectangle(0, 0, 0, 0, fill="green", width=0)
+        self.peak_marker = self.canvas.create_line(0, 0, 0, 0, fill="red", width=2)
+        for value, label in scale:
+            self.canvas.create_text(
+                self.MARGIN + value, 24, anchor=tk.CENTER, text=label
+            )
+
+    def add_sample(self, value: int, now: float) -> None:
+        self.value = value
+        if value >= self.peak_at(now):
+            self.peak = value
+            self.peak_time = now
+
+    def peak_at(self, now: float) -> float:
+        """
+        :return: Position of the peak marker: held for peak_hold seconds, then falling
+                 at peak_decay per second, but never below the current value.
+        """
+        falling = now - self.peak_time - self.peak_hold
+        if falling <= 0:
+            return self.peak
+        return max(self.value, self.peak - falling * self.peak_decay)
+
+    def reset(self) -> None:
+        self.value = 0
+        self.peak = 0
+        self.peak_time = 0.0
+
+    def redraw(self, now: float) -> bool:
+        """
+        :return: True if the canvas had to be updated.
+        """
+        shown = (int(self.value), int(self.peak_at(now)))
+        if shown == self.drawn:
+            return False
+        value, peak = shown
+        self.canvas.coords(self.bar, self.MARGIN, 3, self.MARGIN + value, 14)
+        self.canvas.coords(
+            self.peak_marker, self.MARGIN + peak, 2, self.MARGIN + peak, 14
+        )
+        self.drawn = shown
+        return True
+
+
+class MeterPanel:
+    """
+    Meters that are redrawn together, at most max_fps times per second no matter how
+    fast the readings arrive.
+    """
+
+    def __init__(self, max_fps: int = 20):
+        self.meters = {}
+        self.frame_interval = 1.0 / max_fps
+        self.last_frame = 0.0
+
+    def add(self, name: str, meter: MeterWidget) -> None:
+        self.meters[name] = meter
+
+    def add_sample(self, name: str, value: int) -> bool:
+        """
+        :return: False if there is no meter with that name.
+        """
+        meter = self.meters.get(name)
+        if meter is None:
+            return False
+        meter.add_sample(value, time.monotonic())
+        return True
+
+    def reset(self) -> None:
+        for meter in self.meters.values():
+            meter.reset()
+
+    def redraw(self) -> None:
+        now = time.monotonic()
+        if now - self.last_frame < self.frame_interval:
+            return
+        self.last_frame = now
+        for meter in self.meters.values():
+            meter.redraw(now)
 
 
 class RadioGUI:
-    def __init__(self, root):
-        self.radio = None
+    # (RM reading, label) marks printed under the meters
+    SWR_SCALE = ((0, "1.0"), (64, "1.5"), (128, "2.0"), (192, "3.0"), (255, "5.0"))
+    PO_SCALE = ((35, "5"), (85, "10"), (150, "50"), (200, "100"), (255, "150"))
+
+    def __init__(self, root, out_of_process: bool = False):
+        self.worker = RadioWorker(out_of_process)
+        # View of the engine's shared state, the meter sample counts and the watchdog
+        # trips seen in it
+        self.engine_state = None
+        self.engine_meter_counts = {}
+        self.engine_watchdog_trips = 0
         self.root = root
         self.root.title("Radio Interface")
-        self.root.geometry("400x300")  # Set the window size to fit the controls
+        self.root.geometry("400x420")  # Set the window size to fit the controls
 
         self.com_port_label = tk.Label(root, text="COM Port:")
         self.com_port_label.grid(row=1, column=0)
-        self.com_port_selector = ttk.Combobox(root, values=self.get_serial_ports())
+        self.com_port_selector = ttk.Combobox(root, values=[])
         self.com_port_selector.grid(row=1, column=1)
-        self.com_port_selector.current(0)  # Set the first port as default
+        self.com_port_selector.set("Searching...")
+        self.worker.list_ports()  # Enumerating the ports can be slow - not here
 
         self.baudrate_label = tk.Label(root, text="Baudrate:")
         self.baudrate_label.grid(row=2, column=0)
@@ -32,129 +360,173 @@ class RadioGUI:
         self.baudrate_selector.grid(row=2, column=1)
         self.baudrate_selector.current(2)  # Set 38400 as default
 
+        self.discover_button = tk.Button(
+            root, text="Find Radio", command=self.discover_radio
+        )
+        self.discover_button.grid(row=3, column=0, columnspan=2)
+
         self.txpower_label = tk.Label(root, text="Transmit Power (W):")
         self.txpower_label.grid(row=0, column=0)
         self.txpower_entry = tk.Entry(root)
         self.txpower_entry.grid(row=0, column=1)
         self.txpower_entry.insert(0, "10")  # Set default value to 5 watts
 
-        self.swr_meter_label = tk.Label(root, text="SWR Meter:")
-        self.swr_meter_label.grid(row=6, column=0)
-        self.swr_meter_value = ttk.Progressbar(
-            root, orient="horizontal", length=255, mode="determinate", maximum=255
-        )
-        self.swr_meter_value.grid(row=6, column=1)
-
-        self.swr_canvas = tk.Canvas(root, width=270, height=20)
-        self.swr_canvas.grid(row=7, column=1)
-        self.draw_swr_indications()
-
-        self.po_meter_label = tk.Label(root, text="Power Meter:")
-        self.po_meter_label.grid(row=8, column=0)
-        self.po_meter_value = ttk.Progressbar(
-            root, orient="horizontal", length=255, mode="determinate", maximum=255
-        )
-        self.po_meter_value.grid(row=8, column=1)
-
-        self.po_canvas = tk.Canvas(root, width=270, height=20)
-        self.po_canvas.grid(row=9, column=1)
-        self.draw_po_indications()
+        self.meters = MeterPanel(max_fps=20)
+        self.meters.add("swr", MeterWidget(root, 6, "SWR Meter:", self.SWR_SCALE))
+        self.meters.add("po", MeterWidget(root, 7, "Power Meter:", self.PO_SCALE))
+        self.meters.add("alc", MeterWidget(root, 8, "ALC:"))
+        self.meters.add("comp", MeterWidget(root, 9, "COMP:"))
+        self.meters.add("idd", MeterWidget(root, 10, "IDD:"))
+        self.meters.add("vdd", MeterWidget(root, 11, "VDD:"))
 
         self.transmit_button = tk.Button(
             root, text="Transmit", command=self.toggle_transmit
         )
-        self.transmit_button.grid(row=10, column=0, columnspan=2)
+        self.transmit_button.grid(row=12, column=0, columnspan=2)
 
         self.is_transmitting = False
-        self.original_mode = None
-        self.original_txpower = None
+        self.is_busy = False  # A start/stop is being processed by the worker
 
         self.update_gui()
 
-    def get_serial_ports(self):
-        ports = serial.tools.list_ports.comports()
-        return [port.device for port in ports]
+    def toggle_transmit(self):
+        if self.is_busy:
+            return
+        if not self.is_transmitting:
+            try:
+                port = self.com_port_selector.get()
+                baudrate = int(self.baudrate_selector.get())
+                selected_txpower = int(self.txpower_entry.get())
+            except ValueError as e:
+                logging.error(f"Error in toggle_transmit: {e}")
+                return
+            # Switch to FM at the entered power and key up - done by the worker
+            self.worker.start_tune(port, baudrate, "FM", selected_txpower)
+        else:
+            # Stop transmitting and restore the original mode and tx power
+            self.worker.stop_tune()
+        self.is_busy = True
+        self.transmit_button.config(state=tk.DISABLED)
+
+    def close(self):
+        self.worker.stop()
+        if self.engine_state:
+            self.engine_state.close()
+        self.root.destroy()
 
-    def draw_swr_indications(self):
-        self.swr_canvas.create_text(0, 10, anchor=tk.CENTER, text="1.0")
-        self.swr_canvas.create_text(64, 10, anchor=tk.CENTER, text="1.5")
-        self.swr_canvas.create_text(128, 10, anchor=tk.CENTER, text="2.0")
-        self.swr_canvas.create_text(192, 10, anchor=tk.CENTER, text="3.0")
-        self.swr_canvas.create_text(255, 10, anchor=tk.CENTER, text="5.0")
+    def update_gui(self):
+        self.worker.heartbeat()
+        # Apply everything the worker reported since the last call
+        while True:
+            try:
+                kind, value = self.worker.results.get_nowait()
+            except queue.Empty:
+                break
+            if self.meters.add_sample(kind, value):
+                continue
+            if kind == "ports":
+                self.set_serial_ports(value)
+            elif kind in ("cached", "discovered"):
+                self.set_port_settings(value)
+            elif kind == "tuned":
+                logging.info(f"Transmitting: {value}")
+                self.set_transmitting(True)
+            elif kind == "untuned":
+                logging.info(f"Stopped transmitting: {value}")
+                self.set_transmitting(False)
+            elif kind == "engine":
+                self.attach_engine_state(value)
+            elif kind == "watchdog":
+                self.on_watchdog_trip(value)
+            elif kind == "error":
+                self.set_transmitting(False)
+                self.discover_button.config(state=tk.NORMAL)
+        self.read_engine_meters()
+        self.meters.redraw()
+        self.root.after(25, self.update_gui)
 
-    def draw_po_indications(self):
-        self.po_canvas.create_text(35, 10, anchor=tk.CENTER, text="5")
-        self.po_canvas.create_text(85, 10, anchor=tk.CENTER, text="10")
-        self.po_canvas.create_text(150, 10, anchor=tk.CENTER, text="50")
-        self.po_canvas.create_text(200, 10, anchor=tk.CENTER, text="100")
-        self.po_canvas.create_text(255, 10, anchor=tk.CENTER, text="150")
+    def attach_engine_state(self, name: str):
+        from radio.engine import SharedRadioState
 
-    def transmit(self):
-        self.radio.set_transmit(True)
+        if self.engine_state:
+            self.engine_state.close()
+        self.engine_state = SharedRadioState.attach(name)
+        self.engine_meter_counts = {}
+        self.engine_watchdog_trips = 0
 
-    def toggle_transmit(self):
+    def read_engine_meters(self):
+        # Plain memory reads - the engine process is not involved
+        if self.engine_state is None:
+            return
         try:
-            if not self.is_transmitting:
-                # Initialize the Radio object with the selected serial port and baudrate
-                self.radio = Radio(
-                    port=self.com_port_selector.get(),
-                    baudrate=int(self.baudrate_selector.get()),
-                    command_delay=0,
-                )
-                self.radio.get_active_vfo(blocking=True)  # Request the active VFO
-                # Store the current mode and tx power
-                self.original_mode = self.radio.get_mode(blocking=True)
-                self.original_txpower = self.radio.get_txpower(blocking=True)
-                # Set the mode to FM and tx power to the entered value
-                self.radio.set_mode("FM")
-                selected_txpower = int(self.txpower_entry.get())
-                self.radio.set_txpower(selected_txpower)
-                while self.radio.get_txpower(blocking=True) != selected_txpower:
-                    pass
-                # Start transmitting
-                self.radio.set_transmit(True)
-                self.transmit_button.config(text="Stop Transmitting")
-            else:
-                # Stop transmitting
-                self.radio.set_transmit(False)
-                while self.radio.get_transmit(blocking=True):
-                    pass
-                # Restore the original mode and tx power
-                self.radio.set_mode(self.original_mode)
-                self.radio.set_txpower(self.original_txpower)
-                self.transmit_button.config(text="Transmit")
-                # Disconnect the Radio object
-                self.radio.disconnect()
-                self.radio = None
-
-            self.is_transmitting = not self.is_transmitting
-        except Exception as e:
-            logging.error(f"Error in toggle_transmit: {e}")
-            if self.radio:
-                self.radio.disconnect()
-                self.radio = None
-            self.is_transmitting = False
+            state = self.engine_state.read(retries=100)
+        except TimeoutError:
+            return  # Next time
+        for name, count in state["meter_counts"].items():
+            if count != self.engine_meter_counts.get(name, 0):
+                self.engine_meter_counts[name] = count
+                self.meters.add_sample(name, state["meters"][name])
+        if state["watchdog_trips"] != self.engine_watchdog_trips:
+            self.engine_watchdog_trips = state["watchdog_trips"]
+            self.on_watchdog_trip("in the engine process")
+
+    def on_watchdog_trip(self, reason: str):
+        logging.warning("Transmission stopped by the watchdog: %s", reason)
+        if self.is_transmitting and not self.is_busy:
+            # Restore the mode and TX power saved when keying
+            self.worker.stop_tune()
+            self.is_busy = True
+
+    def discover_radio(self):
+        if self.is_busy or self.is_transmitting:
             return
+        self.com_port_selector.set("Searching...")
+        self.discover_button.config(state=tk.DISABLED)
+        self.worker.discover()
 
-    def update_gui(self):
-        if self.is_transmitting:
-            self.radio.get_swr_meter()  # Request the SWR meter value
-            self.swr_meter_value["value"] = self.radio.swr or 0
+    def set_port_settings(self, settings):
+        """
+        :param settings: (port, baudrate) tuple, a DiscoveryResult or None.
+        """
+        self.discover_button.config(state=tk.NORMAL)
+        if settings is None:
+            if self.com_port_selector.get() == "Searching...":
+                self.com_port_selector.set("")
+            return
+        if isinstance(settings, tuple):
+            port, baudrate = settings
+        else:
+            logging.info(f"Radio found: {settings}")
+            port, baudrate = settings.port, settings.baudrate
+        self.com_port_selector.set(port)
+        self.baudrate_selector.set(baudrate)
 
-            self.radio.get_po_meter()  # Request the Power meter value
-            self.po_meter_value["value"] = self.radio.txpower or 0
-            self.root.after(100, self.update_gui)
+    def set_serial_ports(self, ports: list):
+        self.com_port_selector["values"] = ports
+        if ports:
+            self.com_port_selector.current(0)  # Set the first port as default
         else:
-            self.swr_meter_value["value"] = 0
-            self.po_meter_value["value"] = 0
-            self.root.after(500, self.update_gui)
+            self.com_port_selector.set("")
+
+    def set_transmitting(self, transmitting: bool):
+        self.is_transmitting = transmitting
+        self.is_busy = False
+        self.transmit_button.config(
+            state=tk.NORMAL, text="Stop Transmitting" if transmitting else "Transmit"
+        )
+        if not transmitting:
+            self.meters.reset()
 
 
 def main():
+    # --engine: serial I/O in a separate process (see radio.engine)
+    out_of_process = "--engine" in sys.argv[1:]
+
     # Set up the GUI
     root = tk.Tk()
-    root.geometry("400x300")  # Set the window size to fit the controls
-    gui = RadioGUI(root)
+    root.geometry("400x420")  # Set the window size to fit the controls
+    gui = RadioGUI(root, out_of_process)
+    root.protocol("WM_DELETE_WINDOW", gui.close)
 
     # Start the GUI event loop
     root.mainloop()
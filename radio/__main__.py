@@ -0,0 +1,4 @@
+import sys
+from radio.cli import main
+
+sys.exit(main())
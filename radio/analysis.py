@@ -0,0 +1,349 @@
+"""
+Offline analysis of raw CAT captures (see radio.capture) with NumPy.
+
+RadioParser decodes one frame at a time and calls the listeners for every event -
+right for a live radio, far too slow for gigabytes of captured replies. extract()
+works on whole buffers instead: the ";" terminators are found with one vectorized
+comparison, and since the replies of interest have a fixed length, the frame ending
+at each terminator is checked (opcode, digits) and decoded for all terminators at
+once. Noise before a frame does not hide it; a frame with noise inside is skipped.
+
+The result is one Series of arrays per kind of reading - meters, frequencies, TX
+power, transmit status, mode - with the offsets of the replies in the capture and,
+if the capture has an index, their times. summarize() reduces them to the figures
+of a session: SWR distribution, time keyed, power statistics.
+
+NumPy is only needed for this module (pip install numpy).
+"""
+import os
+import numpy as np
+from radio.capture import INDEX_RECORD, INDEX_SUFFIX
+from radio.meters import PO_CALIBRATION, SWR_CALIBRATION
+from radio.protocol import FTDX10
+from radio.recorder import METER_NAMES
+
+# Same layout as INDEX_RECORD
+INDEX = np.dtype([("time", "<f8"), ("end", "<i8")])
+assert INDEX.itemsize == INDEX_RECORD.size
+
+SEMICOLON = ord(";")
+BLOCK = 1 << 24  # Bytes scanned at once, bounds the temporary arrays
+MARGIN = 32  # Bytes before a block a frame may start at (IF/OI are 28 long)
+
+# Mode names, Series.values of "mode" index this; the last one is the unknown mode
+MODES = FTDX10.enums["mode"]
+MODE_NAMES = tuple(name for _, name in MODES.pairs) + (MODES.default,)
+_MODE_INDEX = np.full(256, len(MODE_NAMES) - 1, dtype=np.uint8)  # Byte -> index
+_MODE_INDEX[[ord(code) for code, _ in MODES.pairs]] = np.arange(len(MODES.pairs))
+
+# Upper bounds of the SWR bins of summarize(), the last bin has no upper bound
+SWR_BINS = (1.5, 2.0, 3.0)
+
+# (opcode, length with the ";") of the replies extract() decodes
+LAYOUTS = (
+    (b"RM", 10),
+    (b"SM", 7),
+    (b"PC", 6),
+    (b"TX", 4),
+    (b"FA", 12),
+    (b"FB", 12),
+    (b"IF", 28),
+    (b"OI", 28),
+    (b"MD", 5),
+)
+# Opcode and length in one number, lengths above 63 are no layout
+_LAYOUT_KEYS = {
+    (opcode, length): (opcode[0] << 8 | opcode[1]) * 64 + length
+    for opcode, length in LAYOUTS
+}
+_KEYS = np.array(list(_LAYOUT_KEYS.values()))
+
+_POWERS = {width: 10 ** np.arange(width - 1, -1, -1) for width in range(1, 10)}
+
+
+class Series:
+    """
+    Readings of one kind, in capture order.
+    """
+
+    def __init__(self, positions, values, times=None):
+        self.positions = positions  # Offsets of the ";" of the replies in the capture
+        self.values = values
+        self.times = times  # time.time() the replies were read, None without index
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def slice(self, start: int, end: int) -> "Series":
+        """
+        :return: The readings whose replies end in the capture range [start, end).
+        """
+        first, last = np.searchsorted(self.positions, (start, end))
+        times = None if self.times is None else self.times[first:last]
+        return Series(self.positions[first:last], self.values[first:last], times)
+
+
+class Capture:
+    def __init__(self, size: int, frames: int, series: dict, index=None):
+        self.size = size  # Bytes
+        self.frames = frames  # Terminators found
+        # Name -> Series: the meters of METER_NAMES ("s" also from SM), "txpower",
+        # "transmit" (bool), "frequency_vfo_a"/"_b" (FA/FB, IF/OI) and "mode" (MD,
+        # indices into MODE_NAMES)
+        self.series = series
+        self.index = index  # INDEX array of the chunks, None if there is no index
+
+    def sessions(self, gap: float = 600.0) -> list:
+        """
+        Splits the capture where nothing was read for more than gap seconds.
+
+        :return: (start, end) ranges of the capture, the whole capture if it has no
+                 index.
+        """
+        if self.index is None or not len(self.index):
+            return [(0, self.size)]
+        breaks = np.flatnonzero(np.diff(self.index["time"]) > gap)
+        ends = self.index["end"][breaks].tolist() + [self.size]
+        return list(zip([0] + ends[:-1], ends))
+
+
+def load(path: str) -> Capture:
+    """
+    Extracts the readings of a capture file, with the times of its index if there
+    is one. The file is memory-mapped, not read into memory.
+    """
+    index = None
+    if os.path.exists(path + INDEX_SUFFIX):
+        index = np.fromfile(path + INDEX_SUFFIX, dtype=INDEX)
+    if os.path.getsize(path) == 0:
+        return extract(b"", index)
+    return extract(np.memmap(path, dtype=np.uint8, mode="r"), index)
+
+
+def extract(data, index=None) -> Capture:
+    """
+    :param data: The captured bytes (bytes or a uint8 array).
+    :param index: INDEX array giving the time of the bytes, optional.
+    """
+    if not isinstance(data, np.ndarray):
+        data = np.frombuffer(data, dtype=np.uint8)
+    parts = {}
+    frames = 0
+    for start in range(0, len(data), BLOCK):
+        low = max(start - MARGIN, 0)
+        view = data[low : start + BLOCK]
+        terminators = np.flatnonzero(view == SEMICOLON)
+        # Earlier ones belong to the previous block
+        first = np.searchsorted(terminators, start - low)
+        frames += len(terminators) - first
+        _extract_block(view, terminators, first, low, parts)
+
+    timed = index is not None and len(index) > 0
+    series = {}
+    for name, chunks in parts.items():
+        positions = np.concatenate([positions for positions, _ in chunks])
+        values = np.concatenate([values for _, values in chunks])
+        # Readings of one name from two commands (e.g. RM1 and SM) are interleaved
+        order = np.argsort(positions, kind="stable")
+        positions, values = positions[order], values[order]
+        times = None
+        if timed:
+            chunk = np.searchsorted(index["end"], positions, side="right")
+            times = index["time"][np.minimum(chunk, len(index) - 1)]
+        series[name] = Series(positions, values, times)
+    for name in list(METER_NAMES.values()) + [
+        "txpower",
+        "transmit",
+        "frequency_vfo_a",
+        "frequency_vfo_b",
+        "mode",
+    ]:
+        if name not in series:
+            empty = np.empty(0, np.int64)
+            series[name] = Series(empty, empty, np.empty(0) if timed else None)
+    return Capture(len(data), frames, series, index)
+
+
+def summarize(capture: Capture, start: int = 0, end: int = None) -> dict:
+    """
+    :return: JSON-serializable figures of the capture range [start, end): the SWR
+             distribution and the output power while keyed, the time keyed (needs
+             the index), the TX power settings, frequencies and modes.
+    """
+    end = capture.size if end is None else end
+    series = {name: s.slice(start, end) for name, s in capture.series.items()}
+    transmit = series["transmit"]
+    result = {
+        "start": None,
+        "end": None,
+        "replies": sum(len(s) for s in series.values()),
+    }
+    if capture.index is not None:
+        ends = capture.index["end"]
+        times = capture.index["time"][(ends > start) & (ends <= end)]
+        if len(times):
+            result["start"] = float(times[0])
+            result["end"] = float(times[-1])
+
+    keyed = transmit.values
+    result["transmissions"] = (
+        int(np.count_nonzero(keyed[1:] & ~keyed[:-1]) + keyed[0]) if len(keyed) else 0
+    )
+    result["time_keyed"] = None
+    if transmit.times is not None and len(keyed):
+        # Keyed from a reply saying so until the next reply
+        result["time_keyed"] = round(
+            float(np.diff(transmit.times)[keyed[:-1]].sum()), 3
+        )
+
+    swr = series["swr"]
+    ratios = np.interp(swr.values, *zip(*SWR_CALIBRATION))
+    ratios = ratios[_while_keyed(transmit, swr)]
+    result["swr"] = _stats(ratios)
+    if len(ratios):
+        counts = np.bincount(
+            np.searchsorted(SWR_BINS, ratios, side="right"),
+            minlength=len(SWR_BINS) + 1,
+        )
+        edges = (1.0,) + SWR_BINS
+        labels = ["%.1f-%.1f" % pair for pair in zip(edges, SWR_BINS)]
+        labels.append("%.1f+" % SWR_BINS[-1])
+        result["swr"]["histogram"] = dict(zip(labels, counts.tolist()))
+
+    po = series["po"]
+    watts = np.interp(po.values, *zip(*PO_CALIBRATION))
+    result["po"] = _stats(watts[_while_keyed(transmit, po)])
+
+    txpower = series["txpower"].values
+    result["txpower"] = {"settings": len(txpower)}
+    if len(txpower):
+        result["txpower"].update(
+            {
+                "min": int(txpower.min()),
+                "max": int(txpower.max()),
+                "last": int(txpower[-1]),
+            }
+        )
+
+    for name in ("frequency_vfo_a", "frequency_vfo_b"):
+        values = series[name].values
+        result[name] = {"distinct": len(np.unique(values))}
+        if len(values):
+            result[name]["last"] = int(values[-1])
+
+    counts = np.bincount(series["mode"].values, minlength=len(MODE_NAMES))
+    result["modes"] = {
+        MODE_NAMES[i]: int(count) for i, count in enumerate(counts) if count
+    }
+    return result
+
+
+def analyze(path: str, session_gap: float = 600.0) -> list:
+    """
+    :return: summarize() of every session of the capture file.
+    """
+    capture = load(path)
+    return [
+        summarize(capture, start, end) for start, end in capture.sessions(session_gap)
+    ]
+
+
+def _extract_block(view, terminators, first: int, low: int, parts: dict) -> None:
+    starts = _frame_starts(view, terminators, first)
+    lengths = dict(LAYOUTS)
+
+    def add(name, opcode, values, selected=slice(None)):
+        end = lengths[opcode] - 1 + low
+        positions = (starts[opcode][selected] + end).astype(np.int64)
+        parts.setdefault(name, []).append((positions, values))
+
+    # RM[P1][P2 x3][P3 x3]; - the meter number and reading as one 4 digit number
+    number = _decode(view, starts, b"RM", 2, 6)
+    meter = number // 1000
+    for meter_id, name in METER_NAMES.items():
+        selected = meter == meter_id
+        add(name, b"RM", number[selected] % 1000, selected)
+    add("s", b"SM", _decode(view, starts, b"SM", 3, 6))
+
+    add("txpower", b"PC", _decode(view, starts, b"PC", 2, 5))
+    add("transmit", b"TX", _decode(view, starts, b"TX", 2, 3) != 0)
+
+    add("frequency_vfo_a", b"FA", _decode(view, starts, b"FA", 2, 11))
+    add("frequency_vfo_b", b"FB", _decode(view, starts, b"FB", 2, 11))
+    add("frequency_vfo_a", b"IF", _decode(view, starts, b"IF", 5, 14))
+    add("frequency_vfo_b", b"OI", _decode(view, starts, b"OI", 5, 14))
+
+    add("mode", b"MD", _MODE_INDEX[view[starts[b"MD"] + 3]])
+
+
+def _frame_starts(view, terminators, first: int) -> dict:
+    """
+    :return: Opcode of LAYOUTS -> start of its frames ending at terminators[first:].
+    """
+    ends = terminators[first:]
+    if first:
+        previous = terminators[first - 1 : -1]
+    else:
+        previous = np.concatenate(([-1], terminators[:-1]))
+    # Nearly all frames start right after the previous terminator: one look at
+    # their opcode and length sorts them all
+    starts = previous + 1
+    following = np.minimum(starts + 1, len(view) - 1)
+    keys = (view[starts].astype(np.int64) << 8 | view[following]) * 64 + np.minimum(
+        ends - previous, 63
+    )
+    # The others (noise before the frame, unknown replies) are checked for every
+    # layout ending at their terminator
+    others = ends[~np.isin(keys, _KEYS)]
+    result = {}
+    for (opcode, length), key in _LAYOUT_KEYS.items():
+        result[opcode] = np.concatenate(
+            (starts[keys == key], _find(view, others, opcode, length))
+        )
+    return result
+
+
+def _find(view, ends, opcode: bytes, length: int):
+    """
+    :return: Start of the frames of the given length and opcode ending at ends.
+    """
+    starts = ends[ends >= length - 1] - (length - 1)
+    return starts[(view[starts] == opcode[0]) & (view[starts + 1] == opcode[1])]
+
+
+def _decode(view, starts: dict, opcode: bytes, first: int, last: int):
+    """
+    Decodes the number in the characters first..last-1 of the frames of an opcode.
+    Frames without digits there are removed from starts.
+
+    :return: The numbers.
+    """
+    frames = starts[opcode]
+    # Bytes below "0" wrap around, so every non-digit ends up above 9
+    digits = view[frames[:, None] + np.arange(first, last)] - np.uint8(48)
+    valid = (digits <= 9).all(axis=1)
+    starts[opcode] = frames[valid]
+    return digits[valid].astype(np.int64) @ _POWERS[last - first]
+
+
+def _while_keyed(transmit: Series, readings: Series):
+    """
+    :return: Mask of the readings taken while the radio was transmitting according
+             to the last TX reply before them; readings above 0 if there is none.
+    """
+    if not len(transmit):
+        return readings.values > 0
+    last = np.searchsorted(transmit.positions, readings.positions, side="right") - 1
+    return (last >= 0) & transmit.values[np.maximum(last, 0)]
+
+
+def _stats(values) -> dict:
+    if not len(values):
+        return {"samples": 0}
+    return {
+        "samples": len(values),
+        "mean": round(float(values.mean()), 2),
+        "median": round(float(np.median(values)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "max": round(float(values.max()), 2),
+    }
@@ -0,0 +1,163 @@
+import json
+from bisect import bisect_right
+
+# Mode groups as used by the segments (mode names as in RadioParser.mode_codes)
+CW = frozenset(("cw", "cwr"))
+DIGITAL = frozenset(("rtty", "rttyr", "pktlsb", "pktusb", "psk"))
+PHONE = frozenset(("lsb", "usb", "am", "amn", "fm", "fmn", "pktfm", "pktfmn"))
+NARROW = CW | DIGITAL
+ALL = CW | DIGITAL | PHONE
+
+# IARU Region 1 segments on the bands of the FTDX10, (start, end, band, modes) with
+# the end excluded. The beacon segments are left out, so tuning there is not legal.
+IARU_REGION_1 = (
+    (1810000, 1838000, "160m", CW),
+    (1838000, 1843000, "160m", NARROW),
+    (1843000, 2000000, "160m", ALL),
+    (3500000, 3570000, "80m", CW),
+    (3570000, 3620000, "80m", NARROW),
+    (3620000, 3800000, "80m", ALL),
+    (5351500, 5366500, "60m", ALL),
+    (7000000, 7040000, "40m", CW),
+    (7040000, 7060000, "40m", NARROW),
+    (7060000, 7200000, "40m", ALL),
+    (10100000, 10130000, "30m", CW),
+    (10130000, 10150000, "30m", NARROW),
+    (14000000, 14070000, "20m", CW),
+    (14070000, 14099000, "20m", NARROW),
+    (14101000, 14350000, "20m", ALL),
+    (18068000, 18095000, "17m", CW),
+    (18095000, 18109000, "17m", NARROW),
+    (18111000, 18168000, "17m", ALL),
+    (21000000, 21070000, "15m", CW),
+    (21070000, 21149000, "15m", NARROW),
+    (21151000, 21450000, "15m", ALL),
+    (24890000, 24915000, "12m", CW),
+    (24915000, 24929000, "12m", NARROW),
+    (24931000, 24990000, "12m", ALL),
+    (28000000, 28070000, "10m", CW),
+    (28070000, 28190000, "10m", NARROW),
+    (28225000, 29700000, "10m", ALL),
+    (50000000, 50100000, "6m", CW),
+    (50100000, 52000000, "6m", ALL),
+    (70000000, 70500000, "4m", ALL),
+)
+
+
+class Segment:
+    def __init__(self, start: int, end: int, band: str, modes):
+        """
+        :param start: First frequency of the segment in Hz.
+        :param end: First frequency above the segment in Hz.
+        :param band: Name of the band, e.g. "20m".
+        :param modes: Modes allowed in the segment.
+        """
+        if start >= end:
+            raise ValueError(f"Empty segment {start}-{end}")
+        self.start = start
+        self.end = end
+        self.band = band
+        self.modes = frozenset(mode.lower() for mode in modes)
+
+    def __contains__(self, frequency: int) -> bool:
+        return self.start <= frequency < self.end
+
+    def __str__(self):
+        return (
+            f"Segment(start={self.start}, end={self.end}, band={self.band}, "
+            f"modes={sorted(self.modes)})"
+        )
+
+
+class BandPlan:
+    """
+    Sorted interval index over the segments of a band plan.
+
+    Lookups bisect the segment start frequencies, so they cost O(log n) and can be
+    done for every tuning step or sweep point. A separate index is kept per mode
+    for the mode-aware queries.
+    """
+
+    def __init__(self, segments=IARU_REGION_1):
+        """
+        :param segments: Segment objects or (start, end, band, modes) tuples.
+        :raises ValueError: If segments overlap.
+        """
+        self.segments = sorted(
+            (s if isinstance(s, Segment) else Segment(*s) for s in segments),
+            key=lambda segment: segment.start,
+        )
+        for previous, segment in zip(self.segments, self.segments[1:]):
+            if segment.start < previous.end:
+                raise ValueError(f"Overlapping segments: {previous} and {segment}")
+        self.starts = [segment.start for segment in self.segments]
+        # Mode -> (starts, segments) of the segments allowing the mode
+        self.mode_index = {}
+        for mode in set().union(*(segment.modes for segment in self.segments)):
+            allowed = [segment for segment in self.segments if mode in segment.modes]
+            self.mode_index[mode] = ([segment.start for segment in allowed], allowed)
+
+    @classmethod
+    def load(cls, path: str) -> "BandPlan":
+        """
+        Reads a band plan from a JSON file holding a list of
+        [start, end, band, [modes]] entries.
+        """
+        with open(path) as f:
+            return cls(tuple(entry) for entry in json.load(f))
+
+    def lookup(self, frequency: int):
+        """
+        :return: The Segment containing the frequency or None.
+        """
+        i = bisect_right(self.starts, frequency) - 1
+        if i >= 0 and frequency < self.segments[i].end:
+            return self.segments[i]
+        return None
+
+    def band(self, frequency: int):
+        """
+        :return: Name of the band of the frequency (e.g. "20m") or None.
+        """
+        segment = self.lookup(frequency)
+        return segment.band if segment else None
+
+    def allowed_modes(self, frequency: int) -> frozenset:
+        segment = self.lookup(frequency)
+        return segment.modes if segment else frozenset()
+
+    def is_legal(self, frequency: int, mode: str = None) -> bool:
+        """
+        :param mode: If given, the mode must be allowed at the frequency as well.
+        """
+        segment = self.lookup(frequency)
+        if segment is None:
+            return False
+        return mode is None or mode.lower() in segment.modes
+
+    def nearest_legal(self, frequency: int, mode: str = None):
+        """
+        Finds the legal frequency closest to the given one.
+
+        :param mode: If given, only segments allowing the mode are considered.
+        :return: The frequency itself if it is legal, else the nearest segment edge
+                 (the upper edge is the last Hz inside the segment). None if no
+                 segment allows the mode.
+        """
+        if mode is None:
+            starts, segments = self.starts, self.segments
+        else:
+            starts, segments = self.mode_index.get(mode.lower(), ((), ()))
+        if not segments:
+            return None
+
+        i = bisect_right(starts, frequency) - 1
+        if i >= 0 and frequency < segments[i].end:
+            return frequency
+        below = segments[i].end - 1 if i >= 0 else None
+        above = segments[i + 1].start if i + 1 < len(segments) else None
+        if below is None:
+            return above
+        if above is None or frequency - below <= above - frequency:
+            return below
+        return above
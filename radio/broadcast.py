@@ -0,0 +1,252 @@
+"""
+UDP broadcast of the radio state for loggers, band maps and amplifier controllers.
+
+StateBroadcaster follows the frequency, mode, active VFO, TX power and transmit
+status from the radio's events and sends the whole state as one small datagram
+whenever it changes, so other programs can follow the radio without polling the
+serial port themselves. Changes arriving faster than max_rate are coalesced into
+the next datagram (the latest value wins); a keepalive datagram is sent when the
+state has not changed for a while, so consumers can tell a quiet radio from a
+stopped broadcaster.
+
+The datagram (DATAGRAM, little endian, 36 bytes):
+
+    magic       4s  b"FTDX"
+    version     B   VERSION
+    flags       B   FLAG_TRANSMIT | FLAG_KEEPALIVE
+    sequence    I   Incremented for every datagram, gaps are lost datagrams
+    active_vfo  b   0: VFO A, 1: VFO B, -1: unknown
+    frequency   I   VFO A in Hz, 0 if unknown
+    frequency   I   VFO B in Hz, 0 if unknown
+    mode        8s  VFO A, ASCII padded with NUL (e.g. b"usb"), empty if unknown
+    mode        8s  VFO B
+    txpower     B   Watts, 0 if unknown
+
+decode() turns a datagram back into a dict.
+"""
+import logging
+import socket
+import struct
+import threading
+import time
+from overrides import overrides
+from radio.events import *
+from radio.listener import RadioListener
+
+MAGIC = b"FTDX"
+VERSION = 1
+DATAGRAM = struct.Struct("<4sBBIbII8s8sB")
+
+FLAG_TRANSMIT = 0x01
+FLAG_KEEPALIVE = 0x02  # Sent because nothing changed, not because of a change
+
+DEFAULT_PORT = 12060
+
+
+class StateBroadcaster(RadioListener):
+    """
+    Sends the radio state to UDP destinations when it changes.
+
+    Attach it with radio.add_listener(broadcaster, asynchronous=False) - the
+    listener methods only update the state and wake the sending thread.
+
+    Several consumers on one computer can each get their own destination port, or
+    share a multicast group (e.g. 239.255.60.60) or the broadcast address.
+    """
+
+    def __init__(
+        self,
+        destinations=(("127.0.0.1", DEFAULT_PORT),),
+        max_rate: float = 10.0,
+        keepalive: float = 1.0,
+    ):
+        """
+        :param destinations: (host, port) tuples the datagrams are sent to.
+        :param max_rate: Datagrams per second at most, None for no limit.
+        :param keepalive: Seconds without a change after which the state is sent
+                          again, None to send on changes only.
+        """
+        self.destinations = [tuple(destination) for destination in destinations]
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.keepalive = keepalive
+        self.active_vfo = -1
+        self.frequency = [0, 0]  # Indexed by VFO
+        self.mode = ["", ""]
+        self.txpower = 0
+        self.transmit = False
+        self.sequence = 0
+        self.sent = 0  # Datagrams sent (to all destinations)
+        self.keepalives = 0
+        self.coalesced = 0  # Changes that were merged into a later datagram
+        self.errors = 0
+        self._dirty = False
+        # The first change goes out right away, the first keepalive after the period
+        self._last_sent = time.perf_counter() - self.min_interval
+        self._running = True
+        self._condition = threading.Condition()
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self._thread = threading.Thread(target=self._run, name="StateBroadcaster")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "keepalives": self.keepalives,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
+    def close(self) -> None:
+        """
+        Stops the sending thread and closes the socket. The broadcaster must be
+        removed from the radio separately.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._socket.close()
+
+    @overrides
+    def on_frequency(self, event: FrequencyEvent) -> None:
+        if event.vfo in (0, 1):
+            self._update_vfo(self.frequency, event.vfo, event.frequency)
+
+    @overrides
+    def on_mode(self, event: ModeEvent) -> None:
+        vfo = event.vfo
+        if vfo not in (0, 1):
+            # MD0 does not say which VFO, as in Radio.on_mode()
+            vfo = 1 if self.active_vfo == 1 else 0
+        self._update_vfo(self.mode, vfo, event.mode)
+
+    @overrides
+    def on_transceiver_info(self, event: TransceiverInfoEvent) -> None:
+        with self._condition:
+            frequency = self.frequency[event.vfo] != event.frequency
+            mode = self.mode[event.vfo] != event.mode
+            self.frequency[event.vfo] = event.frequency
+            self.mode[event.vfo] = event.mode
+            if frequency or mode:
+                self._changed()
+
+    @overrides
+    def on_active_vfo(self, event: ActiveVFOEvent) -> None:
+        self._update("active_vfo", event.vfo)
+
+    @overrides
+    def on_tx_power(self, event: TXPowerEvent) -> None:
+        self._update("txpower", event.value)
+
+    @overrides
+    def on_transmit(self, event: TransmitEvent) -> None:
+        self._update("transmit", event.transmit)
+
+    def _update(self, name: str, value) -> None:
+        with self._condition:
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                self._changed()
+
+    def _update_vfo(self, values: list, vfo: int, value) -> None:
+        with self._condition:
+            if values[vfo] != value:
+                values[vfo] = value
+                self._changed()
+
+    def _changed(self) -> None:
+        # Called with the condition held
+        if self._dirty:
+            self.coalesced += 1
+        else:
+            self._dirty = True
+            self._condition.notify()
+
+    def _pack(self, keepalive: bool) -> bytes:
+        # Called with the condition held
+        flags = (FLAG_TRANSMIT if self.transmit else 0) | (
+            FLAG_KEEPALIVE if keepalive else 0
+        )
+        return DATAGRAM.pack(
+            MAGIC,
+            VERSION,
+            flags,
+            self.sequence,
+            self.active_vfo,
+            self.frequency[0],
+            self.frequency[1],
+            self.mode[0].encode("ascii", "replace"),
+            self.mode[1].encode("ascii", "replace"),
+            min(max(self.txpower, 0), 255),
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                now = time.perf_counter()
+                if self._dirty:
+                    remaining = self._last_sent + self.min_interval - now
+                elif self.keepalive is not None:
+                    remaining = self._last_sent + self.keepalive - now
+                else:
+                    remaining = None
+                if remaining is None or remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                keepalive = not self._dirty
+                self._dirty = False
+                self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+                datagram = self._pack(keepalive)
+                self._last_sent = now
+            self._send(datagram)
+            self.sent += 1
+            if keepalive:
+                self.keepalives += 1
+
+    def _send(self, datagram: bytes) -> None:
+        for destination in self.destinations:
+            try:
+                self._socket.sendto(datagram, destination)
+            except OSError as e:
+                # A consumer that is not running must not stop the others
+                self.errors += 1
+                logging.debug("Cannot send the radio state to %s: %s", destination, e)
+
+
+def decode(datagram: bytes) -> dict:
+    """
+    :return: The fields of a datagram of StateBroadcaster, see DATAGRAM.
+    :raises ValueError: If it is not such a datagram.
+    """
+    if len(datagram) != DATAGRAM.size:
+        raise ValueError("Unexpected datagram size: %d" % len(datagram))
+    (
+        magic,
+        version,
+        flags,
+        sequence,
+        active_vfo,
+        frequency_vfo_a,
+        frequency_vfo_b,
+        mode_vfo_a,
+        mode_vfo_b,
+        txpower,
+    ) = DATAGRAM.unpack(datagram)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a radio state datagram (version %d)" % version)
+    return {
+        "sequence": sequence,
+        "transmit": bool(flags & FLAG_TRANSMIT),
+        "keepalive": bool(flags & FLAG_KEEPALIVE),
+        "active_vfo": active_vfo,
+        "frequency_vfo_a": frequency_vfo_a,
+        "frequency_vfo_b": frequency_vfo_b,
+        "mode_vfo_a": mode_vfo_a.rstrip(b"\0").decode("ascii"),
+        "mode_vfo_b": mode_vfo_b.rstrip(b"\0").decode("ascii"),
+        "txpower": txpower,
+    }
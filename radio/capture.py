@@ -0,0 +1,60 @@
+"""
+Raw captures of the bytes the radio sends.
+
+CaptureWriter appends every chunk read from the serial port to a capture file as it
+came, and one index record (time, end offset) per chunk to <path>.idx, so that the
+frames can be given a time later. radio.analysis reads the captures back.
+
+    radio.capture = CaptureWriter("session.cat")
+"""
+import os
+import struct
+import threading
+import time
+
+# time.time() of the read, offset of the end of the chunk in the capture file
+INDEX_RECORD = struct.Struct("<dq")
+INDEX_SUFFIX = ".idx"
+
+
+class CaptureWriter:
+    """
+    Appends to an existing capture, so a capture can span several connections.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: The capture file, the index goes next to it.
+        """
+        self.path = path
+        self._data = open(path, "ab")
+        self._index = open(path + INDEX_SUFFIX, "ab")
+        self._offset = os.path.getsize(path)
+        self._lock = threading.Lock()
+
+    def write(self, data: bytes, timestamp: float = None) -> None:
+        """
+        :param timestamp: time.time() the data was read, now by default.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if self._data is None:
+                raise ValueError("The capture is closed")
+            self._data.write(data)
+            self._offset += len(data)
+            self._index.write(INDEX_RECORD.pack(timestamp, self._offset))
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._data is not None:
+                self._data.flush()
+                self._index.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._data is None:
+                return
+            self._data.close()
+            self._index.close()
+            self._data = None
+            self._index = None
@@ -0,0 +1,280 @@
+"""
+Command line interface for headless stations - no GUI toolkit is imported.
+
+Tune once and print the result as JSON:
+
+    python -m radio tune --port COM3 --baudrate 38400 --mode fm --power 10 --duration 2
+
+Keep the port open and serve tune requests, one JSON object per line on stdin,
+answering with one JSON line on stdout per request:
+
+    python -m radio daemon --port COM3
+    {"command": "tune", "mode": "fm", "power": 10, "duration": 2}
+    {"command": "quit"}
+
+The daemon can also send the radio state to other programs over UDP (see
+radio.broadcast), e.g. --broadcast 127.0.0.1:12060 --broadcast 127.0.0.1:12061, and
+capture the replies of the radio with --capture session.cat. A capture is analyzed
+offline (NumPy needed), one JSON summary per session:
+
+    python -m radio analyze session.cat
+"""
+import argparse
+import json
+import sys
+import time
+from radio.log import configure_logging
+from radio.meters import po_from_raw, swr_from_raw
+from radio.session import RadioSession
+
+
+def tune(
+    session: RadioSession,
+    mode: str = "fm",
+    power: int = 10,
+    duration: float = 1.0,
+    interval: float = 0.1,
+) -> dict:
+    """
+    Keys the radio for the given time while reading SWR and PO, then restores it.
+
+    :param duration: Seconds to transmit.
+    :param interval: Seconds between meter readings.
+    :return: JSON-serializable result with the meter readings and timings in ms.
+    """
+    swr = []
+    po = []
+    started = time.perf_counter()
+    tuned = session.start_tune(mode, power)
+    try:
+        end = time.perf_counter() + duration
+        while True:
+            swr_raw, po_raw = session.radio.read_swr_po(session.timeout)
+            swr.append(swr_raw)
+            po.append(po_raw)
+            if time.perf_counter() + interval > end:
+                break
+            time.sleep(interval)
+    finally:
+        untuned = session.stop_tune()
+
+    return {
+        "ok": True,
+        "mode": tuned.mode,
+        "power": tuned.txpower,
+        "swr": _summary(swr, swr_from_raw),
+        "po": _summary(po, po_from_raw),
+        "timings": {
+            "tune": _milliseconds(tuned.steps, tuned.total),
+            "untune": _milliseconds(untuned.steps, untuned.total),
+            "total": round((time.perf_counter() - started) * 1000, 3),
+        },
+    }
+
+
+def serve(session: RadioSession, requests, responses) -> None:
+    """
+    Answers JSON requests, one per line, until "quit" or end of input.
+
+    :param requests: Iterable of lines (e.g. sys.stdin).
+    :param responses: File to write the JSON answers to (e.g. sys.stdout).
+    """
+    for line in requests:
+        line = line.strip()
+        if not line:
+            continue
+        request = {}
+        try:
+            request = json.loads(line)
+            command = request.get("command", "tune")
+            if command == "quit":
+                break
+            if command != "tune":
+                raise ValueError("Unsupported command: " + str(command))
+            response = tune(
+                session,
+                request.get("mode", "fm"),
+                int(request.get("power", 10)),
+                float(request.get("duration", 1.0)),
+                float(request.get("interval", 0.1)),
+            )
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]  # Lets scripts match answers to requests
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m radio", description="Headless FTDX10 tune control."
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    def add_port_arguments(subparser):
+        subparser.add_argument("--port", required=True, help="Serial port, e.g. COM3")
+        subparser.add_argument("--baudrate", type=int, default=38400)
+        subparser.add_argument(
+            "--timeout", type=float, default=1.0, help="Seconds to wait for the radio"
+        )
+        subparser.add_argument("--log-level", default="WARNING")
+        subparser.add_argument(
+            "--simulate",
+            action="store_true",
+            help="Talk to a simulated radio instead of the serial port",
+        )
+
+    tune_parser = subparsers.add_parser("tune", help="Tune once and print the result")
+    add_port_arguments(tune_parser)
+    tune_parser.add_argument("--mode", default="fm")
+    tune_parser.add_argument("--power", type=int, default=10, help="Power in watts")
+    tune_parser.add_argument(
+        "--duration", type=float, default=1.0, help="Seconds to transmit"
+    )
+    tune_parser.add_argument(
+        "--interval", type=float, default=0.1, help="Seconds between meter readings"
+    )
+
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="Serve tune requests from stdin without reopening the port"
+    )
+    add_port_arguments(daemon_parser)
+    daemon_parser.add_argument(
+        "--broadcast",
+        action="append",
+        default=[],
+        type=_udp_address,
+        metavar="HOST:PORT",
+        help="Send the radio state to this UDP address (repeatable)",
+    )
+    daemon_parser.add_argument(
+        "--broadcast-rate",
+        type=float,
+        default=10.0,
+        help="State datagrams per second at most",
+    )
+    daemon_parser.add_argument(
+        "--capture", metavar="PATH", help="Append the raw replies to this capture"
+    )
+
+    analyze_parser = subparsers.add_parser(
+        "analyze", help="Summarize a capture of the daemon, one line per session"
+    )
+    analyze_parser.add_argument("capture", help="Capture file")
+    analyze_parser.add_argument(
+        "--session-gap",
+        type=float,
+        default=600.0,
+        help="Seconds without data that start a new session",
+    )
+
+    args = parser.parse_args(argv)
+    if args.action == "analyze":
+        try:
+            from radio.analysis import analyze
+        except ImportError as e:
+            print(json.dumps({"ok": False, "error": f"NumPy is needed: {e}"}))
+            return 1
+        try:
+            summaries = analyze(args.capture, args.session_gap)
+        except OSError as e:
+            print(json.dumps({"ok": False, "error": f"Cannot read the capture: {e}"}))
+            return 1
+        for summary in summaries:
+            print(json.dumps(summary))
+        return 0
+
+    # stdout carries the JSON answers, so logging.conf (stdout) is not used
+    configure_logging(config_file=None, level=args.log_level.upper())
+
+    serial_port = None
+    if args.simulate:
+        from radio.simulator import SimulatedRig
+
+        serial_port = SimulatedRig(baudrate=args.baudrate)
+
+    started = time.perf_counter()
+    session = RadioSession(
+        args.port, args.baudrate, timeout=args.timeout, serial_port=serial_port
+    )
+    try:
+        session.connect()
+    except Exception as e:
+        print(json.dumps({"ok": False, "error": f"Cannot connect: {e}"}))
+        return 1
+    connect_time = round((time.perf_counter() - started) * 1000, 3)
+
+    try:
+        if args.action == "daemon":
+            capture = None
+            if args.capture:
+                from radio.capture import CaptureWriter
+
+                capture = CaptureWriter(args.capture)
+                session.radio.capture = capture
+            broadcaster = None
+            if args.broadcast:
+                broadcaster = _start_broadcast(
+                    session, args.broadcast, args.broadcast_rate
+                )
+            try:
+                serve(session, sys.stdin, sys.stdout)
+            finally:
+                if broadcaster is not None:
+                    session.radio.remove_listener(broadcaster)
+                    broadcaster.close()
+                if capture is not None:
+                    session.radio.capture = None
+                    capture.close()
+            return 0
+        try:
+            result = tune(session, args.mode, args.power, args.duration, args.interval)
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+        result.setdefault("timings", {})["connect"] = connect_time
+        print(json.dumps(result))
+        return 0 if result["ok"] else 1
+    finally:
+        session.close()
+
+
+def _udp_address(value: str) -> tuple:
+    """
+    argparse type of --broadcast.
+
+    :param value: "HOST:PORT", or ":PORT" for 127.0.0.1.
+    :return: (host, port)
+    :raises argparse.ArgumentTypeError: If value is not a valid address.
+    """
+    host, separator, port = value.rpartition(":")
+    if separator and port.isdigit() and 0 < int(port) < 65536:
+        return host or "127.0.0.1", int(port)
+    raise argparse.ArgumentTypeError(f"Expected HOST:PORT, got {value!r}")
+
+
+def _start_broadcast(session: RadioSession, addresses: list, max_rate: float):
+    from radio.broadcast import StateBroadcaster
+
+    broadcaster = StateBroadcaster(addresses, max_rate=max_rate)
+    session.radio.add_listener(broadcaster, asynchronous=False)
+    # The state read by connect() went by before the broadcaster was attached
+    session.radio.sync(timeout=session.timeout)
+    return broadcaster
+
+
+def _summary(readings: list, convert) -> dict:
+    if not readings:
+        return {}
+    return {
+        "last": round(convert(readings[-1]), 2),
+        "max": round(convert(max(readings)), 2),
+        "raw": readings[-1],
+        "samples": len(readings),
+    }
+
+
+def _milliseconds(steps: dict, total: float) -> dict:
+    result = {name: round(seconds * 1000, 3) for name, seconds in steps.items()}
+    result["total"] = round(total * 1000, 3)
+    return result
@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import deque
+from radio.exceptions import CommandQueueFullException
+
+
+class CommandQueue:
+    """
+    Bounded FIFO of commands waiting to be written to the radio.
+
+    Unlike queue.Queue the capacity is always finite and the caller chooses what
+    happens when it is reached (see the BLOCK, DROP_OLDEST and REJECT policies).
+    Every command can be marked as telemetry (meter polls and similar read-only
+    queries) which makes it a candidate for eviction under DROP_OLDEST.
+    """
+
+    # Overflow policies
+    BLOCK = "block"  # Wait up to put_timeout for a free slot, then raise
+    DROP_OLDEST = "drop_oldest"  # Evict the oldest queued telemetry command
+    REJECT = "reject"  # Raise CommandQueueFullException immediately
+
+    POLICIES = (BLOCK, DROP_OLDEST, REJECT)
+
+    def __init__(
+        self, maxsize: int = 256, policy: str = BLOCK, put_timeout: float = 1.0
+    ):
+        """
+        :param maxsize: Maximum number of commands that can wait in the queue.
+        :param policy: One of BLOCK, DROP_OLDEST or REJECT.
+        :param put_timeout: Default number of seconds put() may block under BLOCK
+                            (and under DROP_OLDEST when there is no telemetry to evict).
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if policy not in self.POLICIES:
+            raise ValueError("Unsupported overflow policy: " + str(policy))
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.put_timeout = put_timeout
+
+        self._items = deque()  # (command, telemetry) tuples
+        self._unfinished = 0
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        self._all_done = threading.Condition(self._mutex)
+
+        # Statistics
+        self.high_water_mark = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.enqueued = 0
+
+    def put(self, command, telemetry: bool = False, timeout: float = None) -> bool:
+        """
+        Adds a command to the queue applying the overflow policy when it is full.
+
+        :param command: The command to send to the radio.
+        :param telemetry: True if the command is a read-only poll that may be dropped.
+        :param timeout: Overrides put_timeout for this call.
+        :return: True if the command was queued, False if it was dropped (only a
+                 telemetry command can be dropped, and only under DROP_OLDEST).
+        :raises CommandQueueFullException: If the command could not be queued.
+        """
+        if timeout is None:
+            timeout = self.put_timeout
+
+        with self._not_full:
+            if len(self._items) >= self.maxsize:
+                if self.policy == self.REJECT:
+                    self.rejected += 1
+                    raise CommandQueueFullException(
+                        "Command queue full (%d commands)" % self.maxsize
+                    )
+                if self.policy == self.DROP_OLDEST and self._evict_telemetry():
+                    pass
+                elif self.policy == self.DROP_OLDEST and telemetry:
+                    # Nothing older is expendable - drop the new poll instead
+                    self.dropped += 1
+                    return False
+                elif not self._wait_not_full(timeout):
+                    self.rejected += 1
+                    raise CommandQueueFullException(
+                        "Command queue full (%d commands) for %.3f s"
+                        % (self.maxsize, timeout)
+                    )
+
+            self._items.append((command, telemetry))
+            self._unfinished += 1
+            self.enqueued += 1
+            if len(self._items) > self.high_water_mark:
+                self.high_water_mark = len(self._items)
+            self._not_empty.notify()
+            return True
+
+    def get(self, timeout: float = None):
+        """
+        Removes and returns the next command.
+
+        :param timeout: Seconds to wait for a command, None waits forever.
+        :return: The command or None if the timeout expired.
+        """
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._items, timeout):
+                return None
+            command, _ = self._items.popleft()
+            self._not_full.notify()
+            return command
+
+    def task_done(self) -> None:
+        """
+        Marks a command returned by get() as processed.
+        """
+        with self._all_done:
+            if self._unfinished <= 0:
+                raise ValueError("task_done() called too many times")
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._all_done.notify_all()
+
+    def join(self, timeout: float = None) -> bool:
+        """
+        Waits until every queued command has been processed.
+
+        :param timeout: Seconds to wait, None waits forever.
+        :return: True if the queue drained, False if the timeout expired.
+        """
+        with self._all_done:
+            return self._all_done.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def clear(self) -> int:
+        """
+        Discards all queued commands.
+
+        :return: Number of commands discarded.
+        """
+        with self._mutex:
+            count = len(self._items)
+            self._items.clear()
+            self._unfinished = max(0, self._unfinished - count)
+            self._not_full.notify_all()
+            if self._unfinished == 0:
+                self._all_done.notify_all()
+            return count
+
+    def qsize(self) -> int:
+        with self._mutex:
+            return len(self._items)
+
+    def stats(self) -> dict:
+        """
+        :return: Snapshot of the queue counters, useful for sizing maxsize.
+        """
+        with self._mutex:
+            return {
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+                "high_water_mark": self.high_water_mark,
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+            }
+
+    def _evict_telemetry(self) -> bool:
+        # Called with the mutex held
+        for i, (_, telemetry) in enumerate(self._items):
+            if telemetry:
+                del self._items[i]
+                self._unfinished -= 1
+                self.dropped += 1
+                return True
+        return False
+
+    def _wait_not_full(self, timeout: float) -> bool:
+        # Called with the mutex held
+        deadline = time.monotonic() + timeout
+        while len(self._items) >= self.maxsize:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._not_full.wait(remaining)
+        return True
@@ -0,0 +1,183 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# CAT RATE settings of the FTDX10, most likely first (38400 is the factory default)
+BAUDRATES = (38400, 19200, 9600, 4800)
+
+# Where the last (port, baudrate) that answered is remembered
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".ftdx10_cat.json")
+
+
+class DiscoveryResult:
+    def __init__(self, port: str, baudrate: int, radio_id: str, elapsed: float):
+        self.port = port
+        self.baudrate = baudrate
+        self.radio_id = radio_id  # e.g. "0761" for the FTDX10
+        self.elapsed = elapsed  # Seconds the discovery took
+
+    def __str__(self):
+        return (
+            f"DiscoveryResult(port={self.port}, baudrate={self.baudrate}, "
+            f"radio_id={self.radio_id}, elapsed={self.elapsed * 1000:.0f}ms)"
+        )
+
+
+def open_serial_port(port: str, baudrate: int, timeout: float):
+    import serial
+
+    return serial.Serial(port, baudrate, timeout=timeout, write_timeout=timeout)
+
+
+def list_serial_ports() -> list:
+    import serial.tools.list_ports
+
+    return [port.device for port in serial.tools.list_ports.comports()]
+
+
+def identify(serial_port, timeout: float):
+    """
+    Sends "ID;" and reads the answer.
+
+    :param serial_port: Open serial-like object.
+    :param timeout: Seconds to wait for the complete answer.
+    :return: The radio ID (e.g. "0761") or None if no valid answer came back.
+    """
+    serial_port.reset_input_buffer()
+    serial_port.write(b"ID;")
+    deadline = time.perf_counter() + timeout
+    answer = b""
+    while time.perf_counter() < deadline:
+        answer += serial_port.read(max(1, serial_port.in_waiting))
+        end = answer.find(b";")
+        if end != -1:
+            # At a wrong baud rate the radio answers with garbage (if at all)
+            frame = answer[:end].decode("ascii", "replace")
+            start = frame.rfind("ID")
+            if start != -1 and frame[start + 2 :].isdigit():
+                return frame[start + 2 :]
+            answer = answer[end + 1 :]
+    return None
+
+
+def probe(
+    port: str, baudrate: int, timeout: float = 0.2, opener=open_serial_port
+) -> str:
+    """
+    Checks whether a radio answers on the given port at the given baud rate.
+
+    :return: The radio ID or None.
+    """
+    try:
+        serial_port = opener(port, baudrate, timeout)
+    except Exception as e:
+        logging.debug("Cannot open %s: %s", port, e)
+        return None
+    try:
+        return identify(serial_port, timeout)
+    except Exception as e:
+        logging.debug("Probing %s at %s baud failed: %s", port, baudrate, e)
+        return None
+    finally:
+        serial_port.close()
+
+
+def load_cached(path: str = CACHE_FILE):
+    """
+    :return: (port, baudrate) of the last successful connection or None.
+    """
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+        return cached["port"], int(cached["baudrate"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_cached(port: str, baudrate: int, path: str = CACHE_FILE) -> None:
+    try:
+        with open(path, "w") as f:
+            json.dump({"port": port, "baudrate": baudrate}, f)
+    except OSError as e:
+        logging.warning(f"Cannot save the port settings to {path}: {e}")
+
+
+def discover(
+    ports: list = None,
+    baudrates=BAUDRATES,
+    deadline: float = 2.0,
+    probe_timeout: float = 0.2,
+    cache_path: str = CACHE_FILE,
+    opener=open_serial_port,
+):
+    """
+    Finds the port and baud rate the radio answers on.
+
+    The cached pair from the last success is tried first. Otherwise all ports are
+    probed in parallel, one thread per port; a port can only be opened once at a
+    time, so each thread tries the baud rates one after the other (the cached one
+    first). The search stops as soon as one probe succeeds or the deadline passes.
+
+    :param ports: Ports to try, by default every serial port in the system.
+    :param baudrates: Baud rates to try on every port.
+    :param deadline: Seconds the whole discovery may take.
+    :param probe_timeout: Seconds to wait for the answer of a single probe.
+    :param cache_path: File remembering the last result, None disables the cache.
+    :param opener: Function (port, baudrate, timeout) returning an open serial-like object.
+    :return: DiscoveryResult or None if no radio answered in time.
+    """
+    started = time.perf_counter()
+    end = started + deadline
+
+    cached = load_cached(cache_path) if cache_path else None
+    if cached:
+        radio_id = probe(cached[0], cached[1], probe_timeout, opener)
+        if radio_id:
+            return DiscoveryResult(
+                cached[0], cached[1], radio_id, time.perf_counter() - started
+            )
+        baudrates = [cached[1]] + [b for b in baudrates if b != cached[1]]
+
+    if ports is None:
+        ports = list_serial_ports()
+    if not ports:
+        return None
+
+    finished = threading.Event()  # Set on the first hit or when all ports are done
+    results = []
+    lock = threading.Lock()
+    remaining = [len(ports)]
+
+    def probe_port(port):
+        try:
+            for baudrate in baudrates:
+                if finished.is_set() or time.perf_counter() + probe_timeout > end:
+                    return
+                radio_id = probe(port, baudrate, probe_timeout, opener)
+                if radio_id:
+                    elapsed = time.perf_counter() - started
+                    results.append(DiscoveryResult(port, baudrate, radio_id, elapsed))
+                    finished.set()
+                    return
+        finally:
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    finished.set()
+
+    executor = ThreadPoolExecutor(max_workers=len(ports))
+    for port in ports:
+        executor.submit(probe_port, port)
+    finished.wait(max(0.0, end - time.perf_counter()))
+    # Probes still running give up on their own within probe_timeout
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    if not results:
+        return None
+    result = results[0]
+    if cache_path:
+        save_cached(result.port, result.baudrate, cache_path)
+    return result
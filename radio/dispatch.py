@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+from collections import deque
+from radio.listener import RadioListener
+from radio.events import *
+
+
+class AsyncListener:
+    """
+    Delivers the events of one RadioListener on its own thread.
+
+    The parser (i.e. the serial reader thread) only puts the events in a bounded
+    queue, so a slow listener - logging to disk, updating a GUI, printing - cannot
+    stall the serial reads. When the listener lags behind:
+      - meter readings are conflated: only the latest reading of each meter waits
+        in the queue, a newer one replaces it in place;
+      - if the queue is still full, the oldest event is dropped (DROP_OLDEST) or
+        the reader waits up to put_timeout for room (BLOCK).
+    """
+
+    # Overflow policies
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+
+    METER_EVENTS = (
+        SMeterEvent,
+        POMeterEvent,
+        SWRMeterEvent,
+        VDDMeterEvent,
+        IDDMeterEvent,
+        COMPMeterEvent,
+        ALCMeterEvent,
+    )
+
+    def __init__(
+        self,
+        listener: RadioListener,
+        maxsize: int = 256,
+        policy: str = DROP_OLDEST,
+        conflate=METER_EVENTS,
+        put_timeout: float = 0.1,
+    ):
+        """
+        :param listener: The listener to call.
+        :param maxsize: Maximum number of events waiting for the listener.
+        :param policy: DROP_OLDEST or BLOCK.
+        :param conflate: Event types of which only the latest one is kept in the queue.
+        :param put_timeout: Seconds the reader may wait for room under BLOCK.
+        """
+        if policy not in (self.DROP_OLDEST, self.BLOCK):
+            raise ValueError("Unsupported overflow policy: " + str(policy))
+        self.listener = listener
+        self.maxsize = maxsize
+        self.policy = policy
+        self.conflate = frozenset(conflate or ())
+        self.put_timeout = put_timeout
+        self.name = type(listener).__name__
+
+        self._items = deque()  # [handler, event, time queued] lists
+        self._latest = {}  # conflated event type -> its item waiting in _items
+        self._condition = threading.Condition()
+        self._running = True
+        self._callbacks = {}  # event type -> callback subscribed in the parser
+
+        # Statistics
+        self.delivered = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.max_queued = 0
+        self.last_lag = 0.0  # Seconds between queueing and delivering an event
+        self.max_lag = 0.0
+
+        self.thread = threading.Thread(target=self._run, name="listener-" + self.name)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def attach(self, parser) -> None:
+        """
+        Subscribes the handlers the listener overrides to the parser.
+        """
+        for event_type, name in parser.LISTENER_METHODS.items():
+            if getattr(type(self.listener), name, None) is getattr(RadioListener, name):
+                continue
+            handler = getattr(self.listener, name)
+            callback = lambda event, handler=handler: self.submit(handler, event)
+            callback.__qualname__ = "submit " + handler.__qualname__  # For traces
+            self._callbacks[event_type] = callback
+            parser.subscribe(event_type, callback)
+
+    def detach(self, parser) -> None:
+        for event_type, callback in self._callbacks.items():
+            parser.unsubscribe(event_type, callback)
+        self._callbacks = {}
+
+    def submit(self, handler, event) -> bool:
+        """
+        Queues an event for the listener thread.
+
+        :return: False if the event had to be dropped.
+        """
+        now = time.perf_counter()
+        event_type = type(event)
+        with self._condition:
+            if event_type in self.conflate:
+                item = self._latest.get(event_type)
+                if item is not None:
+                    item[1] = event
+                    item[2] = now
+                    self.conflated += 1
+                    return True
+
+            if len(self._items) >= self.maxsize:
+                if self.policy == self.DROP_OLDEST:
+                    oldest = self._items.popleft()
+                    if self._latest.get(type(oldest[1])) is oldest:
+                        del self._latest[type(oldest[1])]
+                    self.dropped += 1
+                elif not self._condition.wait_for(
+                    lambda: len(self._items) < self.maxsize, self.put_timeout
+                ):
+                    self.dropped += 1
+                    return False
+
+            item = [handler, event, now]
+            self._items.append(item)
+            if event_type in self.conflate:
+                self._latest[event_type] = item
+            if len(self._items) > self.max_queued:
+                self.max_queued = len(self._items)
+            self._condition.notify_all()
+            return True
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "queued": len(self._items),
+                "max_queued": self.max_queued,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "conflated": self.conflated,
+                "last_lag": self.last_lag,
+                "max_lag": self.max_lag,
+            }
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """
+        Delivers the events still in the queue and stops the thread.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self.thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._items or not self._running)
+                if not self._items:
+                    return
+                item = self._items.popleft()
+                handler, event, queued = item
+                if self._latest.get(type(event)) is item:
+                    del self._latest[type(event)]
+                self._condition.notify_all()
+
+            lag = time.perf_counter() - queued
+            self.last_lag = lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            try:
+                handler(event)
+            except Exception as e:
+                logging.error("Exception in %s.%s: %s", self.name, handler.__name__, e)
+            self.delivered += 1
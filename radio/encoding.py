@@ -0,0 +1,103 @@
+"""
+CAT commands as bytes, ready for the serial port.
+
+CommandEncoder builds the commands as bytes so that the writer thread sends them
+without encoding them first: commands without parameters, and the PC/MD commands for
+every power and mode, are encoded once when the encoder is created; batches of meter
+queries once per combination. All of them come from the protocol table (see
+radio.protocol), a sibling model only needs its own Protocol.
+"""
+from radio.events import FrequencyEvent, TransceiverInfoEvent
+from radio.protocol import FTDX10
+
+
+class CommandEncoder:
+    """
+    Bytes counterpart of the generate_*() methods of RadioParser.
+    """
+
+    def __init__(self, protocol=FTDX10):
+        """
+        :param protocol: radio.protocol.Protocol of the radio model.
+        """
+        commands = protocol.commands
+        frequency = protocol.vfo_commands(FrequencyEvent)
+        info = protocol.vfo_commands(TransceiverInfoEvent)
+
+        def query(opcode):
+            return commands[opcode].query.encode()
+
+        def set_command(opcode, value):
+            return protocol.set_command(opcode, value).encode()
+
+        self.protocol = protocol
+        self.GET_FREQUENCY = {vfo: c.query.encode() for vfo, c in frequency.items()}
+        self.GET_INFO = {vfo: c.query.encode() for vfo, c in info.items()}
+        self.GET_MODE = query("MD")
+        self.GET_TRANSMIT = query("TX")
+        self.SET_TRANSMIT = {flag: set_command("TX", flag) for flag in (False, True)}
+        self.GET_TXPOWER = query("PC")
+        self.GET_ACTIVE_VFO = query("VS")
+        self.SET_ACTIVE_VFO = {
+            vfo: set_command("VS", vfo) for vfo in protocol.enums["vfo"].codes
+        }
+        self.SET_AUTO_INFORMATION = {
+            flag: set_command("AI", flag) for flag in (False, True)
+        }
+        # Meter name -> RM query
+        self.GET_METER = {
+            name: protocol.meter_query(name).encode()
+            for name in protocol.enums["meter"].codes
+        }
+        # Mode name -> MD command
+        self.SET_MODE = {
+            mode: set_command("MD", mode) for mode in protocol.enums["mode"].codes
+        }
+        # PC command for every power up to the highest one, indexed by the power
+        self.txpower_min, self.txpower_max = commands["PC"].limits
+        self.SET_TXPOWER = tuple(
+            set_command("PC", po) for po in range(self.txpower_max + 1)
+        )
+        # VFO -> FA/FB pattern, formatted with the frequency
+        self.SET_FREQUENCY = {
+            vfo: c.set_format.encode() for vfo, c in frequency.items()
+        }
+        self._meter_batches = {}  # Tuple of meter names -> joined queries
+
+    def get_meters(self, meters) -> bytes:
+        """
+        :param meters: Meter names, any of "s", "comp", "alc", "po", "swr", "idd",
+                       "vdd", queried in this order.
+        :return: The queries for all of them, to be sent in a single write.
+        """
+        key = tuple(meters)
+        batch = self._meter_batches.get(key)
+        if batch is None:
+            for meter in key:
+                if meter not in self.GET_METER:
+                    raise ValueError("Unsupported meter: " + str(meter))
+            batch = b"".join(self.GET_METER[meter] for meter in key)
+            self._meter_batches[key] = batch
+        return batch
+
+    def set_frequency(self, vfo: int, frequency: int) -> bytes:
+        return self.SET_FREQUENCY[vfo] % frequency
+
+    def set_mode(self, mode: str) -> bytes:
+        command = self.SET_MODE.get(mode)
+        if command is None:
+            mode = str(mode).lower()
+            if mode not in self.SET_MODE:
+                raise ValueError("Unsupported mode: " + mode + " !")
+            command = self.SET_MODE[mode]
+        return command
+
+    def set_txpower(self, po: int) -> bytes:
+        """
+        :param po: Power in watts, limited to the range of the PC command.
+        """
+        if po < self.txpower_min:
+            po = self.txpower_min
+        elif po > self.txpower_max:
+            po = self.txpower_max
+        return self.SET_TXPOWER[int(po)]
@@ -0,0 +1,523 @@
+"""
+Optional out-of-process serial engine.
+
+The serial threads, the RadioParser and the meter polling run in a process of their
+own, so they do not compete for the GIL with the GUI. The engine publishes the rig
+state and the latest meter samples in shared memory (SharedRadioState), which the
+GUI reads without any round trip to the engine. Commands travel over a pipe.
+
+The TX watchdog runs in the engine process too, next to the serial port it unkeys.
+The GUI feeds it with heartbeat(), a counter in shared memory the engine watches.
+
+    engine = SerialEngine("COM3", 38400, max_key_down=60, heartbeat_timeout=2)
+    engine.start_tune("fm", 10)
+    engine.read_state()["meters"]["swr"]
+    engine.stop_tune()
+    engine.close()
+"""
+import itertools
+import multiprocessing
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from overrides import overrides
+from radio.events import *
+from radio.exceptions import RadioException
+from radio.listener import RadioListener
+
+# Meters in the order of their slots in the shared state
+METERS = ("s", "comp", "alc", "po", "swr", "idd", "vdd")
+
+
+class SharedRadioState:
+    """
+    Rig state in a fixed binary layout in shared memory.
+
+    The block starts with a sequence counter (seqlock): the single writer makes the
+    counter odd, writes the fields and makes it even again. A reader copies the
+    fields between two reads of the counter and retries if the counter was odd or
+    changed meanwhile, so it never sees a half written state and never blocks the
+    writer.
+    """
+
+    SEQUENCE = struct.Struct("<Q")
+    # updated, frequency A/B, mode A/B, txpower, active VFO, transmit, status,
+    # watchdog trips, then per meter: value, number of samples, time of the last
+    # sample
+    BODY = struct.Struct(
+        "<dqq8s8shbbbI" + "h" * len(METERS) + "I" * len(METERS) + "d" * len(METERS)
+    )
+    SIZE = SEQUENCE.size + BODY.size
+
+    FIELDS = (
+        "updated",
+        "frequency_vfo_a",
+        "frequency_vfo_b",
+        "mode_vfo_a",
+        "mode_vfo_b",
+        "txpower",
+        "active_vfo",
+        "transmit",
+        "status",
+        "watchdog_trips",
+    )
+    METER_VALUE = len(FIELDS)
+    METER_COUNT = METER_VALUE + len(METERS)
+    METER_TIME = METER_COUNT + len(METERS)
+
+    # status values
+    STARTING = 0
+    RUNNING = 1
+    STOPPED = 2
+    FAILED = 3
+
+    def __init__(self, name: str = None, create: bool = False):
+        """
+        :param name: Name of the shared memory block to attach to.
+        :param create: Create a new block (the creator is the one writer).
+        """
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=create, size=self.SIZE if create else 0
+        )
+        self.name = self.shm.name
+        self._lock = threading.Lock()  # Serializes the writer threads of a process
+        self._index = {field: i for i, field in enumerate(self.FIELDS)}
+        self._values = None
+        if create:
+            self._values = (
+                [0.0, -1, -1, b"", b"", -1, -1, -1, self.STARTING, 0]
+                + [-1] * len(METERS)
+                + [0] * len(METERS)
+                + [0.0] * len(METERS)
+            )
+            self.SEQUENCE.pack_into(self.shm.buf, 0, 0)
+            self._write()
+
+    @classmethod
+    def create(cls) -> "SharedRadioState":
+        return cls(create=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedRadioState":
+        """
+        Attaches to the block created by another process. A state attached this
+        way can only be written after load().
+        """
+        return cls(name)
+
+    def load(self) -> None:
+        """
+        Takes over the current content, so that this instance can be the writer.
+        """
+        with self._lock:
+            self._values = list(self._read_raw()[1])
+
+    def update(self, **fields) -> None:
+        """
+        Writes the given fields (see FIELDS), e.g. update(txpower=50, transmit=1).
+        """
+        with self._lock:
+            for field, value in fields.items():
+                if field.startswith("mode_"):
+                    value = (value or "").encode("ascii")[:8]
+                self._values[self._index[field]] = value
+            self._values[0] = time.time()
+            self._write()
+
+    def update_meter(self, meter: str, value: int) -> None:
+        i = METERS.index(meter)
+        now = time.time()
+        with self._lock:
+            self._values[self.METER_VALUE + i] = value
+            self._values[self.METER_COUNT + i] = (
+                self._values[self.METER_COUNT + i] + 1
+            ) & 0xFFFFFFFF
+            self._values[self.METER_TIME + i] = now
+            self._values[0] = now
+            self._write()
+
+    def read(self, retries: int = 10000) -> dict:
+        """
+        :return: Consistent snapshot of the state:
+                 {"sequence", "updated", "frequency_vfo_a", ..., "status",
+                  "meters": {name: value}, "meter_counts": {name: number of samples},
+                  "meter_times": {name: time.time() of the last sample}}
+        :raises TimeoutError: If the writer never left the block alone long enough.
+        """
+        sequence, values = self._read_raw(retries)
+        state = dict(zip(self.FIELDS, values))
+        state["sequence"] = sequence
+        state["mode_vfo_a"] = values[3].rstrip(b"\0").decode("ascii") or None
+        state["mode_vfo_b"] = values[4].rstrip(b"\0").decode("ascii") or None
+        n = len(METERS)
+        for key, start in (
+            ("meters", self.METER_VALUE),
+            ("meter_counts", self.METER_COUNT),
+            ("meter_times", self.METER_TIME),
+        ):
+            state[key] = dict(zip(METERS, values[start : start + n]))
+        return state
+
+    def close(self) -> None:
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
+
+    def _read_raw(self, retries: int = 10000) -> tuple:
+        buf = self.shm.buf
+        for attempt in range(retries):
+            (before,) = self.SEQUENCE.unpack_from(buf, 0)
+            if not before & 1:
+                values = self.BODY.unpack_from(buf, self.SEQUENCE.size)
+                (after,) = self.SEQUENCE.unpack_from(buf, 0)
+                if before == after:
+                    return before, values
+            if attempt % 100 == 99:
+                time.sleep(0)  # Let the writer finish
+        raise TimeoutError("The shared radio state is never stable")
+
+    def _write(self) -> None:
+        # Called with the lock held
+        buf = self.shm.buf
+        (sequence,) = self.SEQUENCE.unpack_from(buf, 0)
+        self.SEQUENCE.pack_into(buf, 0, sequence + 1)  # Odd: write in progress
+        self.BODY.pack_into(buf, self.SEQUENCE.size, *self._values)
+        self.SEQUENCE.pack_into(buf, 0, sequence + 2)
+
+
+class StatePublisher(RadioListener):
+    """
+    Copies the state of a Radio into a SharedRadioState on every change.
+    Added after the Radio itself, so the Radio has already applied the event.
+    """
+
+    def __init__(self, radio, state: SharedRadioState):
+        self.radio = radio
+        self.state = state
+
+    def publish(self) -> None:
+        radio = self.radio
+        self.state.update(
+            frequency_vfo_a=_frequency(radio.frequency_vfo_a),
+            frequency_vfo_b=_frequency(radio.frequency_vfo_b),
+            mode_vfo_a=radio.mode_vfo_a,
+            mode_vfo_b=radio.mode_vfo_b,
+            txpower=-1 if radio.txpower is None else radio.txpower,
+            active_vfo=-1 if radio.active_vfo is None else radio.active_vfo,
+            transmit=-1 if radio.transmit is None else int(radio.transmit),
+        )
+
+    @overrides
+    def on_frequency(self, event: FrequencyEvent) -> None:
+        self.publish()
+
+    @overrides
+    def on_mode(self, event: ModeEvent) -> None:
+        self.publish()
+
+    @overrides
+    def on_active_vfo(self, event: ActiveVFOEvent) -> None:
+        self.publish()
+
+    @overrides
+    def on_tx_power(self, event: TXPowerEvent) -> None:
+        self.publish()
+
+    @overrides
+    def on_transmit(self, event: TransmitEvent) -> None:
+        self.publish()
+
+    @overrides
+    def on_transceiver_info(self, event: TransceiverInfoEvent) -> None:
+        self.publish()
+
+    @overrides
+    def on_s_meter(self, event: SMeterEvent) -> None:
+        self.state.update_meter("s", event.value)
+
+    @overrides
+    def on_comp_meter(self, event: COMPMeterEvent) -> None:
+        self.state.update_meter("comp", event.value)
+
+    @overrides
+    def on_alc_meter(self, event: ALCMeterEvent) -> None:
+        self.state.update_meter("alc", event.value)
+
+    @overrides
+    def on_po_meter(self, event: POMeterEvent) -> None:
+        self.state.update_meter("po", event.value)
+
+    @overrides
+    def on_swr_meter(self, event: SWRMeterEvent) -> None:
+        self.state.update_meter("swr", event.value)
+
+    @overrides
+    def on_idd_meter(self, event: IDDMeterEvent) -> None:
+        self.state.update_meter("idd", event.value)
+
+    @overrides
+    def on_vdd_meter(self, event: VDDMeterEvent) -> None:
+        self.state.update_meter("vdd", event.value)
+
+
+def run_engine(
+    state_name: str,
+    connection,
+    port: str,
+    baudrate: int,
+    simulate: bool = False,
+    poll_interval: float = 0.1,
+    max_key_down: float = None,
+    heartbeat_timeout: float = None,
+    heartbeats=None,
+) -> None:
+    """
+    Entry point of the engine process.
+
+    Requests arrive on the connection as (id, method, args, reply) tuples. The
+    method is looked up on the RadioSession first and then on its Radio; if reply
+    is set, (id, result or exception) is sent back. None stops the engine.
+    While transmitting the meters are polled every poll_interval seconds.
+
+    With max_key_down a TXWatchdog guards the radio; with heartbeat_timeout it also
+    unkeys when heartbeats, a counter in shared memory the parent increments, stops
+    changing. Every trip is counted in the watchdog_trips field of the state.
+    """
+    from radio.session import RadioSession
+    from radio.watchdog import TXWatchdog
+
+    state = SharedRadioState.attach(state_name)
+    state.load()
+    serial_port = None
+    if simulate:
+        from radio.simulator import SimulatedRig
+
+        serial_port = SimulatedRig(baudrate=baudrate)
+    session = RadioSession(port, baudrate, serial_port=serial_port)
+    try:
+        session.connect()
+        publisher = StatePublisher(session.radio, state)
+        session.radio.add_listener(publisher, asynchronous=False)
+        publisher.publish()
+        watchdog = None
+        if max_key_down is not None:
+
+            def on_trip(reason):
+                state.update(watchdog_trips=watchdog.trips)
+                # The reply publishes the unkeyed state
+                session.radio.get_transmit()
+
+            watchdog = TXWatchdog(
+                session.radio,
+                max_key_down=max_key_down,
+                heartbeat_timeout=heartbeat_timeout,
+                on_trip=on_trip,
+            )
+        state.update(status=SharedRadioState.RUNNING)
+        connection.send(("ready", None))
+    except Exception as e:
+        state.update(status=SharedRadioState.FAILED)
+        connection.send(("error", e))
+        state.close()
+        return
+
+    poll_count = 0
+    next_poll = time.monotonic()
+    beats = None
+    # The heartbeats are looked at a few times per heartbeat_timeout
+    heartbeat_check = None
+    if watchdog is not None and heartbeat_timeout is not None:
+        heartbeat_check = heartbeat_timeout / 4
+    try:
+        while True:
+            if heartbeat_check is not None and heartbeats.value != beats:
+                beats = heartbeats.value
+                watchdog.heartbeat()
+            timeout = None
+            if session.tuned:
+                timeout = max(0.0, next_poll - time.monotonic())
+            if heartbeat_check is not None:
+                if timeout is None or timeout > heartbeat_check:
+                    timeout = heartbeat_check
+            if not connection.poll(timeout):
+                if session.tuned and time.monotonic() >= next_poll:
+                    session.radio.poll_tune_meters(poll_count)
+                    poll_count += 1
+                    next_poll = time.monotonic() + poll_interval
+                continue
+
+            request = connection.recv()
+            if request is None:
+                break
+            request_id, method, args, reply = request
+            try:
+                target = session if hasattr(session, method) else session.radio
+                if method.startswith("_"):
+                    raise AttributeError("Private method: " + method)
+                result = getattr(target, method)(*args)
+            except Exception as e:
+                result = e
+            # The reply may overtake the publisher on the reader thread - publish
+            # first, so that the caller finds the state its call produced
+            publisher.publish()
+            if reply:
+                connection.send((request_id, result))
+            next_poll = time.monotonic()
+    except (EOFError, OSError):
+        pass  # The parent went away
+    finally:
+        session.close()
+        state.update(status=SharedRadioState.STOPPED)
+        state.close()
+        connection.close()
+
+
+class SerialEngine:
+    """
+    Starts run_engine() in a new process and talks to it.
+
+    The rig state is read from shared memory (read_state()) without involving the
+    engine; call() sends a request and waits for its result.
+    """
+
+    def __init__(
+        self,
+        port: str,
+        baudrate: int,
+        simulate: bool = False,
+        poll_interval: float = 0.1,
+        start_timeout: float = 10.0,
+        max_key_down: float = None,
+        heartbeat_timeout: float = None,
+    ):
+        """
+        :param port: Serial port the radio is connected to.
+        :param baudrate: Baud rate configured in the radio's CAT menu.
+        :param simulate: Talk to a SimulatedRig in the engine process instead.
+        :param poll_interval: Seconds between meter polls while transmitting.
+        :param start_timeout: Seconds to wait for the engine to connect.
+        :param max_key_down: Seconds the radio may transmit before the watchdog of
+                             the engine unkeys it, None for no watchdog.
+        :param heartbeat_timeout: Seconds without heartbeat() after which the
+                                  watchdog unkeys the radio, None to ignore it.
+        :raises TimeoutError: If the engine did not come up in time.
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.state = SharedRadioState.create()
+        # spawn: a forked copy of a process running Tk and threads is not safe
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        # Only written here, so it needs no lock
+        self.heartbeats = context.RawValue("Q", 0)
+        self.process = context.Process(
+            target=run_engine,
+            args=(
+                self.state.name,
+                child_connection,
+                port,
+                baudrate,
+                simulate,
+                poll_interval,
+                max_key_down,
+                heartbeat_timeout,
+                self.heartbeats,
+            ),
+            name="radio-engine",
+            daemon=True,
+        )
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.process.start()
+        child_connection.close()
+
+        try:
+            if not self.connection.poll(start_timeout):
+                raise TimeoutError("The radio engine did not start in time")
+            kind, error = self._receive()
+            if kind == "error":
+                raise error
+        except BaseException:
+            self.close()
+            raise
+
+    def matches(self, port: str, baudrate: int) -> bool:
+        return self.port == port and self.baudrate == baudrate
+
+    def read_state(self) -> dict:
+        """
+        :return: See SharedRadioState.read().
+        """
+        return self.state.read()
+
+    def call(self, method: str, *args, timeout: float = 5.0):
+        """
+        Calls a RadioSession (or Radio) method in the engine and returns its result.
+
+        :raises TimeoutError: If no result came back in time.
+        :raises: The exception raised by the method.
+        """
+        with self._lock:
+            request_id = next(self._ids)
+            self.connection.send((request_id, method, args, True))
+            deadline = time.monotonic() + timeout
+            while True:
+                if not self.connection.poll(max(0.0, deadline - time.monotonic())):
+                    raise TimeoutError(f"No answer from the radio engine to {method}")
+                answer_id, result = self._receive()
+                if answer_id == request_id:
+                    break  # Answers of calls that timed out earlier are skipped
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def send(self, method: str, *args) -> None:
+        """
+        Like call() but does not wait for the result.
+        """
+        with self._lock:
+            self.connection.send((next(self._ids), method, args, False))
+
+    def heartbeat(self) -> None:
+        """
+        Tells the watchdog of the engine that the caller is still alive. A write to
+        shared memory, cheap enough to be called on every GUI update.
+        """
+        self.heartbeats.value += 1
+
+    def start_tune(self, mode: str, txpower: int):
+        return self.call("start_tune", mode, txpower)
+
+    def stop_tune(self):
+        return self.call("stop_tune")
+
+    def _receive(self):
+        try:
+            return self.connection.recv()
+        except EOFError:
+            raise RadioException(
+                f"The radio engine exited (exit code {self.process.exitcode})"
+            )
+
+    def close(self, timeout: float = 2.0) -> None:
+        """
+        Stops the engine (unkeying the radio) and frees the shared memory.
+        """
+        try:
+            with self._lock:
+                self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.connection.close()
+        self.state.close()
+        self.state.unlink()
+
+
+def _frequency(value) -> int:
+    return -1 if value is None else int(value)
@@ -9,8 +9,8 @@ class ConfirmationEvent:
 
 
 class FrequencyEvent:
-    def __init__(self, frequency: str, vfo: int):
-        self.frequency = frequency
+    def __init__(self, frequency: int, vfo: int):
+        self.frequency = frequency  # Hz
         self.vfo = vfo
 
 
@@ -71,3 +71,52 @@ class TransmitEvent:
 
     def __str__(self):
         return f"TransmitEvent(transmit={self.transmit})"
+
+
+class TransceiverInfoEvent:
+    """
+    Complete state of one VFO as reported by IF (VFO A) or OI (VFO B).
+    """
+
+    # [P7] Where the frequency comes from
+    VFO = 0
+    MEMORY = 1
+    MEMORY_TUNE = 2
+    QUICK_MEMORY_BANK = 3
+    PMS = 5
+
+    # [P10] Repeater shift
+    SIMPLEX = 0
+    SHIFT_PLUS = 1
+    SHIFT_MINUS = 2
+
+    def __init__(
+        self,
+        vfo: int,
+        frequency: int,
+        mode: str,
+        clarifier: int,
+        rx_clarifier: bool,
+        tx_clarifier: bool,
+        memory_channel: int,
+        memory_mode: int,
+        ctcss: int,
+        shift: int,
+    ):
+        self.vfo = vfo
+        self.frequency = frequency  # Hz
+        self.mode = mode
+        self.clarifier = clarifier  # Clarifier offset in Hz (-9999 to +9999)
+        self.rx_clarifier = rx_clarifier
+        self.tx_clarifier = tx_clarifier
+        self.memory_channel = memory_channel
+        self.memory_mode = memory_mode  # VFO, MEMORY, MEMORY_TUNE, ...
+        self.ctcss = ctcss  # 0: off, 1: CTCSS ENC/DEC, 2: CTCSS ENC, 3: DCS ENC/DEC
+        self.shift = shift  # SIMPLEX, SHIFT_PLUS or SHIFT_MINUS
+
+    def __str__(self):
+        return (
+            f"TransceiverInfoEvent(vfo={self.vfo}, frequency={self.frequency}, "
+            f"mode={self.mode}, clarifier={self.clarifier}, "
+            f"memory_mode={self.memory_mode}, shift={self.shift})"
+        )
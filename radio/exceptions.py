@@ -3,3 +3,9 @@ class RadioException(Exception):
 
 class SerialException(RadioException):
     pass
+
+class CommandQueueFullException(RadioException):
+    pass
+
+class FrequencyNotAllowedException(RadioException):
+    pass
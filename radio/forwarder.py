@@ -0,0 +1,46 @@
+from overrides import overrides
+from radio.listener import RadioListener
+from radio.events import *
+
+
+class MeterForwarder(RadioListener):
+    """
+    Puts every meter reading on a queue as a (meter, value) tuple, e.g. ("swr", 30).
+
+    The listener methods run on the radio's reader thread; the queue lets another
+    thread (such as a GUI main loop) pick the readings up.
+    """
+
+    def __init__(self, queue):
+        """
+        :param queue: Any object with a thread-safe put() method, e.g. queue.Queue.
+        """
+        self.queue = queue
+
+    @overrides
+    def on_s_meter(self, event: SMeterEvent) -> None:
+        self.queue.put(("s", event.value))
+
+    @overrides
+    def on_po_meter(self, event: POMeterEvent) -> None:
+        self.queue.put(("po", event.value))
+
+    @overrides
+    def on_swr_meter(self, event: SWRMeterEvent) -> None:
+        self.queue.put(("swr", event.value))
+
+    @overrides
+    def on_alc_meter(self, event: ALCMeterEvent) -> None:
+        self.queue.put(("alc", event.value))
+
+    @overrides
+    def on_comp_meter(self, event: COMPMeterEvent) -> None:
+        self.queue.put(("comp", event.value))
+
+    @overrides
+    def on_idd_meter(self, event: IDDMeterEvent) -> None:
+        self.queue.put(("idd", event.value))
+
+    @overrides
+    def on_vdd_meter(self, event: VDDMeterEvent) -> None:
+        self.queue.put(("vdd", event.value))
@@ -0,0 +1,106 @@
+import logging
+import re
+
+# A CAT frame: two letter opcode and printable parameters up to the ";" terminator,
+# or the "?;" error reply
+FRAME = re.compile(rb"(?:[A-Z]{2}[\x20-\x3a\x3c-\x7e]*|\?);")
+
+
+class Framer:
+    """
+    Splits the byte stream coming from the radio into validated CAT frames.
+
+    Line noise must not break the reader thread, so every frame is checked before it
+    is handed on: it has to be printable ASCII, start with an opcode and fit into
+    max_frame bytes. A frame failing the check is searched for a known opcode
+    (the noise may only precede a good frame); without one it is dropped and reading
+    resynchronises at the next terminator. Bytes without a terminator are never
+    kept beyond max_frame, so the buffer cannot grow without limit.
+    """
+
+    def __init__(self, opcodes=(), max_frame: int = 64):
+        """
+        :param opcodes: Known opcodes (e.g. RadioParser.parsers) - a frame preceded
+                        by noise is only recovered if it starts with one of them.
+        :param max_frame: Longest frame accepted, in bytes with the terminator.
+        """
+        self.opcodes = frozenset(
+            opcode.encode("ascii") if isinstance(opcode, str) else opcode
+            for opcode in opcodes
+        )
+        self.max_frame = max_frame
+        self.buffer = b""
+
+        # Statistics
+        self.frames = 0  # Valid frames returned
+        self.recovered = 0  # Valid frames found behind noise
+        self.dropped_frames = 0
+        self.dropped_bytes = 0
+
+    def feed(self, data: bytes) -> list:
+        """
+        Adds received bytes and returns the frames completed by them.
+
+        :param data: Bytes read from the serial port.
+        :return: List of frames as str, each ending with ";".
+        """
+        buffer = self.buffer + data if self.buffer else data
+        frames = []
+        start = 0
+        end = buffer.find(b";")
+        while end != -1:
+            frame = buffer[start : end + 1]
+            if len(frame) <= self.max_frame and FRAME.fullmatch(frame):
+                frames.append(frame.decode("ascii"))
+            else:
+                self._resync(frame, frames)
+            start = end + 1
+            end = buffer.find(b";", start)
+
+        rest = buffer[start:]
+        if len(rest) >= self.max_frame:
+            # Can never become a valid frame - keep only what may start one
+            keep = self._last_opcode(rest[-(self.max_frame - 1) :])
+            self._drop(len(rest) - len(keep))
+            self.dropped_frames += 1
+            rest = keep
+        self.buffer = rest
+        self.frames += len(frames)
+        return frames
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "recovered": self.recovered,
+            "dropped_frames": self.dropped_frames,
+            "dropped_bytes": self.dropped_bytes,
+            "buffered": len(self.buffer),
+        }
+
+    def reset(self) -> None:
+        self.buffer = b""
+
+    def _resync(self, frame: bytes, frames: list) -> None:
+        # A match always ends at the terminator, the only ";" in the frame
+        match = FRAME.search(frame, max(1, len(frame) - self.max_frame))
+        while match is not None:
+            if frame[match.start() : match.start() + 2] in self.opcodes:
+                self._drop(match.start())
+                frames.append(match.group().decode("ascii"))
+                self.recovered += 1
+                return
+            match = FRAME.search(frame, match.start() + 1)
+        self._drop(len(frame))
+        self.dropped_frames += 1
+
+    def _last_opcode(self, data: bytes) -> bytes:
+        for i in range(len(data) - 2, -1, -1):
+            if data[i : i + 2] in self.opcodes:
+                return data[i:]
+        return b""
+
+    def _drop(self, count: int) -> None:
+        if count <= 0:
+            return
+        self.dropped_bytes += count
+        logging.debug("Framer dropped %d bytes", count)
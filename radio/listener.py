@@ -48,3 +48,11 @@ class RadioListener:
         :param event: An instance of TransmitEvent.
         """
         pass
+
+    def on_transceiver_info(self, event: TransceiverInfoEvent) -> None:
+        """
+        Called with the complete VFO state from an IF or OI reply.
+
+        :param event: An instance of TransceiverInfoEvent.
+        """
+        pass
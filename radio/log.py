@@ -0,0 +1,149 @@
+"""
+Logging set-up shared by the GUI and the command line interface.
+
+Records are handed to a queue and written by a background thread, so a slow
+console or disk never delays the serial reader/writer threads. Identical messages
+repeated in a burst (e.g. the same unsupported reply from the radio) are let
+through once per interval.
+"""
+import atexit
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+# logging.conf next to main.py
+DEFAULT_CONFIG_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logging.conf"
+)
+DEFAULT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener = None
+_lock = threading.Lock()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets the same message (same logger, level, text and arguments) through at most
+    once per interval. The next copy let through tells how many were suppressed.
+    """
+
+    def __init__(self, interval: float = 5.0, max_messages: int = 1024):
+        """
+        :param interval: Seconds during which repeats of a message are suppressed.
+        :param max_messages: Number of distinct messages remembered before forgetting all.
+        """
+        super().__init__()
+        self.interval = interval
+        self.max_messages = max_messages
+        self.suppressed = 0  # Total number of suppressed records
+        self._seen = {}  # message key -> [time let through, suppressed since]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, record.msg, record.args)
+        try:
+            hash(key)
+        except TypeError:
+            return True  # Unhashable arguments (e.g. a dict) are never limited
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] < self.interval:
+                seen[1] += 1
+                self.suppressed += 1
+                return False
+            if seen is not None and seen[1]:
+                record.msg = "%s (suppressed %d times)" % (record.msg, seen[1])
+            if len(self._seen) >= self.max_messages:
+                self._seen.clear()
+            self._seen[key] = [now, 0]
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves the formatting to the listener thread and drops
+    records instead of blocking when the queue is full.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats the message on the calling thread. The record
+        # stays in this process, so it can be queued as it is.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(
+    config_file: str = DEFAULT_CONFIG_FILE,
+    level=None,
+    rate_limit: float = 5.0,
+    queue_size: int = 10000,
+) -> None:
+    """
+    Configures logging once per process; later calls only change the level.
+
+    :param config_file: logging.config file defining the handlers. If None or
+                        missing, records go to stderr in DEFAULT_FORMAT.
+    :param level: Level of the root logger, overrides the one in config_file.
+    :param rate_limit: Seconds during which repeats of a message are suppressed,
+                       0 disables the limit.
+    :param queue_size: Maximum number of records waiting to be written.
+    """
+    global _listener
+    root = logging.getLogger()
+    with _lock:
+        if _listener is None:
+            if config_file and os.path.exists(config_file):
+                logging.config.fileConfig(config_file, disable_existing_loggers=False)
+            else:
+                logging.basicConfig(
+                    level=logging.INFO, format=DEFAULT_FORMAT, stream=sys.stderr
+                )
+
+            handlers = root.handlers[:]
+            for handler in handlers:
+                root.removeHandler(handler)
+            queue_handler = DeferredQueueHandler(queue.Queue(queue_size))
+            if rate_limit:
+                queue_handler.addFilter(RateLimitFilter(rate_limit))
+            root.addHandler(queue_handler)
+
+            _listener = logging.handlers.QueueListener(
+                queue_handler.queue, *handlers, respect_handler_level=True
+            )
+            _listener.start()
+            atexit.register(stop_logging)
+    if level is not None:
+        root.setLevel(level)
+
+
+def stop_logging() -> None:
+    """
+    Writes the records still queued and stops the logging thread.
+    """
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            if isinstance(handler, DeferredQueueHandler):
+                root.removeHandler(handler)
+        for handler in _listener.handlers:
+            root.addHandler(handler)  # Later records are written directly
+        _listener = None
@@ -0,0 +1,60 @@
+from bisect import bisect_right
+
+# RM readings (0-255) of the FTDX10 meters and the values printed on the meter scale
+# at those readings. Values in between are interpolated linearly.
+SWR_CALIBRATION = ((0, 1.0), (64, 1.5), (128, 2.0), (192, 3.0), (255, 5.0))
+PO_CALIBRATION = ((0, 0.0), (35, 5.0), (85, 10.0), (150, 50.0), (200, 100.0), (255, 150.0))
+
+
+def calibrate(raw: int, calibration=SWR_CALIBRATION) -> float:
+    """
+    Converts a raw RM reading to the unit of the meter.
+
+    :param raw: Reading between 0 and 255.
+    :param calibration: Sorted (reading, value) points, e.g. SWR_CALIBRATION.
+    :return: The interpolated value.
+    """
+    points = [reading for reading, _ in calibration]
+    i = bisect_right(points, raw)
+    if i == 0:
+        return calibration[0][1]
+    if i == len(calibration):
+        return calibration[-1][1]
+    (x0, y0), (x1, y1) = calibration[i - 1], calibration[i]
+    return y0 + (y1 - y0) * (raw - x0) / (x1 - x0)
+
+
+def raw_from_value(value: float, calibration=SWR_CALIBRATION) -> int:
+    """
+    The inverse of calibrate(): the RM reading at which the meter shows a value.
+
+    :param value: Value in the unit of the meter.
+    :param calibration: Sorted (reading, value) points, e.g. SWR_CALIBRATION.
+    :return: The interpolated reading, rounded, between the first and last point.
+    """
+    values = [point for _, point in calibration]
+    i = bisect_right(values, value)
+    if i == 0:
+        return calibration[0][0]
+    if i == len(calibration):
+        return calibration[-1][0]
+    (x0, y0), (x1, y1) = calibration[i - 1], calibration[i]
+    return round(x0 + (x1 - x0) * (value - y0) / (y1 - y0))
+
+
+def swr_from_raw(raw: int) -> float:
+    return calibrate(raw, SWR_CALIBRATION)
+
+
+def po_from_raw(raw: int) -> float:
+    """
+    :return: Output power in watts.
+    """
+    return calibrate(raw, PO_CALIBRATION)
+
+
+def raw_from_po(watts: float) -> int:
+    """
+    :return: The PO reading for an output power in watts.
+    """
+    return raw_from_value(watts, PO_CALIBRATION)
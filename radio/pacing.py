@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import deque
+
+
+class AdaptivePacer:
+    """
+    Chooses the pause between two writes to the radio from the measured turnaround.
+
+    Every write announces how many replies it will produce. The time from the write
+    until its first reply is the turnaround sample. The fastest sample is the
+    turnaround of the radio itself; a write made while earlier replies were still
+    on the wire waits behind them, so a reply slower than late_factor times the
+    fastest turnaround is late. Like TCP's retransmission timer the pacer also keeps
+    a smoothed turnaround and its mean deviation; replies still missing after
+    missing_factor times smoothed + 4 * deviation are given up.
+
+    On-time replies shrink the delay by `decrease` down to min_delay; a late or
+    missing reply doubles it (at least to backoff_floor) up to max_delay. Like a
+    congestion window, no write is made while more than `window` replies are
+    outstanding, so a caller writing faster than the link carries the replies
+    waits instead of queueing seconds of replies.
+
+    Replies are matched to writes in order, so unsolicited replies (auto information)
+    skew the measurements; the radio runs with AI off.
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = 0.0,
+        min_delay: float = 0.0,
+        max_delay: float = 0.2,
+        decrease: float = 0.75,
+        backoff_floor: float = 0.01,
+        min_timeout: float = 0.05,
+        missing_factor: float = 4.0,
+        late_factor: float = 2.0,
+        window: int = 8,
+    ):
+        """
+        :param initial_delay: Delay until the first measurements come in (s).
+        :param min_delay: Smallest delay the pacer goes down to (s).
+        :param max_delay: Largest delay the pacer backs off to (s).
+        :param decrease: Factor applied to the delay after an on-time reply.
+        :param backoff_floor: Smallest delay after a back-off (s).
+        :param min_timeout: Replies are never considered late sooner than this (s).
+        :param missing_factor: A write whose replies have not all arrived within
+                               this many smoothed bounds counts as missing.
+        :param late_factor: A reply is late when it took this many times the
+                            fastest turnaround.
+        :param window: Replies that may be outstanding before the next write waits.
+        """
+        self.delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, initial_delay)
+        self.decrease = decrease
+        self.backoff_floor = backoff_floor
+        self.min_timeout = min_timeout
+        self.missing_factor = missing_factor
+        self.late_factor = late_factor
+        self.window = window
+
+        self.turnaround = None  # Smoothed turnaround (s)
+        self.deviation = 0.0  # Mean deviation of the turnaround (s)
+        self.min_turnaround = None  # Fastest turnaround (s)
+        self._pending = deque()  # [time written, replies outstanding, first reply seen]
+        self._writes = deque(maxlen=32)  # Times of the recent writes
+        self._replies = deque(maxlen=32)  # Times of the recent replies
+        # Seconds between replies that followed each other on the wire, the time the
+        # link needs per reply
+        self._reply_gaps = deque(maxlen=32)
+        self._last_reply = None
+        self._condition = threading.Condition()
+
+        # Statistics
+        self.samples = 0
+        self.late = 0
+        self.missing = 0
+        self.throttled = 0  # Writes that waited for the window
+
+    @property
+    def timeout(self) -> float:
+        """
+        :return: Seconds after which a reply is late.
+        """
+        if self.min_turnaround is None:
+            return max(self.min_timeout, 2 * self.max_delay)
+        return max(self.min_timeout, self.late_factor * self.min_turnaround)
+
+    def sent(self, replies: int, now: float = None) -> None:
+        """
+        Records a write to the radio.
+
+        :param replies: Number of replies the written commands will produce.
+        """
+        now = time.perf_counter() if now is None else now
+        with self._condition:
+            self._writes.append(now)
+            if replies:
+                self._pending.append([now, replies, False])
+
+    def received(self, now: float = None) -> None:
+        """
+        Records a reply from the radio.
+        """
+        now = time.perf_counter() if now is None else now
+        with self._condition:
+            if not self._pending:
+                return
+            write = self._pending[0]
+            if self._last_reply is not None and write[0] <= self._last_reply:
+                # Already asked for when the previous reply came: back to back
+                self._reply_gaps.append(now - self._last_reply)
+            self._last_reply = now
+            self._replies.append(now)
+            write[1] -= 1
+            if write[1] == 0:
+                self._pending.popleft()
+            self._condition.notify()  # One less outstanding, see next_delay()
+            if write[2]:
+                return
+            write[2] = True
+
+            sample = now - write[0]
+            if sample > self.timeout:
+                self.late += 1
+                self._back_off()
+            else:
+                self.delay = max(self.min_delay, self.delay * self.decrease)
+            if self.turnaround is None:
+                self.turnaround = sample
+                self.deviation = sample / 2
+                self.min_turnaround = sample
+            else:
+                self.deviation += 0.25 * (abs(sample - self.turnaround) - self.deviation)
+                self.turnaround += 0.125 * (sample - self.turnaround)
+                self.min_turnaround = min(self.min_turnaround, sample)
+            self.samples += 1
+
+    def next_delay(self, now: float = None) -> float:
+        """
+        Gives up on writes whose replies are overdue, waits while more than window
+        replies are outstanding and returns the pause to make before the next write.
+        """
+        now = time.perf_counter() if now is None else now
+        with self._condition:
+            self._give_up(now)
+            if self._outstanding() > self.window:
+                self.throttled += 1
+                while self._outstanding() > self.window:
+                    now = time.perf_counter()
+                    remaining = self._pending[0][0] + self._missing_limit() - now
+                    if remaining > 0:
+                        self._condition.wait(remaining)
+                    else:
+                        self._give_up(now)
+            return self.delay
+
+    def stats(self) -> dict:
+        with self._condition:
+            gaps = sum(self._reply_gaps)
+            return {
+                "delay": self.delay,
+                "rate": _rate(self._writes),  # Writes per second, recently
+                "reply_rate": _rate(self._replies),  # Replies per second, recently
+                # Replies per second the link carries, from back to back replies
+                "max_rate": len(self._reply_gaps) / gaps if gaps else None,
+                "turnaround": self.turnaround,
+                "min_turnaround": self.min_turnaround,
+                "deviation": self.deviation,
+                "timeout": self.timeout,
+                "samples": self.samples,
+                "late": self.late,
+                "missing": self.missing,
+                "throttled": self.throttled,
+                "pending": self._outstanding(),
+            }
+
+    def _outstanding(self) -> int:
+        # Called with the lock held
+        return sum(write[1] for write in self._pending)
+
+    def _missing_limit(self) -> float:
+        # Called with the lock held. The smoothed turnaround includes the time spent
+        # behind other replies, which missing replies must be allowed
+        bound = self.timeout
+        if self.turnaround is not None:
+            bound = max(bound, self.turnaround + 4 * self.deviation)
+        return self.missing_factor * bound
+
+    def _give_up(self, now: float) -> None:
+        # Called with the lock held
+        limit = self._missing_limit()
+        while self._pending and now - self._pending[0][0] > limit:
+            self._pending.popleft()
+            self.missing += 1
+            self._back_off()
+
+    def _back_off(self) -> None:
+        # Called with the lock held
+        self.delay = min(self.max_delay, max(self.backoff_floor, self.delay * 2))
+
+
+def _rate(times) -> float:
+    """
+    :return: Events per second over the given times, None if unknown.
+    """
+    if len(times) > 1 and times[-1] > times[0]:
+        return (len(times) - 1) / (times[-1] - times[0])
+    return None
@@ -0,0 +1,405 @@
+"""
+Declarative description of the Yaesu CAT protocol.
+
+A Protocol lists the enums of a radio model (code <-> name) and its commands: the
+query that reads a value, the format of the command setting it, and the layout of
+the reply, field by field, together with the event the reply becomes.
+Protocol.compile() turns the table into one decode function per opcode - generated
+Python source, the same straight-line slicing one would write by hand - and the
+enums into dictionaries for O(1) lookups both ways.
+
+Supporting another command, or a sibling model, is a matter of adding to the
+tables; RadioParser(protocol=...) and CommandEncoder(protocol=...) take any Protocol.
+"""
+from radio.events import *
+
+# Field kinds
+INT = "int"  # Decimal number, may be signed (e.g. clarifier "+0150")
+TEXT = "text"  # The characters as they are
+ON = "on"  # True if the character is "1"
+NONZERO = "nonzero"  # True unless the character is "0"
+ENUM = "enum"  # Looked up in Protocol.enums[Field.enum]
+
+VFO_NONE = -1
+VFO_A = 0
+VFO_B = 1
+
+
+class Field:
+    """
+    Part of a reply, command[start:end]. Without end the field is one character,
+    a negative end counts from the end of the command (-1 stops before the ";").
+    """
+
+    def __init__(self, name: str, start: int, end: int = None, kind=INT, enum=None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.kind = kind
+        self.enum = enum
+
+
+class Const:
+    """
+    Event argument that does not come from the reply (e.g. the VFO of FA).
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Command:
+    """
+    :param opcode: The two letters of the command.
+    :param query: The command reading the value, e.g. "MD0;"; None for set-only.
+    :param event: Event class the reply becomes, None if replies are not decoded.
+    :param args: Field and Const objects, the arguments of the event in order.
+    :param select: Field whose value picks the event class in events (e.g. the
+                   meter number of RM); a value not in events is reported as
+                   NotSupportedEvent.
+    :param events: Value of select -> event class.
+    :param set_format: The command setting the value, a % format of the value (the
+                       code for an ENUM value), e.g. "PC%03d;"; None for query-only.
+    :param limits: (lowest, highest) value the command accepts, None if unlimited.
+    """
+
+    def __init__(
+        self,
+        opcode: str,
+        query=None,
+        event=None,
+        args=(),
+        select=None,
+        events=None,
+        set_format=None,
+        limits=None,
+    ):
+        self.opcode = opcode
+        self.query = query
+        self.event = event
+        self.args = tuple(args)
+        self.select = select
+        self.events = events or {}
+        self.set_format = set_format
+        self.limits = limits
+
+    def value_field(self):
+        """
+        :return: The first Field of the reply, the value set_format sets; None if the
+                 reply has no fields.
+        """
+        for arg in self.args:
+            if isinstance(arg, Field):
+                return arg
+        return None
+
+    def select_query(self, value: str) -> str:
+        """
+        :param value: Value of the select field, e.g. "6" for the SWR meter.
+        :return: The query with the select field replaced, e.g. "RM6;".
+        """
+        start = self.select.start
+        end = start + 1 if self.select.end is None else self.select.end
+        return self.query[:start] + value + self.query[end:]
+
+    def event_types(self) -> tuple:
+        """
+        :return: The event classes the reply can produce.
+        """
+        if self.select is not None:
+            return tuple(self.events.values()) + (NotSupportedEvent,)
+        return (self.event,) if self.event else ()
+
+
+class Enum:
+    """
+    Two-way mapping between the codes of the protocol and names.
+
+    :param pairs: (code, name) pairs, the code as it appears in the commands.
+    :param default: Name of an unknown code; None drops a reply with an unknown code.
+    """
+
+    def __init__(self, pairs, default=None):
+        self.pairs = tuple(pairs)
+        self.default = default
+        self.names = {code: name for code, name in self.pairs}  # code -> name
+        self.codes = {name: code for code, name in self.pairs}  # name -> code
+
+    def name(self, code: str):
+        return self.names.get(code, self.default)
+
+    def code(self, name) -> str:
+        """
+        :raises KeyError: If the name is not part of the enum.
+        """
+        return self.codes[name]
+
+
+class Protocol:
+    def __init__(self, name: str, enums: dict, commands):
+        """
+        :param enums: Enum name (as used by Field.enum) -> Enum.
+        :param commands: Command objects.
+        """
+        self.name = name
+        self.enums = enums
+        self.commands = {command.opcode: command for command in commands}
+
+    def set_command(self, opcode: str, value) -> str:
+        """
+        :param value: The value to set, the name for an ENUM value (e.g. "usb").
+        :return: The command setting the value, e.g. "MD02;".
+        :raises ValueError: If the command cannot be set or the value is unknown.
+        """
+        command = self.commands[opcode]
+        if command.set_format is None:
+            raise ValueError("%s cannot be set" % opcode)
+        field = command.value_field()
+        if field is not None and field.kind == ENUM:
+            try:
+                value = self.enums[field.enum].code(value)
+            except KeyError:
+                raise ValueError("Unsupported %s: %s" % (field.enum, value))
+        return command.set_format % value
+
+    def vfo_commands(self, event) -> dict:
+        """
+        :param event: Event class, e.g. FrequencyEvent.
+        :return: VFO -> Command, for the commands whose event gets the VFO as a Const
+                 (FA/FB, IF/OI).
+        """
+        return {
+            arg.value: command
+            for command in self.commands.values()
+            if command.event is event
+            for arg in command.args
+            if isinstance(arg, Const)
+        }
+
+    def meter_query(self, meter: str) -> str:
+        """
+        :param meter: Meter name, see the "meter" enum.
+        :return: The RM query of the meter, e.g. "RM6;" for "swr".
+        :raises KeyError: If the meter is not part of the enum.
+        """
+        return self.commands["RM"].select_query(self.enums["meter"].code(meter))
+
+    def query_lengths(self) -> dict:
+        """
+        :return: Opcode -> length of its query (with the ";"), see count_queries().
+        """
+        return {
+            opcode: len(command.query)
+            for opcode, command in self.commands.items()
+            if command.query
+        }
+
+    def event_types(self) -> dict:
+        """
+        :return: Opcode -> event classes its reply can produce, for the decoded ones.
+        """
+        return {
+            opcode: command.event_types()
+            for opcode, command in self.commands.items()
+            if command.event or command.select
+        }
+
+    def compile(self, emit, is_subscribed) -> dict:
+        """
+        Generates the decode functions.
+
+        :param emit: Called as emit(event_class, *args) with the decoded reply.
+        :param is_subscribed: Called as is_subscribed(event_class); a selected event
+                              (e.g. a meter) nobody subscribed to is not decoded.
+        :return: Opcode -> function(command) decoding a complete reply (with ";").
+        """
+        namespace = {"emit": emit, "subscribed": is_subscribed}
+        for name, enum in self.enums.items():
+            namespace["enum_" + name] = enum.names
+            namespace["default_" + name] = enum.default
+        decoders = {}
+        for opcode, command in self.commands.items():
+            if command.event is None and command.select is None:
+                continue
+            source = _decoder_source(command, namespace, self.enums)
+            exec(compile(source, "<%s %s>" % (self.name, opcode), "exec"), namespace)
+            decoders[opcode] = namespace.pop("decode_" + opcode)
+        return decoders
+
+
+def _slice(field: Field) -> str:
+    if field.end is None:
+        return "command[%d]" % field.start
+    return "command[%d:%d]" % (field.start, field.end)
+
+
+def _decoder_source(command: Command, namespace: dict, enums: dict) -> str:
+    opcode = command.opcode
+    lines = ["def decode_%s(command):" % opcode]
+    args = []
+    for i, arg in enumerate(command.args):
+        if isinstance(arg, Const):
+            namespace["const_%s_%d" % (opcode, i)] = arg.value
+            args.append("const_%s_%d" % (opcode, i))
+        elif arg.kind == INT:
+            args.append("int(%s)" % _slice(arg))
+        elif arg.kind == TEXT:
+            args.append(_slice(arg))
+        elif arg.kind == ON:
+            args.append('%s == "1"' % _slice(arg))
+        elif arg.kind == NONZERO:
+            args.append('%s != "0"' % _slice(arg))
+        elif arg.kind == ENUM:
+            if enums[arg.enum].default is None:
+                # Unknown code: no event at all
+                lines.append(
+                    "    value_%d = enum_%s.get(%s)" % (i, arg.enum, _slice(arg))
+                )
+                lines.append("    if value_%d is None:" % i)
+                lines.append("        return")
+            else:
+                lines.append(
+                    "    value_%d = enum_%s.get(%s, default_%s)"
+                    % (i, arg.enum, _slice(arg), arg.enum)
+                )
+            args.append("value_%d" % i)
+        else:
+            raise ValueError("Unknown field kind %r in %s" % (arg.kind, opcode))
+
+    if command.select is None:
+        namespace["event_" + opcode] = command.event
+        lines.append("    emit(event_%s, %s)" % (opcode, ", ".join(args)))
+    else:
+        namespace["events_" + opcode] = command.events
+        namespace["NotSupportedEvent"] = NotSupportedEvent
+        lines.append(
+            "    event_type = events_%s.get(%s)" % (opcode, _slice(command.select))
+        )
+        lines.append("    if event_type is None:")
+        lines.append("        emit(NotSupportedEvent, command)")
+        lines.append("    elif subscribed(event_type):")
+        lines.append("        emit(event_type, %s)" % ", ".join(args))
+    return "\n".join(lines) + "\n"
+
+
+# Layout of IF (VFO A) and OI (VFO B), after the VFO:
+# I F P1 P1 P1 P2 .. P2 P3 P3 P3 P3 P3 P4 P5 P6 P7 P8 P9 P9 P10  ;
+# 0 1  2  3  4  5 .. 13 14 15 16 17 18 19 20 21 22 23 24 25  26 27
+INFO_FIELDS = (
+    Field("frequency", 5, 14),  # P2 Frequency in Hz (9 digits)
+    Field("mode", 21, kind=ENUM, enum="mode"),  # P6 Operating mode (as MD)
+    Field("clarifier", 14, 19),  # P3 Clarifier offset in Hz ("+0000" - "-9999")
+    Field("rx_clarifier", 19, kind=ON),  # P4
+    Field("tx_clarifier", 20, kind=ON),  # P5
+    Field("memory_channel", 2, 5),  # P1 Memory channel (001 - 117)
+    Field("memory_mode", 22),  # P7 0: VFO 1: Memory 2: Memory tune 3: QMB 5: PMS
+    Field("ctcss", 23),  # P8 0: off 1: CTCSS ENC/DEC 2: CTCSS ENC 3: DCS ENC/DEC
+    Field("shift", 26),  # P10 Repeater shift 0: simplex 1: plus 2: minus
+)
+
+FTDX10 = Protocol(
+    "FTDX10",
+    enums={
+        # MD [P2] / IF [P6]
+        "mode": Enum(
+            (
+                ("1", "lsb"),
+                ("2", "usb"),
+                ("3", "cw"),  # CW-U
+                ("4", "fm"),
+                ("5", "am"),
+                ("6", "rtty"),  # RTTY-L
+                ("7", "cwr"),  # CW-L
+                ("8", "pktlsb"),  # DATA-L
+                ("9", "rttyr"),  # RTTY-U
+                ("A", "pktfm"),  # DATA-FM
+                ("B", "fmn"),  # FM-N
+                ("C", "pktusb"),  # DATA-U
+                ("D", "amn"),  # AM-N
+                ("E", "psk"),
+                ("F", "pktfmn"),  # DATA-FM-N
+            ),
+            default="none",
+        ),
+        "vfo": Enum((("0", VFO_A), ("1", VFO_B))),
+        # RM [P1], named as in radio.recorder.METER_IDS
+        "meter": Enum(
+            (
+                ("1", "s"),
+                ("3", "comp"),
+                ("4", "alc"),
+                ("5", "po"),
+                ("6", "swr"),
+                ("7", "idd"),
+                ("8", "vdd"),
+            )
+        ),
+    },
+    commands=(
+        Command(
+            "FA",
+            "FA;",
+            FrequencyEvent,
+            # Hz, as IF/OI report it
+            (Field("frequency", 2, -1), Const(VFO_A)),
+            set_format="FA%09d;",
+        ),
+        Command(
+            "FB",
+            "FB;",
+            FrequencyEvent,
+            (Field("frequency", 2, -1), Const(VFO_B)),
+            set_format="FB%09d;",
+        ),
+        Command(
+            "VS",
+            "VS;",
+            ActiveVFOEvent,
+            (Field("vfo", 2, kind=ENUM, enum="vfo"),),
+            set_format="VS%s;",
+        ),
+        Command(
+            "MD",
+            "MD0;",
+            ModeEvent,
+            (Field("mode", 3, kind=ENUM, enum="mode"), Const(VFO_NONE)),
+            set_format="MD0%s;",
+        ),
+        Command("IF", "IF;", TransceiverInfoEvent, (Const(VFO_A),) + INFO_FIELDS),
+        Command("OI", "OI;", TransceiverInfoEvent, (Const(VFO_B),) + INFO_FIELDS),
+        Command(
+            "RM",
+            "RM0;",  # RM[P1]; with the meter number
+            args=(Field("value", 3, 6),),
+            select=Field("meter", 2, kind=TEXT),
+            events={
+                "1": SMeterEvent,
+                "3": COMPMeterEvent,
+                "4": ALCMeterEvent,
+                "5": POMeterEvent,
+                "6": SWRMeterEvent,
+                "7": IDDMeterEvent,
+                "8": VDDMeterEvent,
+            },
+        ),
+        Command("SM", "SM0;", SMeterEvent, (Field("value", 3, -1),)),
+        Command(
+            "PC",
+            "PC;",
+            TXPowerEvent,
+            (Field("txpower", 2, 5),),
+            set_format="PC%03d;",
+            limits=(5, 100),  # W
+        ),
+        # 0: not transmitting, 1: keyed by CAT, 2: keyed by the radio (PTT)
+        Command(
+            "TX",
+            "TX;",
+            TransmitEvent,
+            (Field("transmit", 2, kind=NONZERO),),
+            set_format="TX%d;",
+        ),
+        Command("AI", "AI;", set_format="AI%d;"),
+        Command("ID", "ID;"),
+    ),
+)
@@ -1,43 +1,100 @@
 import threading
-import serial
 import time
 import logging
-from queue import Queue
+from collections import deque
+from radio.commandqueue import CommandQueue
+from radio.dispatch import AsyncListener
+from radio.encoding import CommandEncoder
+from radio.framer import Framer
+from radio.pacing import AdaptivePacer
 from radio.radioparser import RadioParser
 from radio.listener import RadioListener
 from radio.events import *
+from radio.exceptions import FrequencyNotAllowedException, RadioException
+from radio.state import RadioState, TuneResult
+from radio.tracing import TracedBytes, TracedCommand, command_text
 from overrides import overrides
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
-
 
 class Radio(RadioListener):
-    def __init__(self, port: str, baudrate: int = 9600, command_delay: float = 0.1):
-        logging.info(f"Connecting to radio on port {port} at {baudrate} baud")
-        self.serial_port = serial.Serial(port, baudrate, timeout=1, write_timeout=1)
+    # Polled in turn by poll_tune_meters()
+    SECONDARY_METERS = ("alc", "comp", "idd", "vdd")
+
+    def __init__(
+        self,
+        port: str,
+        baudrate: int = 9600,
+        command_delay: float = 0.1,
+        queue_size: int = 256,
+        overflow_policy: str = CommandQueue.BLOCK,
+        put_timeout: float = 1.0,
+        serial_port=None,
+        band_plan=None,
+        adaptive_pacing: bool = True,
+    ):
+        """
+        :param port: Serial port the radio is connected to (e.g. "COM3").
+        :param baudrate: Baud rate configured in the radio's CAT menu.
+        :param command_delay: Pause in seconds after each command written to the radio,
+                              with adaptive_pacing only the initial one.
+        :param queue_size: Maximum number of commands waiting to be sent.
+        :param overflow_policy: What to do when the command queue is full - one of
+                                CommandQueue.BLOCK, DROP_OLDEST or REJECT.
+        :param put_timeout: Seconds a command may wait for room in the queue.
+        :param serial_port: Already open serial-like object to use instead of opening
+                            port (e.g. a radio.simulator.SimulatedRig).
+        :param band_plan: radio.bandplan.BandPlan that set_frequency() checks the
+                          frequencies against, None allows any frequency.
+        :param adaptive_pacing: Adapt the pause between writes to the measured
+                                turnaround of the radio (see AdaptivePacer).
+        """
+        logging.info("Connecting to radio on port %s at %s baud", port, baudrate)
+        if serial_port is None:
+            import serial  # Only needed (and imported) when a real port is opened
+
+            serial_port = serial.Serial(port, baudrate, timeout=0.1, write_timeout=1)
+        self.serial_port = serial_port
+        self.band_plan = band_plan
         self.parser = RadioParser()
         self.parser.add_listener(self)
+        # Builds the commands as bytes, from the same protocol table
+        self.encoder = CommandEncoder(self.parser.protocol)
+        # Everything sync() reads besides the meters: VS, IF, OI, PC, TX
+        self.sync_queries = (
+            self.encoder.GET_ACTIVE_VFO
+            + self.encoder.GET_INFO[RadioParser.VFO_A]
+            + self.encoder.GET_INFO[RadioParser.VFO_B]
+            + self.encoder.GET_TXPOWER
+            + self.encoder.GET_TRANSMIT
+        )
         self.current_frequency = None
         self.active_vfo = None
         self.txpower = None
+        self.transmit = None
+        self.po = None
         self.swr = None
-        self.buffer = b""  # Buffer to store incomplete data
-        self.command_queue = Queue()
+        # Splits the received bytes into validated frames
+        self.framer = Framer(self.parser.parsers)
+        self.command_queue = CommandQueue(queue_size, overflow_policy, put_timeout)
         self.command_delay = command_delay
+        self.pacer = None
+        if adaptive_pacing:
+            self.pacer = AdaptivePacer(command_delay, max_delay=max(0.2, command_delay))
         self.stop_event = threading.Event()  # Event to signal the threads to stop
-        self.read_thread = threading.Thread(target=self._read_from_radio)
-        self.read_thread.daemon = True
-        self.read_thread.start()
-        self.write_thread = threading.Thread(target=self._write_to_radio)
-        self.write_thread.daemon = True
-        self.write_thread.start()
+        # Held around every write so that write_now() never splits a command
+        self.write_lock = threading.Lock()
+        # radio.watchdog.TXWatchdog told about every keying and unkeying we write
+        self.watchdog = None
+        self.tracer = None  # See set_tracer()
+        # radio.capture.CaptureWriter given every chunk of bytes read from the radio
+        self.capture = None
         self.frequency_vfo_a = None
         self.frequency_vfo_b = None
         self.mode_vfo_a = None
         self.mode_vfo_b = None
+        # Latest TransceiverInfoEvent (IF/OI) of each VFO
+        self.info_vfo_a = None
+        self.info_vfo_b = None
         self.s_meter = None
         self.comp = None
         self.alc = None
@@ -47,64 +104,282 @@ class Radio(RadioListener):
         self.mode_event = threading.Event()
         self.active_vfo_event = threading.Event()
         self.transmit_event = threading.Event()
+        # State saved by tune() and restored by untune()
+        self.saved_mode = None
+        self.saved_txpower = None
+        # Replies counted per value ("mode", "txpower", ...) so that callers can wait
+        # for the answers to the queries they sent rather than for any answer
+        self._reply_counts = {}
+        # key -> deque of (number of the reply, value, time.perf_counter()), the
+        # number counting from 1 like _reply_counts
+        self._reply_log = {}
+        self._reply_condition = threading.Condition()
+        self.async_listeners = {}  # listener -> AsyncListener delivering its events
+        # Start the threads only once all the state the listeners touch exists
+        self.read_thread = threading.Thread(target=self._read_from_radio)
+        self.read_thread.daemon = True
+        self.read_thread.start()
+        self.write_thread = threading.Thread(target=self._write_to_radio)
+        self.write_thread.daemon = True
+        self.write_thread.start()
 
     def _read_from_radio(self):
         while not self.stop_event.is_set():
-            if self.serial_port.in_waiting > 0:
-                # Read all available data from the serial port
-                data = self.serial_port.read(self.serial_port.in_waiting)
-                logging.info(f"Received: {data}")
-                # Append the new data to the buffer
-                self.buffer += data
-                # Process data in the buffer
-                while self.buffer:
-                    # Parse the data and get the number of bytes processed
-                    bytes_processed = self.parser.parse(self.buffer)
-                    if bytes_processed == 0:
-                        break
-                    # Remove the processed bytes from the buffer
-                    self.buffer = self.buffer[bytes_processed:]
+            # Block (up to the port timeout) for the first byte instead of spinning on
+            # in_waiting, then take everything that has already arrived
+            data = self.serial_port.read(self.serial_port.in_waiting or 1)
+            if data:
+                logging.debug("Received: %r", data)
+                received = time.perf_counter()
+                capture = self.capture
+                if capture is not None:
+                    try:
+                        capture.write(data)
+                    except (OSError, ValueError) as e:
+                        # E.g. a full disk - stop capturing, keep talking to the radio
+                        logging.error("Capture stopped: %s", e)
+                        self.capture = None
+                frames = self.framer.feed(data)
+                tracer = self.tracer
+                if tracer is not None:
+                    tracer.complete("frame", received, frames=len(frames))
+                for frame in frames:
+                    # "?;" may answer a set command as well, it tells nothing about timing
+                    if self.pacer and frame != "?;":
+                        self.pacer.received(received)
+                    self.parser.parse_frame(frame)
+                if tracer is not None:
+                    tracer.complete("read", received, data=repr(data))
 
     def _write_to_radio(self):
         while not self.stop_event.is_set():
+            # Get the next command from the queue (wake up regularly to check stop_event)
+            command = self.command_queue.get(timeout=0.1)
+            if command is None:
+                continue
+            tracer = self.tracer
+            if tracer is not None:
+                started = time.perf_counter()
+                trace_id = getattr(command, "trace_id", None)
+                if trace_id is not None:
+                    tracer.async_end("queued", trace_id, started)
             try:
-                # Check if the send buffer size exceeds 1000 bytes
-                if self.command_queue.qsize() > 1000:
-                    raise Exception(
-                        "Send buffer overflow: more than 1000 bytes in the queue"
-                    )
-
-                # Get the next command from the queue
-                command = self.command_queue.get()
-                logging.info(f"Sending: {command}")
-                # Encode the command string to bytes before sending to the serial port
-                self.serial_port.write(command.encode())  # Set timeout to 500ms
+                logging.debug("Sending: %s", command)
+                delay = self.command_delay
+                if self.pacer:
+                    # Recorded before the write, the reply may come back before it returns
+                    self.pacer.sent(self.parser.count_queries(command))
+                # Commands from the encoder are bytes already, only str needs encoding
+                data = command.encode() if isinstance(command, str) else command
+                with self.write_lock:
+                    self.serial_port.write(data)
+                if tracer is not None:
+                    tracer.complete("write", started, command=command_text(command))
+                watchdog = self.watchdog
+                if watchdog:
+                    keyed = self.parser.transmit_command(command)
+                    if keyed is not None:
+                        watchdog.transmitting(keyed)
+                if self.pacer:
+                    delay = self.pacer.next_delay()
                 # Wait for the specified delay before sending the next command
-                time.sleep(self.command_delay)
-                # Mark the command as done
-                self.command_queue.task_done()
+                if delay:
+                    if tracer is not None:
+                        with tracer.span("pace", delay=delay):
+                            time.sleep(delay)
+                    else:
+                        time.sleep(delay)
             except Exception as e:
-                logging.error(f"Exception: {e}")
+                logging.error("Exception while sending %s: %s", command, e)
+            finally:
+                # Mark the command as done
                 self.command_queue.task_done()
 
+    def write_now(self, data: bytes) -> None:
+        """
+        Writes to the radio at once, ahead of everything waiting in the command queue.
+        Only waits for a write of the writer thread already in progress.
+
+        :param data: Raw commands, e.g. b"TX0;".
+        """
+        with self.write_lock:
+            self.serial_port.write(data)
+
+    def _unkey_now(self) -> None:
+        # Like the watchdog: past the command queue, which may be full of meter polls
+        # or refuse the command under the REJECT/BLOCK policies
+        self.write_now(self.encoder.SET_TRANSMIT[False])
+        watchdog = self.watchdog
+        if watchdog:
+            watchdog.transmitting(False)
+
+    def _send(self, command, telemetry: bool = False) -> bool:
+        """
+        Queues a command for the writer thread.
+
+        :param command: Raw command, bytes (see CommandEncoder) or str.
+        :param telemetry: True for read-only polls (meters) which the DROP_OLDEST
+                          policy is allowed to discard when the queue is full.
+        :return: True if queued, False if the command was dropped.
+        :raises CommandQueueFullException: If the queue is full (BLOCK/REJECT policies).
+        """
+        tracer = self.tracer
+        if tracer is None:
+            return self.command_queue.put(command, telemetry)
+        if isinstance(command, bytes):
+            command = TracedBytes(command)
+        else:
+            command = TracedCommand(command)
+        command.trace_id = tracer.next_id()
+        command.queued_at = time.perf_counter()
+        text = command_text(command)
+        # Ended by the writer thread when it takes the command
+        tracer.async_begin("queued", command.trace_id, command.queued_at, command=text)
+        try:
+            queued = self.command_queue.put(command, telemetry)
+        except Exception:
+            tracer.async_end("queued", command.trace_id, rejected=True)
+            raise
+        if not queued:
+            tracer.async_end("queued", command.trace_id, dropped=True)
+        tracer.complete("enqueue", command.queued_at, command=text)
+        return queued
+
+    def set_tracer(self, tracer) -> None:
+        """
+        Records the timeline of the commands and replies (see radio.tracing).
+
+        :param tracer: radio.tracing.Tracer, None to stop tracing.
+        """
+        self.tracer = tracer
+        self.parser.tracer = tracer
+
+    def send_batch(self, commands: list, telemetry: bool = False) -> bool:
+        """
+        Queues several commands so that they leave in a single serial write.
+
+        :param commands: Raw commands, all bytes or all str, e.g. [b"MD04;", b"TX1;"].
+        :param telemetry: See _send().
+        :return: True if queued, False if the batch was dropped.
+        """
+        if commands and isinstance(commands[0], bytes):
+            return self._send(b"".join(commands), telemetry)
+        return self._send("".join(commands), telemetry)
+
+    def poll_meters(self, meters) -> bool:
+        """
+        Requests meter readings in a single write, reported to the listeners.
+        The commands are telemetry (see _send()).
+
+        :param meters: Meter names, any of "s", "comp", "alc", "po", "swr", "idd",
+                       "vdd".
+        :return: True if queued, False if the request was dropped.
+        """
+        return self._send(self.encoder.get_meters(meters), telemetry=True)
+
+    def poll_tune_meters(self, count: int) -> bool:
+        """
+        One poll of the meters watched while transmitting: SWR and PO on every poll,
+        the slower moving meters one at a time in turn.
+
+        :param count: Number of the poll, counted up by the caller.
+        :return: True if queued, False if the request was dropped.
+        """
+        secondary = self.SECONDARY_METERS
+        return self.poll_meters(("swr", "po", secondary[count % len(secondary)]))
+
+    def add_listener(
+        self, listener: RadioListener, asynchronous: bool = True, **options
+    ) -> None:
+        """
+        Adds a listener for the events coming from the radio.
+
+        :param listener: An instance of RadioListener.
+        :param asynchronous: Deliver the events on a thread of the listener's own
+                             through a bounded queue (see AsyncListener), so that a slow
+                             listener cannot stall the serial reader. If False the
+                             listener is called directly on the reader thread.
+        :param options: Passed to AsyncListener (maxsize, policy, conflate, put_timeout).
+        """
+        if not asynchronous:
+            self.parser.add_listener(listener)
+            return
+        dispatcher = AsyncListener(listener, **options)
+        dispatcher.attach(self.parser)
+        self.async_listeners[listener] = dispatcher
+
+    def remove_listener(self, listener: RadioListener) -> None:
+        dispatcher = self.async_listeners.pop(listener, None)
+        if dispatcher is None:
+            self.parser.remove_all_listener(listener)
+            return
+        dispatcher.detach(self.parser)
+        dispatcher.stop()
+
+    def get_listener_stats(self) -> dict:
+        """
+        :return: Listener class name -> queue depth, drops and lag of its AsyncListener.
+        """
+        return {
+            dispatcher.name: dispatcher.stats()
+            for dispatcher in self.async_listeners.values()
+        }
+
+    def get_framer_stats(self) -> dict:
+        """
+        :return: Frames received and the bytes/frames dropped as noise or malformed.
+        """
+        stats = self.framer.stats()
+        stats["malformed"] = self.parser.malformed
+        return stats
+
+    def get_pacing_stats(self) -> dict:
+        """
+        :return: Current delay between writes, the effective write rate and the
+                 measured turnaround of the radio (see AdaptivePacer.stats()), or
+                 None without adaptive pacing.
+        """
+        return self.pacer.stats() if self.pacer else None
+
+    def get_queue_stats(self) -> dict:
+        """
+        :return: Current size, high-water mark and drop/reject counters of the command queue.
+        """
+        return self.command_queue.stats()
+
     def set_frequency(self, frequency: int):
+        if self.band_plan is not None and not self.band_plan.is_legal(frequency):
+            raise FrequencyNotAllowedException(
+                f"{frequency} Hz is outside the band plan, nearest legal frequency is "
+                f"{self.band_plan.nearest_legal(frequency)} Hz"
+            )
 
         if self.active_vfo == self.parser.VFO_A:
             self.frequency_vfo_a = frequency
-            command = self.parser.generate_set_frequency(self.parser.VFO_A, frequency)
+            command = self.encoder.set_frequency(self.parser.VFO_A, frequency)
         elif self.active_vfo == self.parser.VFO_B:
             self.frequency_vfo_b = frequency
-            command = self.parser.generate_set_frequency(self.parser.VFO_B, frequency)
+            command = self.encoder.set_frequency(self.parser.VFO_B, frequency)
 
-        self.command_queue.put(command)
+        self._send(command)
 
     def get_frequency(self):
-        command = self.parser.generate_get_frequency(self.active_vfo)
-        self.command_queue.put(command)
+        command = self.encoder.GET_FREQUENCY[self.active_vfo]
+        self._send(command)
+
+    def get_info(self, vfo: int = None):
+        """
+        Queries the complete state of a VFO, reported by on_transceiver_info().
+
+        :param vfo: VFO_A or VFO_B, the active VFO by default.
+        """
+        if vfo is None:
+            vfo = self.active_vfo
+        self._send(self.encoder.GET_INFO[vfo])
 
     def set_mode(self, mode: str):
-        command = self.parser.generate_set_mode(mode)
-        self.command_queue.put(command)
+        command = self.encoder.set_mode(mode)
+        self._send(command)
         if self.active_vfo == self.parser.VFO_A:
             self.mode_vfo_a = mode
         elif self.active_vfo == self.parser.VFO_B:
@@ -113,104 +388,348 @@ class Radio(RadioListener):
     def get_mode(self, blocking=False):
         if blocking:
             self.mode_event.clear()
-            command = self.parser.generate_get_mode()
-            self.command_queue.put(command)
-            if not self.mode_event.wait(
-                timeout=1
-            ):  # Block until we get back from the radio the actual mode or timeout
+            command = self.encoder.GET_MODE
+            self._send(command)
+            # Block until we get back from the radio the actual mode or timeout
+            if not self._wait_event(self.mode_event, "mode"):
                 raise TimeoutError("Failed to get mode within 1 second")
             if self.active_vfo == self.parser.VFO_A:
                 return self.mode_vfo_a
             elif self.active_vfo == self.parser.VFO_B:
                 return self.mode_vfo_b
         else:
-            command = self.parser.generate_get_mode()
-            self.command_queue.put(command)
+            command = self.encoder.GET_MODE
+            self._send(command)
 
     def set_transmit(self, transmit: bool):
-        command = self.parser.generate_set_transmit(transmit)
-        self.command_queue.put(command)
+        command = self.encoder.SET_TRANSMIT[bool(transmit)]
+        self._send(command)
 
     def get_transmit(self, blocking=False):
-        command = self.parser.generate_get_transmit()
-        self.command_queue.put(command)
+        command = self.encoder.GET_TRANSMIT
+        self._send(command)
 
         if blocking:
             self.transmit_event.clear()
-            if not self.transmit_event.wait(
-                timeout=1
-            ):  # Block until we get back from the radio the transmit status or timeout
+            # Block until we get back from the radio the transmit status or timeout
+            if not self._wait_event(self.transmit_event, "transmit"):
                 raise TimeoutError("Failed to get transmit status within 1 second")
             return self.transmit
 
     def set_txpower(self, power: int):
-        command = self.parser.generate_set_txpower(power)
-        self.command_queue.put(command)
+        command = self.encoder.set_txpower(power)
+        self._send(command)
         self.txpower = power
 
     def get_txpower(self, blocking=False):
-        command = self.parser.generate_get_txpower()
-        self.command_queue.put(command)
+        command = self.encoder.GET_TXPOWER
+        self._send(command)
 
         if blocking:
             self.txpower_event.clear()
-            if not self.txpower_event.wait(
-                timeout=1
-            ):  # Block until we get back from the radio the transmit power or timeout
+            # Block until we get back from the radio the transmit power or timeout
+            if not self._wait_event(self.txpower_event, "txpower"):
                 raise TimeoutError("Failed to get tx power within 1 second")
             return self.txpower
 
     def set_active_vfo(self, vfo: int):
-        command = self.parser.generate_set_active_vfo(vfo)
-        self.command_queue.put(command)
+        command = self.encoder.SET_ACTIVE_VFO.get(vfo)
+        if command is None:
+            raise ValueError("Unsupported VFO: " + str(vfo))
+        self._send(command)
         self.active_vfo = vfo
 
     def get_active_vfo(self, blocking=False):
-        command = self.parser.generate_get_active_vfo()
-        self.command_queue.put(command)
+        command = self.encoder.GET_ACTIVE_VFO
+        self._send(command)
 
         if blocking:
             self.active_vfo_event.clear()
-            if not self.active_vfo_event.wait(
-                timeout=1
-            ):  # Block until we get back from the radio the active VFO or timeout
+            # Block until we get back from the radio the active VFO or timeout
+            if not self._wait_event(self.active_vfo_event, "active_vfo"):
                 raise TimeoutError("Failed to get active VFO within 1 second")
             return self.active_vfo
 
     def get_s_meter(self):
-        command = self.parser.generate_get_s_meter()
-        self.command_queue.put(command)
+        self._send(self.encoder.GET_METER["s"], telemetry=True)
 
     def get_po_meter(self):
-        command = self.parser.generate_get_po_meter()
-        self.command_queue.put(command)
+        self._send(self.encoder.GET_METER["po"], telemetry=True)
 
     def get_comp_meter(self):
-        command = self.parser.generate_get_comp_meter()
-        self.command_queue.put(command)
+        self._send(self.encoder.GET_METER["comp"], telemetry=True)
 
     def get_alc_meter(self):
-        command = self.parser.generate_get_alc_meter()
-        self.command_queue.put(command)
+        self._send(self.encoder.GET_METER["alc"], telemetry=True)
 
     def get_swr_meter(self):
-        command = self.parser.generate_get_swr_meter()
-        self.command_queue.put(command)
+        self._send(self.encoder.GET_METER["swr"], telemetry=True)
 
     def get_idd_meter(self):
-        command = self.parser.generate_get_idd_meter()
-        self.command_queue.put(command)
+        self._send(self.encoder.GET_METER["idd"], telemetry=True)
 
     def get_vdd_meter(self):
-        command = self.parser.generate_get_vdd_meter()
-        self.command_queue.put(command)
+        self._send(self.encoder.GET_METER["vdd"], telemetry=True)
 
     def set_auto_information(self, enabled: bool):
-        command = self.parser.generate_set_auto_information(enabled)
-        self.command_queue.put(command)
-
-    def disconnect(self):
-        self.command_queue.join()  # Wait for all commands to be processed
+        command = self.encoder.SET_AUTO_INFORMATION[bool(enabled)]
+        self._send(command)
+
+    def sync(self, meters=(), timeout: float = 1.0) -> RadioState:
+        """
+        Reads the complete state of the radio in a single round trip.
+
+        VS, IF, OI, PC, TX (and the requested meters) leave in one write and all the
+        replies are awaited against one deadline, so every value of the snapshot
+        belongs to the same moment.
+
+        :param meters: Meters to read as well, any of "s", "comp", "alc", "po",
+                       "swr", "idd", "vdd".
+        :param timeout: Seconds from the call until all the replies must be in.
+        :return: RadioState built from the replies.
+        :raises TimeoutError: If some of the replies did not arrive in time.
+        """
+        started = time.perf_counter()
+        encoder = self.encoder
+        meter_queries = encoder.get_meters(meters)  # Raises ValueError if unsupported
+
+        counts = {
+            "active_vfo": 1,
+            "info_vfo_a": 1,
+            "info_vfo_b": 1,
+            "txpower": 1,
+            "transmit": 1,
+        }
+        counts.update((meter, 1) for meter in meters)
+        expected = self._expect_replies(counts)
+        self._send(self.sync_queries + meter_queries)
+
+        replies = self._await_replies(expected, started + timeout)
+        values = {key: replies[key][-1][0] for key in replies}
+        return RadioState(
+            values["active_vfo"],
+            values["info_vfo_a"],
+            values["info_vfo_b"],
+            values["txpower"],
+            values["transmit"],
+            {meter: values[meter] for meter in meters},
+            time.perf_counter() - started,
+        )
+
+    def tune(self, mode: str, txpower: int, timeout: float = 1.0) -> TuneResult:
+        """
+        Saves the current mode and TX power, switches to the given mode and power and
+        keys the transmitter.
+
+        The state queries, the MD/PC/TX commands and the queries confirming them leave
+        in a single write and all the replies are awaited against one deadline.
+        If the tune cannot be confirmed the transmitter is unkeyed again.
+
+        :param mode: Mode to transmit in (e.g. "FM").
+        :param txpower: Power in watts.
+        :param timeout: Seconds from the call until everything must be confirmed.
+        :return: TuneResult with the time each step took.
+        :raises TimeoutError: If some of the replies did not arrive in time.
+        :raises RadioException: If the radio reports a value other than the requested one.
+        """
+        started = time.perf_counter()
+        encoder = self.encoder
+        txpower = min(max(txpower, encoder.txpower_min), encoder.txpower_max)
+        result = TuneResult(str(mode).lower(), txpower, True)
+
+        expected = self._expect_replies(
+            {"active_vfo": 1, "mode": 2, "txpower": 2, "transmit": 1}
+        )
+        self.send_batch(
+            [
+                # Save
+                encoder.GET_ACTIVE_VFO,
+                encoder.GET_MODE,
+                encoder.GET_TXPOWER,
+                # Tune
+                encoder.set_mode(mode),
+                encoder.set_txpower(txpower),
+                encoder.SET_TRANSMIT[True],
+                # Confirm
+                encoder.GET_MODE,
+                encoder.GET_TXPOWER,
+                encoder.GET_TRANSMIT,
+            ]
+        )
+        result.steps["send"] = time.perf_counter() - started
+
+        try:
+            replies = self._await_replies(expected, started + timeout)
+            (self.saved_mode, mode_time) = replies["mode"][0]
+            (self.saved_txpower, txpower_time) = replies["txpower"][0]
+            result.steps["save"] = max(mode_time, txpower_time) - started
+            self._confirm(result, replies, started)
+        except Exception:
+            # Never leave the transmitter keyed in an unknown state
+            self._unkey_now()
+            raise
+        return result
+
+    def untune(self, timeout: float = 1.0) -> TuneResult:
+        """
+        Unkeys the transmitter and restores the mode and TX power saved by tune(),
+        confirming every value like tune() does.
+
+        :param timeout: Seconds from the call until everything must be confirmed.
+        :return: TuneResult with the time each step took.
+        :raises TimeoutError: If some of the replies did not arrive in time.
+        :raises RadioException: If the radio reports a value other than the requested one.
+        """
+        started = time.perf_counter()
+        encoder = self.encoder
+        result = TuneResult(self.saved_mode, self.saved_txpower, False)
+
+        commands = [encoder.SET_TRANSMIT[False]]
+        queries = []
+        counts = {"transmit": 1}
+        try:
+            if self.saved_mode is not None:
+                commands.append(encoder.set_mode(self.saved_mode))
+                queries.append(encoder.GET_MODE)
+                counts["mode"] = 1
+            if self.saved_txpower is not None:
+                commands.append(encoder.set_txpower(self.saved_txpower))
+                queries.append(encoder.GET_TXPOWER)
+                counts["txpower"] = 1
+        except Exception:
+            # A saved value that cannot be restored (e.g. the mode "none") must not
+            # keep the transmitter keyed
+            self._unkey_now()
+            raise
+        queries.append(encoder.GET_TRANSMIT)
+
+        expected = self._expect_replies(counts)
+        self.send_batch(commands + queries)
+        result.steps["send"] = time.perf_counter() - started
+
+        replies = self._await_replies(expected, started + timeout)
+        self._confirm(result, replies, started)
+        self.saved_mode = None
+        self.saved_txpower = None
+        return result
+
+    def read_swr_po(self, timeout: float = 1.0) -> tuple:
+        """
+        Requests the SWR and PO meters in one write and waits for both readings.
+
+        :return: (swr, po) raw meter readings (0-255).
+        :raises TimeoutError: If the readings did not arrive in time.
+        """
+        expected = self._expect_replies({"swr": 1, "po": 1})
+        self.poll_meters(("swr", "po"))
+        replies = self._await_replies(expected, time.perf_counter() + timeout)
+        return replies["swr"][0][0], replies["po"][0][0]
+
+    def _confirm(self, result: TuneResult, replies: dict, started: float) -> None:
+        """
+        Checks the last reply for every tuned value and records when it arrived.
+        """
+        for key in ("mode", "txpower", "transmit"):
+            if key not in replies:
+                continue
+            value, arrived = replies[key][-1]
+            result.steps[key] = arrived - started
+            if value != getattr(result, key):
+                raise RadioException(
+                    f"Radio reports {key}={value}, expected {getattr(result, key)}"
+                )
+        result.total = time.perf_counter() - started
+
+    def _wait_event(self, event: threading.Event, name: str) -> bool:
+        """
+        Waits up to 1 second for the event set by the reply of a blocking getter.
+        """
+        tracer = self.tracer
+        if tracer is None:
+            return event.wait(timeout=1)
+        with tracer.span("wait " + name):
+            return event.wait(timeout=1)
+
+    def _record_reply(self, key: str, value) -> None:
+        with self._reply_condition:
+            number = self._reply_counts.get(key, 0) + 1
+            self._reply_counts[key] = number
+            if key not in self._reply_log:
+                self._reply_log[key] = deque(maxlen=16)
+            self._reply_log[key].append((number, value, time.perf_counter()))
+            self._reply_condition.notify_all()
+
+    def _expect_replies(self, counts: dict) -> dict:
+        """
+        Call before sending the queries.
+
+        :param counts: key -> number of replies the queries will produce.
+        :return: key -> (replies received so far, number of replies expected)
+        """
+        with self._reply_condition:
+            return {
+                key: (self._reply_counts.get(key, 0), count)
+                for key, count in counts.items()
+            }
+
+    def _await_replies(self, expected: dict, deadline: float) -> dict:
+        """
+        Waits until all the replies announced with _expect_replies() have arrived.
+
+        :param expected: Return value of _expect_replies().
+        :param deadline: time.perf_counter() value after which to give up.
+        :return: key -> list of (value, arrival time) of the new replies.
+        :raises TimeoutError: If not all replies arrived before the deadline.
+        :raises RadioException: If the replies were pushed out of the log by later
+                                ones (e.g. meters polled meanwhile) before the wait.
+        """
+
+        def missing():
+            return [
+                key
+                for key, (since, count) in expected.items()
+                if self._reply_counts.get(key, 0) < since + count
+            ]
+
+        tracer = self.tracer
+        started = time.perf_counter()
+        with self._reply_condition:
+            arrived = self._reply_condition.wait_for(
+                lambda: not missing(), max(0.0, deadline - started)
+            )
+            if tracer is not None:
+                tracer.complete("wait " + ",".join(expected), started, ok=arrived)
+            if not arrived:
+                raise TimeoutError(
+                    "No reply from the radio for: " + ", ".join(missing())
+                )
+            replies = {}
+            for key, (since, count) in expected.items():
+                log = self._reply_log[key]
+                if log[0][0] > since + 1:
+                    raise RadioException(
+                        "Replies for %s were overwritten before they were read" % key
+                    )
+                replies[key] = [
+                    (value, arrived)
+                    for number, value, arrived in log
+                    if since < number <= since + count
+                ]
+            return replies
+
+    def disconnect(self, timeout: float = 2.0):
+        """
+        Sends the remaining queued commands and closes the serial port.
+
+        :param timeout: Maximum number of seconds to wait for the queue to drain.
+        """
+        # Wait for the queued commands to be processed, but never forever
+        if not self.command_queue.join(timeout):
+            logging.warning(
+                f"Disconnecting with {self.command_queue.qsize()} unsent commands"
+            )
+        if self.watchdog:
+            self.watchdog.stop()
         # Signal the threads to stop
         self.stop_event.set()
 
@@ -223,11 +742,12 @@ class Radio(RadioListener):
             self.serial_port.close()
 
         # Clear the command queue
-        with self.command_queue.mutex:
-            self.command_queue.queue.clear()
+        self.command_queue.clear()
 
         # Reset parser listeners
         self.parser.remove_all_listener(self)
+        for listener in list(self.async_listeners):
+            self.remove_listener(listener)
 
         logging.info("Radio disconnected and cleaned up.")
 
@@ -238,6 +758,19 @@ class Radio(RadioListener):
         elif event.vfo == self.parser.VFO_B:
             self.frequency_vfo_b = event.frequency
 
+    @overrides
+    def on_transceiver_info(self, event: TransceiverInfoEvent) -> None:
+        if event.vfo == self.parser.VFO_A:
+            self.info_vfo_a = event
+            self.frequency_vfo_a = event.frequency
+            self.mode_vfo_a = event.mode
+            self._record_reply("info_vfo_a", event)
+        else:
+            self.info_vfo_b = event
+            self.frequency_vfo_b = event.frequency
+            self.mode_vfo_b = event.mode
+            self._record_reply("info_vfo_b", event)
+
     @overrides
     def on_mode(self, event: ModeEvent) -> None:
         if event.vfo == self.parser.VFO_A:
@@ -250,51 +783,62 @@ class Radio(RadioListener):
                 self.mode_vfo_a = event.mode
             else:
                 self.mode_vfo_b = event.mode
+        self._record_reply("mode", event.mode)
         self.mode_event.set()  # Set the event to unblock get_mode
 
     @overrides
     def on_s_meter(self, event: SMeterEvent) -> None:
         self.s_meter = event.value
+        self._record_reply("s", event.value)
 
     @overrides
     def on_po_meter(self, event: POMeterEvent) -> None:
-        self.txpower = event.value
+        self.po = event.value
+        self._record_reply("po", event.value)
 
     @overrides
     def on_swr_meter(self, event: SWRMeterEvent) -> None:
         self.swr = event.value
+        self._record_reply("swr", event.value)
 
     @overrides
     def on_active_vfo(self, event: ActiveVFOEvent) -> None:
         self.active_vfo = event.vfo
+        self._record_reply("active_vfo", event.vfo)
         self.active_vfo_event.set()  # Set the event to unblock set_active_vfo
 
     @overrides
     def on_not_supported(self, event: NotSupportedEvent) -> None:
-        print(f"Unsupported command: {event.response}")
+        logging.warning("Unsupported command: %s", event.response)
 
     @overrides
     def on_comp_meter(self, event: COMPMeterEvent) -> None:
         self.comp = event.value
+        self._record_reply("comp", event.value)
 
     @overrides
     def on_alc_meter(self, event: ALCMeterEvent) -> None:
         self.alc = event.value
+        self._record_reply("alc", event.value)
 
     @overrides
     def on_vdd_meter(self, event: VDDMeterEvent) -> None:
         self.vdd = event.value
+        self._record_reply("vdd", event.value)
 
     @overrides
     def on_idd_meter(self, event: IDDMeterEvent) -> None:
         self.idd = event.value
+        self._record_reply("idd", event.value)
 
     @overrides
     def on_tx_power(self, event: TXPowerEvent) -> None:
         self.txpower = event.value
+        self._record_reply("txpower", event.value)
         self.txpower_event.set()  # Set the event to unblock get_txpower
 
     @overrides
     def on_transmit(self, event: TransmitEvent) -> None:
         self.transmit = event.transmit
+        self._record_reply("transmit", event.transmit)
         self.transmit_event.set()  # Set the event to unblock get_transmit
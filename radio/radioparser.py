@@ -1,7 +1,9 @@
-from typing import List
+from typing import Callable, Dict, List
 import logging
+import time
 from radio.listener import RadioListener
 from radio.events import *
+from radio.protocol import FTDX10
 
 
 class RadioParser:
@@ -37,16 +39,9 @@ class RadioParser:
         "dsb",  # DSB - Double sideband suppressed carrier
     ]
 
-    #
+    # Mode name -> MD code, all the modes of the FTDX10 (see radio.protocol)
     mode_codes = {
-        "lsb": 0x01,
-        "usb": 0x02,
-        "cw": 0x03,
-        "fm": 0x04,
-        "am": 0x05,
-        "rtty": 0x06,
-        "cwr": 0x07,
-        "rttyr": 0x09,
+        name: int(code, 16) for code, name in FTDX10.enums["mode"].pairs
     }
 
     # Mapping of VFO letters to numbers
@@ -54,31 +49,104 @@ class RadioParser:
     VFO_A = 0
     VFO_B = 1
 
-    def __init__(self):
+    # TX power range accepted by the PC command (W)
+    TXPOWER_MIN, TXPOWER_MAX = FTDX10.commands["PC"].limits
+
+    # Event type -> RadioListener method receiving it
+    LISTENER_METHODS = {
+        NotSupportedEvent: "on_not_supported",
+        ConfirmationEvent: "on_confirmation",
+        FrequencyEvent: "on_frequency",
+        ModeEvent: "on_mode",
+        ActiveVFOEvent: "on_active_vfo",
+        SMeterEvent: "on_s_meter",
+        POMeterEvent: "on_po_meter",
+        SWRMeterEvent: "on_swr_meter",
+        VDDMeterEvent: "on_vdd_meter",
+        IDDMeterEvent: "on_idd_meter",
+        COMPMeterEvent: "on_comp_meter",
+        ALCMeterEvent: "on_alc_meter",
+        TXPowerEvent: "on_tx_power",
+        TransmitEvent: "on_transmit",
+        TransceiverInfoEvent: "on_transceiver_info",
+    }
+
+    # Opcode -> length (with the ";") of its query form, e.g. "MD0;" or "RM6;"
+    QUERY_LENGTHS = FTDX10.query_lengths()
+
+    # RM meter number ([P1] of the RM command) -> event type
+    METER_EVENTS = {
+        int(meter): event_type
+        for meter, event_type in FTDX10.commands["RM"].events.items()
+    }
+
+    def __init__(self, protocol=FTDX10):
         """
-        Initializes the Radio class.
+        :param protocol: radio.protocol.Protocol of the radio model, the decoders
+                         are compiled from it.
         """
         self.listeners: List[RadioListener] = []
-        self.parsers = {
-            "FA": self.__parse_frequency_vfo_a,  # VFO A frequency
-            "FB": self.__parse_frequency_vfo_b,  # VFO B frequency
-            "VS": self.__parse_active_vfo,  # active Vfo
-            "MD": self.__parse_mode,  # Operating mode
-            "IF": self.__parse_info_vfo_a,  # IF (Transceiver Information; GET only)
-            "OI": self.__parse_info_vfo_b,  # IF (Transceiver Information; GET only)
-            "RM": self.__parse_read_meter,  # RM - Read Meter
-            "SM": self.__parse_smeter,  # S-meter values
-            "PC": self.__parse_txpower,  # TX power
-            "TX": self.__parse_transmit,  # Transmit status
-        }
+        # Event type -> tuple of callbacks. Replaced as a whole on every change so the
+        # reader thread can use it without locking.
+        self.dispatch: Dict[type, tuple] = {}
+        self.malformed = 0  # Frames that could not be decoded
+        self.tracer = None  # radio.tracing.Tracer, see Radio.set_tracer()
+        self._query_counts = {}  # Commands seen by count_queries() -> their count
+        self.protocol = protocol
+        self.query_lengths = protocol.query_lengths()
+        # Opcode -> decode function generated from the protocol table
+        self.parsers = protocol.compile(self._emit, self.is_subscribed)
+        # Event types each command can produce. Commands producing nothing anybody
+        # subscribed to are not decoded at all.
+        self.parser_events = protocol.event_types()
+
+    def subscribe(self, event_type: type, callback: Callable) -> None:
+        """
+        Calls callback(event) for every event of the given type.
+
+        :param event_type: Event class, e.g. SWRMeterEvent.
+        :param callback: Called on the thread that calls parse().
+        """
+        dispatch = dict(self.dispatch)
+        dispatch[event_type] = dispatch.get(event_type, ()) + (callback,)
+        self.dispatch = dispatch
+
+    def subscribe_meter(self, meter: int, callback: Callable) -> None:
+        """
+        Calls callback(event) for every reading of one RM meter.
+
+        :param meter: Meter number as in the RM command (1: S, 3: COMP, 4: ALC, 5: PO,
+                      6: SWR, 7: IDD, 8: VDD).
+        """
+        if meter not in self.METER_EVENTS:
+            raise ValueError("Unsupported meter: " + str(meter))
+        self.subscribe(self.METER_EVENTS[meter], callback)
+
+    def unsubscribe(self, event_type: type, callback: Callable) -> None:
+        dispatch = dict(self.dispatch)
+        callbacks = tuple(c for c in dispatch.get(event_type, ()) if c != callback)
+        if callbacks:
+            dispatch[event_type] = callbacks
+        else:
+            dispatch.pop(event_type, None)
+        self.dispatch = dispatch
+
+    def is_subscribed(self, event_type: type) -> bool:
+        return event_type in self.dispatch
 
     def add_listener(self, listener: RadioListener) -> None:
         """
         Adds a listener to receive radio events.
 
+        Only the on_* methods the listener overrides are subscribed, so events that
+        the listener ignores are not even decoded for it.
+
         :param listener: An instance of RadioListener.
         """
         self.listeners.append(listener)
+        for event_type, name in self.LISTENER_METHODS.items():
+            if getattr(type(listener), name, None) is not getattr(RadioListener, name):
+                self.subscribe(event_type, getattr(listener, name))
 
     def remove_all_listener(self, listener: RadioListener) -> None:
         """
@@ -88,6 +156,30 @@ class RadioParser:
         """
         if listener in self.listeners:
             self.listeners.remove(listener)
+            for event_type, name in self.LISTENER_METHODS.items():
+                self.unsubscribe(event_type, getattr(listener, name))
+
+    def _emit(self, event_type: type, *args) -> None:
+        """
+        Creates the event and passes it to the subscribers of its type (if any).
+        """
+        callbacks = self.dispatch.get(event_type)
+        if callbacks:
+            event = event_type(*args)
+            tracer = self.tracer
+            for callback in callbacks:
+                try:
+                    if tracer is None:
+                        callback(event)
+                    else:
+                        start = time.perf_counter()
+                        callback(event)
+                        tracer.complete(
+                            getattr(callback, "__qualname__", str(callback)), start
+                        )
+                except Exception as e:
+                    # A failing listener must not stop the parsing (and the reader thread)
+                    logging.error("Exception in %s: %s", callback, e)
 
     def generate_get_frequency(self, vfo: int) -> str:
         """
@@ -96,12 +188,18 @@ class RadioParser:
         :return: Raw data string to send to the radio.
         """
 
-        if vfo == self.VFO_A:
-            vfo = "A"
-        elif vfo == self.VFO_B:
-            vfo = "B"
+        return self.protocol.vfo_commands(FrequencyEvent)[vfo].query
+
+    def generate_get_info(self, vfo: int) -> str:
+        """
+        Generates the command to get the complete state of a VFO (frequency, mode,
+        clarifier, memory, shift) in one reply.
 
-        return "F%c;" % (vfo)
+        :param vfo: VFO_A (IF) or VFO_B (OI).
+        :return: Raw data string to send to the radio.
+        """
+        commands = self.protocol.vfo_commands(TransceiverInfoEvent)
+        return commands.get(vfo, commands[self.VFO_A]).query
 
     def generate_set_frequency(self, vfo: int, frequency: int) -> str:
         """
@@ -113,12 +211,8 @@ class RadioParser:
         :type vfo: int
         :return: Raw data string to send to the radio.
         """
-        if vfo == self.VFO_A:
-            vfo = "A"
-        elif vfo == self.VFO_B:
-            vfo = "B"
-
-        return "F%c%09ld;" % (vfo, frequency)
+        command = self.protocol.vfo_commands(FrequencyEvent)[vfo]
+        return self.protocol.set_command(command.opcode, frequency)
 
     def generate_get_mode(self) -> str:
         """
@@ -126,7 +220,7 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        return "MD0;"
+        return self.protocol.commands["MD"].query
 
     def generate_set_mode(self, mode: str) -> str:
         """
@@ -136,12 +230,10 @@ class RadioParser:
         :return: Raw data string to send to the radio.
         """
         mode = str(mode).lower()
-        if not self.mode_codes.__contains__(mode):
+        if mode not in self.protocol.enums["mode"].codes:
             raise ValueError("Unsupported mode: " + mode + " !")
 
-        result = "MD0%d;" % (self.mode_codes[mode])
-
-        return result
+        return self.protocol.set_command("MD", mode)
 
     def generate_get_transmit(self) -> str:
         """
@@ -149,7 +241,7 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        return "TX;"
+        return self.protocol.commands["TX"].query
 
     def generate_set_transmit(self, transmit: bool) -> str:
         """
@@ -158,7 +250,7 @@ class RadioParser:
         :param transmit: Whether to set transmit on (`True`) or off (`False`).
         :return: Raw data string to send to the radio.
         """
-        return "TX1;" if transmit else "TX0;"
+        return self.protocol.set_command("TX", bool(transmit))
 
     def generate_get_txpower(self) -> str:
         """
@@ -166,7 +258,7 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        return "PC;"
+        return self.protocol.commands["PC"].query
 
     def generate_set_txpower(self, po: int) -> str:
         """
@@ -174,11 +266,12 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        if po < 5:
-            po = 5
-        elif po > 100:
-            po = 100
-        return "PC%03d;" % po
+        txpower_min, txpower_max = self.protocol.commands["PC"].limits
+        if po < txpower_min:
+            po = txpower_min
+        elif po > txpower_max:
+            po = txpower_max
+        return self.protocol.set_command("PC", po)
 
     def generate_set_auto_information(self, enabled: bool) -> str:
         """
@@ -187,7 +280,7 @@ class RadioParser:
         :param enabled: Whether to set auto information on (`True`) or off (`False`).
         :return: Raw data string to send to the radio.
         """
-        return "AI1;" if enabled else "AI0;"
+        return self.protocol.set_command("AI", bool(enabled))
 
     def generate_get_active_vfo(self) -> str:
         """
@@ -195,7 +288,7 @@ class RadioParser:
         :return: Raw data string to send to the radio.
         """
 
-        return "VS;"
+        return self.protocol.commands["VS"].query
 
     def generate_set_active_vfo(self, activate_vfo: int) -> str:
         """
@@ -203,12 +296,9 @@ class RadioParser:
         :return: Raw data string to send to the radio.
         """
 
-        if activate_vfo == self.VFO_A:
-            return "VS0;"
-        elif activate_vfo == self.VFO_B:
-            return "VS1;"
-        else:
+        if activate_vfo not in self.protocol.enums["vfo"].codes:
             raise ValueError("Unsupported VFO: " + str(activate_vfo))
+        return self.protocol.set_command("VS", activate_vfo)
 
     def generate_get_s_meter(self) -> str:
         """
@@ -216,7 +306,7 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        return "RM1;"
+        return self.protocol.meter_query("s")
 
     def generate_get_po_meter(self) -> str:
         """
@@ -224,7 +314,7 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        return "RM5;"
+        return self.protocol.meter_query("po")
 
     def generate_get_comp_meter(self) -> str:
         """
@@ -232,7 +322,7 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        return "RM3;"
+        return self.protocol.meter_query("comp")
 
     def generate_get_alc_meter(self) -> str:
         """
@@ -240,7 +330,7 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        return "RM4;"
+        return self.protocol.meter_query("alc")
 
     def generate_get_swr_meter(self) -> str:
         """
@@ -248,7 +338,7 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        return "RM6;"
+        return self.protocol.meter_query("swr")
 
     def generate_get_idd_meter(self) -> str:
         """
@@ -256,7 +346,7 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        return "RM7;"
+        return self.protocol.meter_query("idd")
 
     def generate_get_vdd_meter(self) -> str:
         """
@@ -264,7 +354,44 @@ class RadioParser:
 
         :return: Raw data string to send to the radio.
         """
-        return "RM8;"
+        return self.protocol.meter_query("vdd")
+
+    def count_queries(self, commands) -> int:
+        """
+        :param commands: One or more raw commands, e.g. "MD04;PC010;TX;" (str or
+                         bytes).
+        :return: Number of replies the radio will send back for them.
+        """
+        # The same (mostly constant) commands are sent over and over
+        count = self._query_counts.get(commands)
+        if count is not None:
+            return count
+        text = commands.decode("ascii") if isinstance(commands, bytes) else commands
+        count = 0
+        for command in text.split(";")[:-1]:
+            if self.query_lengths.get(command[:2]) == len(command) + 1:
+                count += 1
+        if len(self._query_counts) < 1024:
+            self._query_counts[commands] = count
+        return count
+
+    def transmit_command(self, commands):
+        """
+        :param commands: One or more raw commands, e.g. "MD04;PC010;TX1;" (str or
+                         bytes).
+        :return: True if the last set transmit command among them keys the radio,
+                 False if it unkeys it, None if there is none.
+        """
+        if isinstance(commands, bytes):
+            commands = commands.decode("ascii")
+        start = commands.rfind("TX")
+        while start != -1:
+            if commands.startswith(";", start + 3) and (
+                start == 0 or commands[start - 1] == ";"
+            ):
+                return commands[start + 2] != "0"
+            start = commands.rfind("TX", 0, start)
+        return None
 
     def parse(self, data: bytes) -> int:
         """
@@ -282,232 +409,52 @@ class RadioParser:
         :rtype: int
         """
         # Find the character ";" which signals the end of the command
-        data_str = data.decode("utf-8")
-        end = data_str.find(";")
+        end = data.find(b";")
 
         # The incoming data does not contain one complete transaction...
         if end == -1:
             return 0
 
-        self.__parse(data_str[: end + 1])
+        # Only the frame is decoded, a byte of line noise cannot fail the whole buffer
+        self.parse_frame(data[: end + 1].decode("ascii", "replace"))
 
         return end + 1
 
-    def __parse(self, data: str) -> None:
+    def parse_frame(self, frame: str) -> None:
         """
-        Parses the string data and calls listeners based on the command.
-
-        :param trans: A single transaction string coming from the radio that we have to parse to a meaningful JSON block
-        :type trans: str
-        """
-        for s in self.parsers:
-            if data.startswith(s):  # if we have parser for the current command...
-                fn = self.parsers[s]
-                fn(data)  # call the responsible parser
-                return
-
-        logging.info("Not supported command coming from the radio: " + data)
-        for listener in self.listeners:
-            listener.on_not_supported(NotSupportedEvent(data))
-
-    def __parse_frequency_vfo_a(self, command: str) -> None:
-        """
-        Extracts the Frequency value from the command.
-
-        :param command: String of the type "FA00007000000;"
-        :type command: str
-        """
-        frequency = command[
-            2:-1
-        ]  # Extract the frequency value without stripping leading zeros
-        for listener in self.listeners:
-            listener.on_frequency(FrequencyEvent(frequency, self.VFO_A))
-
-    def __parse_frequency_vfo_b(self, command: str) -> None:
-        """
-        Extracts the Frequency value from the command
-
-        :param command: String of the type "FB00007000000;"
-        :type command: str
-        """
-        for listener in self.listeners:
-            listener.on_frequency(FrequencyEvent(command[2:-1], self.VFO_B))
-
-    def __parse_active_vfo(self, command: str) -> None:
-        """
-        Extracts active VFO from the command
-
-        :param command: String of the type "VS1;"
-        :type command: str
-        """
-        if int(command[2]) == self.VFO_A:
-            for listener in self.listeners:
-                listener.on_active_vfo(ActiveVFOEvent(self.VFO_A))
-        elif int(command[2]) == self.VFO_B:
-            for listener in self.listeners:
-                listener.on_active_vfo(ActiveVFOEvent(self.VFO_B))
-
-    def __parse_mode(self, command: str) -> None:
-        """
-        Extracts the Mode value from the command
-
-        :param command: String of the type "MD01;"
-        :type command: str
-        """
-
-        mode = self.__mode_from_byte_to_string(int(command[3]))
+        Decodes one complete command (e.g. from radio.framer.Framer).
 
-        for listener in self.listeners:
-            listener.on_mode(ModeEvent(mode, self.VFO_NONE))
+        A malformed frame (truncated, non-numeric parameters) is counted in
+        self.malformed and skipped instead of raising.
 
-    def __parse_info_vfo_a(self, command: str) -> None:
+        :param frame: Command string including the ";" terminator.
         """
-        Parse the IF command.
-        I F P1 P1 P1 P2 P2 P2 P2 P2 P2 P2 P2 P3 P3 P3 P3 P3 P4 P5 P6 P7 P8 P9 P9 P10  ;
-        0 1  2  3  4  5  6  7  8  9 10 11 12 13 14 15 16 17 18 19 20 21 22 23 24 25  26
+        tracer = self.tracer
+        if tracer is not None:
+            start = time.perf_counter()
+        try:
+            self.__parse(frame)
+        except (ValueError, IndexError) as e:
+            self.malformed += 1
+            logging.debug("Malformed command %r: %s", frame, e)
+        if tracer is not None:
+            tracer.complete("parse " + frame[:2], start, frame=frame)
 
-        P6 MODE
-        P2 VFO-A Frequency
-        P7 0: VFO 1: ....
-
-        [0-1] - IF
-        [3-13] - frequency
-        [31] - Operating mode (refer to the MD command)
-
-        :param command: String containing the "IF" command
-        :type command: str
-        """
-
-        mode = self.__mode_from_byte_to_string(int(command[21]))
-        freq = command[5:13]
-        for listener in self.listeners:
-            listener.on_mode(ModeEvent(mode, self.VFO_A))
-        for listener in self.listeners:
-            listener.on_frequency(FrequencyEvent(freq.strip("0"), self.VFO_A))
-
-    def __parse_info_vfo_b(self, command: str) -> None:
-        """
-        Parse the IF command.
-        O I P1 P1 P1 P2 P2 P2 P2 P2 P2 P2 P2 P3 P3 P3 P3 P3 P4 P5 P6 P7 P8 P9 P9 P10  ;
-        0 1  2  3  4  5  6  7  8  9 10 11 12 13 14 15 16 17 18 19 20 21 22 23 24 25  26
-
-        P6 MODE
-        P2 VFO-B Frequency
-        P7 0: VFO
-
-        [0-1] - OI
-        [3-13] - frequency
-        [31] - Operating mode (refer to the MD command)
-
-        :param command: String containing the "IF" command
-        :type command: str
-        """
-
-        mode = self.__mode_from_byte_to_string(int(command[21]))
-        freq = command[5:13]
-        for listener in self.listeners:
-            listener.on_mode(ModeEvent(mode, self.VFO_B))
-        for listener in self.listeners:
-            listener.on_frequency(FrequencyEvent(freq.strip("0"), self.VFO_B))
-
-    def __parse_smeter(self, command: str) -> None:
-        """
-        Extracts the Smeter value from the command
-
-        :param command: String starting of the type "SM0005;"
-        :type command: str
-        """
-        smeter = command[3:-1]
-        for listener in self.listeners:
-            listener.on_mode(SMeterEvent(int(smeter)))
-
-    def __parse_read_meter(self, command: str) -> None:
-        """
-        Parses the Read Meter command
-
-        :param command: String is of the type "RM[P1][P2][P2][P2][P3][P3][P3];" where [P1] 1:S 2:- 3:COMP 4:ALC 5:PO 6:SWR 7:IDD 8:VDD;  [P2]: 0 - 255; [P3]: 000 (Fixed)
-        :type command: str
-        """
-
-        result = dict()
-
-        meter_types = {
-            "1": "S",
-            "3": "COMP",
-            "4": "ALC",
-            "5": "PO",
-            "6": "SWR",
-            "7": "IDD",
-            "8": "VDD",
-        }
-
-        p1 = command[2]  # [P1]: Meter type
-        p2 = command[3:6]  # [P2]: Meter reading (3 digits)
-
-        # Map [P1] to meter type
-        meter_type = meter_types.get(p1, "Unknown")
-        if meter_type == "S":
-            for listener in self.listeners:
-                listener.on_s_meter(SMeterEvent(int(p2)))
-        elif meter_type == "COMP":
-            for listener in self.listeners:
-                listener.on_comp_meter(COMPMeterEvent(int(p2)))
-        elif meter_type == "ALC":
-            for listener in self.listeners:
-                listener.on_alc_meter(ALCMeterEvent(int(p2)))
-        elif meter_type == "PO":
-            for listener in self.listeners:
-                listener.on_po_meter(POMeterEvent(int(p2)))
-        elif meter_type == "SWR":
-            for listener in self.listeners:
-                listener.on_swr_meter(SWRMeterEvent(int(p2)))
-        elif meter_type == "IDD":
-            for listener in self.listeners:
-                listener.on_idd_meter(IDDMeterEvent(int(p2)))
-        elif meter_type == "VDD":
-            for listener in self.listeners:
-                listener.on_vdd_meter(VDDMeterEvent(int(p2)))
-        else:
-            for listener in self.listeners:
-                listener.on_not_supported(NotSupportedEvent(command))
-
-    def __parse_txpower(self, command: str) -> None:
-        """
-        Extracts the TX power value from the command.
-
-        :param command: String of the type "PCXXX;"
-        :type command: str
-        """
-        txpower = int(command[2:5])
-        for listener in self.listeners:
-            listener.on_tx_power(TXPowerEvent(txpower))
-
-    def __parse_transmit(self, command: str) -> None:
-        """
-        Extracts the transmit status from the command.
-
-        :param command: String of the type "TX0;", "TX1;", "TX2;"
-        :type command: str
+    def __parse(self, data: str) -> None:
         """
-        transmit = command[2] == "2"
-        for listener in self.listeners:
-            listener.on_transmit(TransmitEvent(transmit))
+        Parses the string data and calls listeners based on the command.
 
-    @classmethod
-    def __mode_from_byte_to_string(cls, mode: int) -> str:
-        """
-        Returns a string describing the current working mode
-        :param mode: Integer describing the mode see cls.mode_codes
-        :type mode: int
-        :return: String describing the working mode cls.mode_codes
-        :rtype: str
+        :param trans: A single transaction string coming from the radio that we have to parse to a meaningful JSON block
+        :type trans: str
         """
-
-        # Convert the "mode" to valid string
-        for key, value in cls.mode_codes.items():
-            if mode == value:
-                logging.info("returns = " + key)
-                return key
-
-        # In case of unknown mode integer
-        return "none"
+        fn = self.parsers.get(data[:2])
+        if fn is not None:  # if we have parser for the current command...
+            dispatch = self.dispatch
+            for event_type in self.parser_events[data[:2]]:
+                if event_type in dispatch:
+                    fn(data)  # call the responsible parser
+                    return
+            return  # Nobody is interested - skip decoding
+
+        logging.debug("Not supported command coming from the radio: %s", data)
+        self._emit(NotSupportedEvent, data)
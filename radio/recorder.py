@@ -0,0 +1,276 @@
+"""
+Long-term meter history in memory-mapped binary files.
+
+MeterRecorder appends one fixed-width record (time, meter, value) per meter reading
+to a preallocated file and starts the next file when it is full. MeterFile and
+read_range() find a time range by binary search over the records, so a slice of a
+weekend of readings is read without loading the files.
+"""
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from overrides import overrides
+from radio.events import *
+from radio.listener import RadioListener
+
+# Meter ids stored in the records - the meter numbers of the RM command
+METER_IDS = {"s": 1, "comp": 3, "alc": 4, "po": 5, "swr": 6, "idd": 7, "vdd": 8}
+METER_NAMES = {meter_id: name for name, meter_id in METER_IDS.items()}
+
+MAGIC = b"FTDXMTR1"
+# magic, record size, capacity, number of records written
+HEADER = struct.Struct("<8sHxxxxxxQQ")
+HEADER_SIZE = 64
+# time.time(), meter id, value
+RECORD = struct.Struct("<dHh4x")
+
+
+class MeterRecorder(RadioListener):
+    """
+    Records every meter reading of the radio.
+
+    Files are named <prefix>-<number>.bin in the directory; a new recorder continues
+    with the next number. With max_files the oldest files are deleted on rollover.
+
+    Attach it with radio.add_listener(recorder, conflate=()) - the default
+    asynchronous delivery keeps only the latest reading of a lagging listener.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        capacity: int = 1000000,
+        max_files: int = None,
+        prefix: str = "meters",
+    ):
+        """
+        :param directory: Where the files are written, created if needed.
+        :param capacity: Records per file (16 bytes each).
+        :param max_files: Number of files kept, None keeps all.
+        :param prefix: Beginning of the file names.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.capacity = capacity
+        self.max_files = max_files
+        self.prefix = prefix
+        self.records = 0  # Records written by this recorder
+        self.path = None
+        self._file = None
+        self._map = None
+        self._count = 0
+        self._lock = threading.Lock()
+        existing = list_files(directory, prefix)
+        self._number = _file_number(existing[-1], prefix) + 1 if existing else 1
+        self._open_next()
+
+    def record(self, meter: str, value: int, timestamp: float = None) -> None:
+        """
+        :param meter: Meter name, see METER_IDS.
+        :param timestamp: time.time() of the reading, now by default.
+        """
+        meter_id = METER_IDS[meter]
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if self._map is None:
+                raise ValueError("The recorder is closed")
+            if self._count == self.capacity:
+                self._close_file()
+                self._open_next()
+            offset = HEADER_SIZE + self._count * RECORD.size
+            RECORD.pack_into(self._map, offset, timestamp, meter_id, value)
+            self._count += 1
+            # The count is written after the record, a reader never sees a partial one
+            HEADER.pack_into(
+                self._map, 0, MAGIC, RECORD.size, self.capacity, self._count
+            )
+            self.records += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_file()
+
+    @overrides
+    def on_s_meter(self, event: SMeterEvent) -> None:
+        self.record("s", event.value)
+
+    @overrides
+    def on_comp_meter(self, event: COMPMeterEvent) -> None:
+        self.record("comp", event.value)
+
+    @overrides
+    def on_alc_meter(self, event: ALCMeterEvent) -> None:
+        self.record("alc", event.value)
+
+    @overrides
+    def on_po_meter(self, event: POMeterEvent) -> None:
+        self.record("po", event.value)
+
+    @overrides
+    def on_swr_meter(self, event: SWRMeterEvent) -> None:
+        self.record("swr", event.value)
+
+    @overrides
+    def on_idd_meter(self, event: IDDMeterEvent) -> None:
+        self.record("idd", event.value)
+
+    @overrides
+    def on_vdd_meter(self, event: VDDMeterEvent) -> None:
+        self.record("vdd", event.value)
+
+    def _open_next(self) -> None:
+        # Called with the lock held (or from __init__)
+        self.path = os.path.join(
+            self.directory, "%s-%06d.bin" % (self.prefix, self._number)
+        )
+        self._number += 1
+        self._file = open(self.path, "w+b")
+        self._file.truncate(HEADER_SIZE + self.capacity * RECORD.size)  # Preallocate
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._count = 0
+        HEADER.pack_into(self._map, 0, MAGIC, RECORD.size, self.capacity, 0)
+
+        if self.max_files:
+            for path in list_files(self.directory, self.prefix)[: -self.max_files]:
+                try:
+                    os.remove(path)
+                except OSError as e:  # E.g. still open by a reader on Windows
+                    logging.warning("Cannot remove %s: %s", path, e)
+
+    def _close_file(self) -> None:
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+        self._map = None
+        self._file = None
+
+
+class _Timestamps:
+    """
+    Sequence view of the record times of a MeterFile for bisect.
+    """
+
+    def __init__(self, data, count: int):
+        self.data = data
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> float:
+        return RECORD.unpack_from(self.data, HEADER_SIZE + i * RECORD.size)[0]
+
+
+class MeterFile:
+    """
+    Read-only view of one recorder file. Records written by a recorder that still
+    has the file open become visible as they are written.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, record_size, self.capacity, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            self._map.close()
+            raise ValueError(f"{path} is not a meter recording")
+
+    def __len__(self) -> int:
+        return HEADER.unpack_from(self._map, 0)[3]
+
+    def first_time(self):
+        return _Timestamps(self._map, len(self))[0] if len(self) else None
+
+    def last_time(self):
+        count = len(self)
+        return _Timestamps(self._map, count)[count - 1] if count else None
+
+    def slice(self, start: float = None, end: float = None, meters=None) -> list:
+        """
+        Reads the records with start <= time < end.
+
+        The records are found by binary search, only the ones in the range are read.
+        The recorder writes them in time order; a clock set back meanwhile breaks
+        that order and may hide some records.
+
+        :param start: time.time() value, None for the first record.
+        :param end: time.time() value, None for after the last record.
+        :param meters: Meter names to return, None for all.
+        :return: List of (time, meter name, value) tuples.
+        """
+        times = _Timestamps(self._map, len(self))
+        first = 0 if start is None else bisect_left(times, start)
+        last = len(times) if end is None else bisect_left(times, end)
+        wanted = None if meters is None else {METER_IDS[name] for name in meters}
+
+        result = []
+        for i in range(first, last):
+            timestamp, meter_id, value = RECORD.unpack_from(
+                self._map, HEADER_SIZE + i * RECORD.size
+            )
+            if wanted is None or meter_id in wanted:
+                result.append((timestamp, METER_NAMES.get(meter_id), value))
+        return result
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def list_files(directory: str, prefix: str = "meters") -> list:
+    """
+    :return: Paths of the recorder files in the directory, oldest first.
+    """
+    names = [
+        name
+        for name in os.listdir(directory)
+        if name.startswith(prefix + "-") and name.endswith(".bin")
+    ]
+    paths = [os.path.join(directory, name) for name in names]
+    return sorted(paths, key=lambda path: _file_number(path, prefix))
+
+
+def read_range(
+    directory: str, start: float = None, end: float = None, meters=None, prefix="meters"
+) -> list:
+    """
+    Reads the records with start <= time < end from all the files of a recorder.
+    Files entirely outside the range are skipped after looking at their first and
+    last record.
+
+    :return: List of (time, meter name, value) tuples in time order.
+    """
+    result = []
+    for path in list_files(directory, prefix):
+        meter_file = MeterFile(path)
+        try:
+            first, last = meter_file.first_time(), meter_file.last_time()
+            if first is None:
+                continue
+            if end is not None and first >= end:
+                continue
+            if start is not None and last < start:
+                continue
+            result.extend(meter_file.slice(start, end, meters))
+        finally:
+            meter_file.close()
+    return result
+
+
+def _file_number(path: str, prefix: str) -> int:
+    name = os.path.basename(path)
+    try:
+        return int(name[len(prefix) + 1 : -len(".bin")])
+    except ValueError:
+        return 0
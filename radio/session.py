@@ -0,0 +1,126 @@
+import logging
+from radio.radio import Radio
+from radio.state import TuneResult
+
+
+class RadioSession:
+    """
+    Long-lived connection to the radio for click-to-tune.
+
+    The serial port and the Radio threads are opened once in connect() and reused for
+    every tune, so starting a tune costs a single serial write (see Radio.tune()).
+    """
+
+    def __init__(
+        self,
+        port: str,
+        baudrate: int,
+        command_delay: float = 0,
+        timeout: float = 1.0,
+        serial_port=None,
+    ):
+        """
+        :param port: Serial port the radio is connected to.
+        :param baudrate: Baud rate configured in the radio's CAT menu.
+        :param command_delay: Passed to Radio.
+        :param timeout: Seconds the radio has to confirm a tune start/stop.
+        :param serial_port: Passed to Radio (e.g. a SimulatedRig).
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.command_delay = command_delay
+        self.timeout = timeout
+        self.serial_port = serial_port
+        self.radio = None
+        self.state = None  # RadioState read by connect()
+        self.tuned = False
+        self.latencies = []  # Seconds from start_tune() until the radio confirmed TX
+
+    @property
+    def is_connected(self) -> bool:
+        return self.radio is not None
+
+    def matches(self, port: str, baudrate: int) -> bool:
+        """
+        :return: True if the session is connected with the given port settings.
+        """
+        return self.is_connected and self.port == port and self.baudrate == baudrate
+
+    def connect(self) -> None:
+        """
+        Opens the port and reads the current state of the radio in one round trip.
+        Does nothing if the session is already connected.
+        """
+        if self.radio is not None:
+            return
+        self.radio = Radio(
+            port=self.port,
+            baudrate=self.baudrate,
+            command_delay=self.command_delay,
+            serial_port=self.serial_port,
+        )
+        try:
+            self.state = self.radio.sync(timeout=self.timeout)
+        except Exception:
+            self.close()
+            raise
+
+    def current_mode(self) -> str:
+        """
+        :return: Last known mode of the active VFO.
+        """
+        if self.radio.active_vfo == self.radio.parser.VFO_B:
+            return self.radio.mode_vfo_b
+        return self.radio.mode_vfo_a
+
+    def start_tune(self, mode: str, txpower: int) -> TuneResult:
+        """
+        Switches to the given mode and power and keys the transmitter.
+        The mode and power in use before are restored by stop_tune().
+
+        :param mode: Mode to tune in (e.g. "FM").
+        :param txpower: Power in watts.
+        :return: TuneResult, its total is the click-to-RF latency.
+        """
+        self.tuned = True
+        result = self.radio.tune(mode, txpower, self.timeout)
+        self.latencies.append(result.total)
+        return result
+
+    def stop_tune(self) -> TuneResult:
+        """
+        Unkeys the transmitter and restores the mode and power saved by start_tune().
+        """
+        result = self.radio.untune(self.timeout)
+        self.tuned = False
+        return result
+
+    def latency_stats(self) -> dict:
+        """
+        :return: Count, min, median and max of the measured click-to-RF latencies (s).
+        """
+        import statistics
+
+        if not self.latencies:
+            return {"count": 0}
+        return {
+            "count": len(self.latencies),
+            "min": min(self.latencies),
+            "median": statistics.median(self.latencies),
+            "max": max(self.latencies),
+        }
+
+    def close(self) -> None:
+        """
+        Unkeys the transmitter if needed and closes the port.
+        """
+        if self.radio is None:
+            return
+        try:
+            if self.tuned:
+                self.radio.set_transmit(False)
+            self.radio.disconnect()
+        except Exception as e:
+            logging.error(f"Error while closing the radio session: {e}")
+        self.radio = None
+        self.tuned = False
@@ -0,0 +1,186 @@
+import threading
+import time
+from radio.meters import raw_from_po
+
+
+class SimulatedRig:
+    """
+    In-memory stand-in for a serial port with an FTDX10 on the other end.
+
+    It implements the small part of the pyserial API that Radio uses (write, read,
+    in_waiting, is_open, close) and answers CAT queries from its own state.
+    Replies become readable only after the configured turnaround time plus the
+    time the bytes would need on the wire at the configured baud rate, so it can be
+    used to measure latency and to drive Radio from tests and benchmarks without hardware.
+    """
+
+    RADIO_ID = "0761"  # FTDX10
+
+    def __init__(
+        self, baudrate: int = 38400, turnaround: float = 0.01, timeout: float = 0.1
+    ):
+        """
+        :param baudrate: Simulated line speed, used to compute the time on the wire.
+        :param turnaround: Seconds the rig needs before it starts answering a query.
+        :param timeout: Read timeout in seconds (like serial.Serial.timeout).
+        """
+        self.baudrate = baudrate
+        self.turnaround = turnaround
+        self.timeout = timeout
+        self.is_open = True
+
+        self.frequency_vfo_a = 14074000
+        self.frequency_vfo_b = 7074000
+        self.active_vfo = 0
+        self.mode = "2"  # MD code, 2 = USB
+        self.txpower = 100
+        self.transmit = False
+        self.auto_information = False
+        self.meters = {"1": 0, "3": 0, "4": 0, "5": 0, "6": 0, "7": 0, "8": 190}
+
+        # Time (time.perf_counter) when the rig was last keyed/unkeyed by CAT
+        self.keyed_at = None
+        self.unkeyed_at = None
+        self.commands_received = 0
+
+        self._pending = b""  # Written bytes without a terminating ";"
+        self._output = []  # (ready_time, bytes) in the order they were produced
+        self._lock = threading.Lock()
+        self._data_ready = threading.Condition(self._lock)
+
+    def open(self) -> None:
+        with self._lock:
+            self.is_open = True
+            self._pending = b""
+            self._output = []
+
+    def close(self) -> None:
+        with self._lock:
+            self.is_open = False
+            self._data_ready.notify_all()
+
+    @property
+    def in_waiting(self) -> int:
+        now = time.perf_counter()
+        with self._lock:
+            return sum(len(data) for ready, data in self._output if ready <= now)
+
+    def write(self, data: bytes) -> int:
+        """
+        Receives commands from the host and schedules the replies.
+        """
+        with self._lock:
+            self._pending += data
+            ready = time.perf_counter() + self.turnaround
+            while b";" in self._pending:
+                command, self._pending = self._pending.split(b";", 1)
+                self.commands_received += 1
+                reply = self._execute(command.decode("ascii", "replace"))
+                if reply:
+                    # Replies leave the rig one after another over the same wire
+                    if self._output:
+                        ready = max(ready, self._output[-1][0])
+                    ready += len(reply) * self.byte_time()
+                    self._output.append((ready, reply.encode("ascii")))
+            self._data_ready.notify_all()
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        """
+        Returns up to size bytes, waiting at most timeout seconds for the first one.
+        """
+        deadline = time.perf_counter() + (self.timeout or 0)
+        with self._lock:
+            while self.is_open:
+                now = time.perf_counter()
+                if self._output and self._output[0][0] <= now:
+                    return self._take(size, now)
+                if now >= deadline:
+                    break
+                wait = deadline - now
+                if self._output:
+                    wait = min(wait, self._output[0][0] - now)
+                self._data_ready.wait(wait)
+        return b""
+
+    def reset_input_buffer(self) -> None:
+        with self._lock:
+            self._output = []
+
+    def byte_time(self) -> float:
+        """
+        :return: Seconds needed to send one byte (8N1 framing, 10 bits).
+        """
+        return 10.0 / self.baudrate
+
+    def _take(self, size: int, now: float) -> bytes:
+        # Called with the lock held
+        result = b""
+        while self._output and self._output[0][0] <= now and len(result) < size:
+            ready, data = self._output.pop(0)
+            room = size - len(result)
+            result += data[:room]
+            if len(data) > room:
+                self._output.insert(0, (ready, data[room:]))
+        return result
+
+    def _execute(self, command: str):
+        """
+        Applies a single command (without the ";") and returns the reply, if any.
+        """
+        opcode, args = command[:2], command[2:]
+
+        if opcode == "ID":
+            return "ID%s;" % self.RADIO_ID
+        if opcode in ("FA", "FB"):
+            if args:
+                if opcode == "FA":
+                    self.frequency_vfo_a = int(args)
+                else:
+                    self.frequency_vfo_b = int(args)
+                return None
+            frequency = self.frequency_vfo_a if opcode == "FA" else self.frequency_vfo_b
+            return "%s%09d;" % (opcode, frequency)
+        if opcode == "VS":
+            if args:
+                self.active_vfo = int(args)
+                return None
+            return "VS%d;" % self.active_vfo
+        if opcode == "MD":
+            if len(args) == 2:
+                self.mode = args[1]
+                return None
+            return "MD0%s;" % self.mode
+        if opcode == "PC":
+            if args:
+                self.txpower = int(args)
+                return None
+            return "PC%03d;" % self.txpower
+        if opcode == "TX":
+            if args:
+                keyed = args != "0"
+                if keyed and not self.transmit:
+                    self.keyed_at = time.perf_counter()
+                elif not keyed and self.transmit:
+                    self.unkeyed_at = time.perf_counter()
+                self.transmit = keyed
+                # The PO meter shows the set power, the SWR that of a decent antenna
+                self.meters["5"] = raw_from_po(self.txpower) if keyed else 0
+                self.meters["6"] = 30 if keyed else 0
+                return None
+            return "TX%d;" % (1 if self.transmit else 0)
+        if opcode == "RM":
+            if args in self.meters:
+                return "RM%s%03d000;" % (args, self.meters[args])
+            return "?;"
+        if opcode == "SM":
+            return "SM0%03d;" % self.meters["1"]
+        if opcode == "AI":
+            if args:
+                self.auto_information = args == "1"
+                return None
+            return "AI%d;" % (1 if self.auto_information else 0)
+        if opcode in ("IF", "OI"):
+            frequency = self.frequency_vfo_a if opcode == "IF" else self.frequency_vfo_b
+            return "%s001%09d+000000%s00000;" % (opcode, frequency, self.mode)
+        return "?;"
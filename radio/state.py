@@ -0,0 +1,75 @@
+class TuneResult:
+    """
+    Outcome of Radio.tune() / Radio.untune().
+
+    steps maps each step to the seconds elapsed since the call started when that step
+    completed: "send" (commands queued), "save" (tune() only - the previous mode and
+    power were read back) and "mode", "txpower", "transmit" (the reply confirming the
+    value arrived).
+    """
+
+    def __init__(self, mode: str, txpower: int, transmit: bool):
+        self.mode = mode
+        self.txpower = txpower
+        self.transmit = transmit
+        self.steps = {}
+        self.total = None
+
+    def __str__(self):
+        steps = ", ".join(
+            "%s=%.1fms" % (name, seconds * 1000) for name, seconds in self.steps.items()
+        )
+        return (
+            f"TuneResult(mode={self.mode}, txpower={self.txpower}, "
+            f"transmit={self.transmit}, total={self.total * 1000:.1f}ms, {steps})"
+        )
+
+
+class RadioState:
+    """
+    Snapshot of the radio returned by Radio.sync(). Every value comes from a reply to
+    the same batch of queries.
+    """
+
+    def __init__(
+        self,
+        active_vfo: int,
+        info_vfo_a,
+        info_vfo_b,
+        txpower: int,
+        transmit: bool,
+        meters: dict,
+        elapsed: float,
+    ):
+        self.active_vfo = active_vfo
+        self.info_vfo_a = info_vfo_a  # TransceiverInfoEvent of VFO A (IF)
+        self.info_vfo_b = info_vfo_b  # TransceiverInfoEvent of VFO B (OI)
+        self.txpower = txpower
+        self.transmit = transmit
+        self.meters = meters  # Meter name (e.g. "swr") -> raw reading (0-255)
+        self.elapsed = elapsed  # Seconds the round trip took
+
+    @property
+    def active_info(self):
+        return self.info_vfo_b if self.active_vfo == 1 else self.info_vfo_a
+
+    @property
+    def frequency(self) -> int:
+        """
+        :return: Frequency of the active VFO in Hz.
+        """
+        return self.active_info.frequency
+
+    @property
+    def mode(self) -> str:
+        """
+        :return: Mode of the active VFO.
+        """
+        return self.active_info.mode
+
+    def __str__(self):
+        return (
+            f"RadioState(active_vfo={self.active_vfo}, frequency={self.frequency}, "
+            f"mode={self.mode}, txpower={self.txpower}, transmit={self.transmit}, "
+            f"meters={self.meters}, elapsed={self.elapsed * 1000:.1f}ms)"
+        )
@@ -0,0 +1,186 @@
+import random
+import tempfile
+import unittest
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from radio.capture import CaptureWriter
+from radio.events import (
+    FrequencyEvent,
+    ModeEvent,
+    TransceiverInfoEvent,
+    TransmitEvent,
+    TXPowerEvent,
+)
+from radio.framer import Framer
+from radio.radioparser import RadioParser
+from radio.recorder import METER_IDS
+
+
+def replies(count: int, seed: int = 1) -> list:
+    generator = random.Random(seed)
+    modes = "123456789ABCDEF"
+    result = []
+    for _ in range(count):
+        kind = generator.randrange(8)
+        if kind == 0:
+            result.append(b"TX%d;" % generator.randrange(3))
+        elif kind == 1:
+            result.append(b"PC%03d;" % generator.randrange(5, 101))
+        elif kind == 2:
+            vfo = generator.choice((b"A", b"B"))
+            result.append(b"F%s%09d;" % (vfo, generator.randrange(1800000, 30000000)))
+        elif kind == 3:
+            result.append(b"MD0%s;" % generator.choice(modes).encode())
+        elif kind == 4:
+            result.append(b"SM0%03d;" % generator.randrange(256))
+        elif kind == 5:
+            result.append(
+                b"%s001%09d+000000%s00000;"
+                % (
+                    generator.choice((b"IF", b"OI")),
+                    generator.randrange(1800000, 30000000),
+                    generator.choice(modes).encode(),
+                )
+            )
+        else:
+            meter = generator.choice((1, 3, 4, 5, 6, 7, 8))
+            result.append(b"RM%d%03d000;" % (meter, generator.randrange(256)))
+    return result
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestAnalysis(unittest.TestCase):
+    def parse(self, data: bytes) -> dict:
+        # The same readings from the live read path
+        parser = RadioParser()
+        framer = Framer(parser.parsers)
+        readings = {}
+
+        def add(name):
+            return lambda event: readings.setdefault(name, []).append(event)
+
+        for name, meter_id in METER_IDS.items():
+            parser.subscribe_meter(meter_id, add(name))
+        for event_type, name in (
+            (TXPowerEvent, "txpower"),
+            (TransmitEvent, "transmit"),
+            (ModeEvent, "mode"),
+            (FrequencyEvent, "frequency"),
+            (TransceiverInfoEvent, "info"),
+        ):
+            parser.subscribe(event_type, add(name))
+        for i in range(0, len(data), 7):
+            for frame in framer.feed(data[i : i + 7]):
+                parser.parse_frame(frame)
+        return readings
+
+    def test_matches_parser(self):
+        from radio.analysis import MODE_NAMES, extract
+
+        frames = replies(5000)
+        generator = random.Random(2)
+        # Line noise between some of the frames
+        data = b"".join(
+            (b"\xff\x00x" if generator.random() < 0.1 else b"") + frame
+            for frame in frames
+        )
+        capture = extract(data)
+        readings = self.parse(data)
+        self.assertEqual(capture.frames, len(frames))
+
+        for name in METER_IDS:
+            self.assertEqual(
+                capture.series[name].values.tolist(),
+                [event.value for event in readings.get(name, [])],
+            )
+        self.assertEqual(
+            capture.series["txpower"].values.tolist(),
+            [event.value for event in readings["txpower"]],
+        )
+        self.assertEqual(
+            capture.series["transmit"].values.tolist(),
+            [event.transmit for event in readings["transmit"]],
+        )
+        self.assertEqual(
+            [MODE_NAMES[i] for i in capture.series["mode"].values],
+            [event.mode for event in readings["mode"]],
+        )
+        for vfo, name in ((0, "frequency_vfo_a"), (1, "frequency_vfo_b")):
+            events = [
+                event
+                for event in readings["frequency"] + readings["info"]
+                if event.vfo == vfo
+            ]
+            self.assertEqual(
+                sorted(capture.series[name].values.tolist()),
+                sorted(event.frequency for event in events),
+            )
+
+    def test_blocks(self):
+        from radio import analysis
+
+        data = b"".join(replies(3000, seed=3))
+        whole = analysis.extract(data)
+        block = analysis.BLOCK
+        analysis.BLOCK = 1000  # Frames across block boundaries
+        try:
+            blocks = analysis.extract(data)
+        finally:
+            analysis.BLOCK = block
+        self.assertEqual(blocks.frames, whole.frames)
+        for name, series in whole.series.items():
+            self.assertEqual(
+                blocks.series[name].positions.tolist(), series.positions.tolist()
+            )
+            self.assertEqual(
+                blocks.series[name].values.tolist(), series.values.tolist()
+            )
+
+    def test_sessions(self):
+        from radio.analysis import analyze
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "session.cat")
+            capture = CaptureWriter(path)
+            # Two sessions an hour apart: 10 s keyed at 50 W into an SWR of 1.5
+            for start in (1000.0, 4600.0):
+                capture.write(b"PC050;TX0;", start)
+                capture.write(b"TX1;", start + 1)
+                for i in range(10):
+                    capture.write(b"RM6064000;RM5150000;", start + 1.5 + i)
+                capture.write(b"TX0;RM5000000;", start + 11)
+                capture.write(b"FA014074000;MD02;", start + 12)
+            capture.close()
+            summaries = analyze(path)
+
+        self.assertEqual(len(summaries), 2)
+        for summary in summaries:
+            self.assertEqual(summary["transmissions"], 1)
+            self.assertAlmostEqual(summary["time_keyed"], 10.0)
+            self.assertEqual(summary["swr"]["samples"], 10)
+            self.assertEqual(summary["swr"]["median"], 1.5)
+            self.assertEqual(summary["swr"]["histogram"]["1.5-2.0"], 10)
+            self.assertEqual(summary["po"]["samples"], 10)
+            self.assertEqual(summary["po"]["mean"], 50.0)
+            self.assertEqual(summary["txpower"]["last"], 50)
+            self.assertEqual(summary["frequency_vfo_a"]["last"], 14074000)
+            self.assertEqual(summary["modes"], {"usb": 1})
+        self.assertEqual(summaries[1]["start"], 4600.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
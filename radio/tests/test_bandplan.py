@@ -0,0 +1,88 @@
+import unittest
+import json
+import tempfile
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.bandplan import BandPlan, Segment
+from radio.exceptions import FrequencyNotAllowedException
+from radio.radio import Radio
+from radio.simulator import SimulatedRig
+
+
+class TestBandPlan(unittest.TestCase):
+    def setUp(self):
+        self.plan = BandPlan()
+
+    def test_lookup(self):
+        segment = self.plan.lookup(14074000)
+        self.assertEqual(segment.band, "20m")
+        self.assertIn("pktusb", segment.modes)
+        self.assertNotIn("fm", segment.modes)
+        self.assertEqual(self.plan.band(7150000), "40m")
+        self.assertIn("lsb", self.plan.allowed_modes(7150000))
+
+    def test_segment_edges(self):
+        self.assertEqual(self.plan.band(14000000), "20m")
+        self.assertEqual(self.plan.band(14349999), "20m")
+        self.assertIsNone(self.plan.band(14350000))
+        self.assertIsNone(self.plan.band(1000))
+        self.assertIsNone(self.plan.band(100000000))
+
+    def test_is_legal(self):
+        self.assertTrue(self.plan.is_legal(14200000, "USB"))
+        self.assertFalse(self.plan.is_legal(14030000, "usb"))
+        self.assertTrue(self.plan.is_legal(14030000, "cw"))
+        self.assertFalse(self.plan.is_legal(14100000))  # Beacons
+
+    def test_nearest_legal(self):
+        self.assertEqual(self.plan.nearest_legal(14200000), 14200000)
+        self.assertEqual(self.plan.nearest_legal(14360000), 14349999)
+        self.assertEqual(self.plan.nearest_legal(13900000), 14000000)
+        self.assertEqual(self.plan.nearest_legal(1000), 1810000)
+        self.assertEqual(self.plan.nearest_legal(80000000), 70499999)
+
+    def test_nearest_legal_for_mode(self):
+        self.assertEqual(self.plan.nearest_legal(14030000, "usb"), 14101000)
+        self.assertEqual(self.plan.nearest_legal(7050000, "usb"), 7060000)
+        self.assertEqual(self.plan.nearest_legal(7050000, "cw"), 7050000)
+        self.assertIsNone(self.plan.nearest_legal(7050000, "dsb"))
+
+    def test_overlapping_segments(self):
+        with self.assertRaises(ValueError):
+            BandPlan([(100, 200, "a", ("cw",)), (150, 300, "b", ("cw",))])
+
+    def test_load(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump([[144000000, 146000000, "2m", ["fm", "usb"]]], f)
+        try:
+            plan = BandPlan.load(f.name)
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(plan.band(145500000), "2m")
+        self.assertIsInstance(plan.lookup(145500000), Segment)
+
+    def test_radio_checks_frequency(self):
+        rig = SimulatedRig(turnaround=0.001)
+        radio = Radio("sim", 38400, command_delay=0, serial_port=rig, band_plan=self.plan)
+        try:
+            radio.active_vfo = radio.parser.VFO_A
+            with self.assertRaises(FrequencyNotAllowedException):
+                radio.set_frequency(14360000)
+            radio.set_frequency(14200000)
+            radio.command_queue.join(1)
+            self.assertEqual(rig.frequency_vfo_a, 14200000)
+        finally:
+            radio.disconnect()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import socket
+import time
+import unittest
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.broadcast import StateBroadcaster, decode
+from radio.events import FrequencyEvent, ModeEvent, TransmitEvent
+from radio.radio import Radio
+from radio.simulator import SimulatedRig
+
+
+class TestStateBroadcaster(unittest.TestCase):
+    def setUp(self):
+        self.consumer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.consumer.bind(("127.0.0.1", 0))
+        self.consumer.settimeout(1.0)
+        self.broadcaster = None
+
+    def tearDown(self):
+        if self.broadcaster is not None:
+            self.broadcaster.close()
+        self.consumer.close()
+
+    def start(self, **options) -> StateBroadcaster:
+        self.broadcaster = StateBroadcaster([self.consumer.getsockname()], **options)
+        return self.broadcaster
+
+    def receive(self) -> dict:
+        return decode(self.consumer.recv(1024))
+
+    def receive_all(self, duration: float) -> list:
+        states = []
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            self.consumer.settimeout(max(end - time.monotonic(), 0.001))
+            try:
+                states.append(self.receive())
+            except socket.timeout:
+                break
+        return states
+
+    def test_sends_changes(self):
+        broadcaster = self.start(keepalive=None)
+        broadcaster.on_frequency(FrequencyEvent(14074000, 0))
+        state = self.receive()
+        self.assertEqual(state["frequency_vfo_a"], 14074000)
+        self.assertFalse(state["keepalive"])
+        self.assertFalse(state["transmit"])
+
+        broadcaster.on_mode(ModeEvent("usb", -1))
+        broadcaster.on_transmit(TransmitEvent(True))
+        states = self.receive_all(0.3)
+        self.assertEqual(states[-1]["mode_vfo_a"], "usb")
+        self.assertTrue(states[-1]["transmit"])
+        self.assertGreater(states[-1]["sequence"], state["sequence"])
+
+        # The same value again is no change
+        broadcaster.on_transmit(TransmitEvent(True))
+        self.assertEqual(self.receive_all(0.2), [])
+
+    def test_coalescing(self):
+        broadcaster = self.start(max_rate=5, keepalive=None)
+        broadcaster.on_frequency(FrequencyEvent(7000000, 1))
+        first = self.receive()
+        started = time.monotonic()
+        for i in range(1, 100):
+            broadcaster.on_frequency(FrequencyEvent(7000000 + i, 1))
+        # All the changes go out together, 0.2 s after the first datagram
+        state = self.receive()
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        self.assertEqual(first["frequency_vfo_b"], 7000000)
+        self.assertEqual(state["frequency_vfo_b"], 7000099)
+        self.assertEqual(state["sequence"], first["sequence"] + 1)
+        self.assertEqual(self.receive_all(0.3), [])
+        self.assertEqual(broadcaster.coalesced, 98)
+
+    def test_keepalive(self):
+        broadcaster = self.start(keepalive=0.05)
+        states = self.receive_all(0.3)
+        self.assertGreaterEqual(len(states), 3)
+        self.assertTrue(all(state["keepalive"] for state in states))
+        self.assertEqual(broadcaster.keepalives, broadcaster.sent)
+
+    def test_follows_radio(self):
+        rig = SimulatedRig(turnaround=0.002)
+        radio = Radio("sim", 38400, command_delay=0.01, serial_port=rig)
+        try:
+            broadcaster = self.start(keepalive=None)
+            radio.add_listener(broadcaster, asynchronous=False)
+            radio.sync(timeout=1.0)
+            states = self.receive_all(0.3)
+            self.assertEqual(states[-1]["frequency_vfo_a"], rig.frequency_vfo_a)
+            self.assertEqual(states[-1]["active_vfo"], rig.active_vfo)
+            self.assertEqual(states[-1]["txpower"], rig.txpower)
+        finally:
+            radio.disconnect()
+
+    def test_decode_rejects_foreign_datagrams(self):
+        with self.assertRaises(ValueError):
+            decode(b"hello")
+        with self.assertRaises(ValueError):
+            decode(b"XXXX" + bytes(32))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio import cli
+from radio.session import RadioSession
+from radio.simulator import SimulatedRig
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.rig = SimulatedRig(turnaround=0.001)
+        self.rig.mode = "2"  # USB
+        self.rig.txpower = 50
+        self.session = RadioSession("sim", 38400, serial_port=self.rig)
+        self.session.connect()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_tune(self):
+        result = cli.tune(self.session, "fm", 20, duration=0.2, interval=0.05)
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["mode"], "fm")
+        self.assertEqual(result["power"], 20)
+        self.assertGreater(result["swr"]["samples"], 1)
+        self.assertAlmostEqual(result["po"]["last"], 20, delta=1)
+        self.assertIn("total", result["timings"]["tune"])
+        self.assertFalse(self.rig.transmit)
+        self.assertEqual(self.rig.mode, "2")
+        self.assertEqual(self.rig.txpower, 50)
+
+    def test_tune_reports_the_set_power(self):
+        for power in (5, 10, 50, 100):
+            result = cli.tune(self.session, "fm", power, duration=0.1, interval=0.05)
+            self.assertAlmostEqual(result["po"]["last"], power, delta=1)
+
+    def test_serve(self):
+        requests = io.StringIO(
+            "\n".join(
+                [
+                    json.dumps({"command": "tune", "power": 10, "duration": 0.1}),
+                    "",
+                    json.dumps({"command": "reboot", "id": 7}),
+                    json.dumps({"command": "quit"}),
+                    json.dumps({"command": "tune"}),  # Not read after quit
+                ]
+            )
+        )
+        responses = io.StringIO()
+        cli.serve(self.session, requests, responses)
+
+        answers = [json.loads(line) for line in responses.getvalue().splitlines()]
+        self.assertEqual(len(answers), 2)
+        self.assertTrue(answers[0]["ok"])
+        self.assertEqual(answers[0]["power"], 10)
+        self.assertEqual(
+            answers[1], {"ok": False, "error": "Unsupported command: reboot", "id": 7}
+        )
+        self.assertFalse(self.rig.transmit)
+
+    def test_bad_broadcast_address_is_a_usage_error(self):
+        self.assertEqual(cli._udp_address("localhost:12060"), ("localhost", 12060))
+        self.assertEqual(cli._udp_address(":12060"), ("127.0.0.1", 12060))
+        for value in ("localhost", "localhost:port", "localhost:70000"):
+            with mock.patch("sys.stderr", io.StringIO()):
+                with self.assertRaises(SystemExit) as raised:
+                    # Rejected before the port is opened
+                    cli.main(["daemon", "--port", "COM99", "--broadcast", value])
+            self.assertEqual(raised.exception.code, 2)
+
+    def test_analyze_without_numpy(self):
+        output = io.StringIO()
+        # None in sys.modules makes the import fail as if NumPy was not installed
+        with mock.patch.dict(sys.modules, {"numpy": None, "radio.analysis": None}):
+            with mock.patch("sys.stdout", output):
+                self.assertEqual(cli.main(["analyze", "session.cat"]), 1)
+        answer = json.loads(output.getvalue())
+        self.assertFalse(answer["ok"])
+        self.assertIn("NumPy", answer["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import threading
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.commandqueue import CommandQueue
+from radio.exceptions import CommandQueueFullException
+
+
+class TestCommandQueue(unittest.TestCase):
+    def test_fifo_order(self):
+        queue = CommandQueue(maxsize=3)
+        queue.put("FA;")
+        queue.put("MD0;")
+        self.assertEqual(queue.get(timeout=0), "FA;")
+        self.assertEqual(queue.get(timeout=0), "MD0;")
+        self.assertIsNone(queue.get(timeout=0))
+
+    def test_reject_policy(self):
+        queue = CommandQueue(maxsize=1, policy=CommandQueue.REJECT)
+        queue.put("PC;")
+        with self.assertRaises(CommandQueueFullException):
+            queue.put("TX;")
+        self.assertEqual(queue.stats()["rejected"], 1)
+
+    def test_block_policy_times_out(self):
+        queue = CommandQueue(maxsize=1, policy=CommandQueue.BLOCK, put_timeout=0.05)
+        queue.put("PC;")
+        with self.assertRaises(CommandQueueFullException):
+            queue.put("TX;")
+
+    def test_block_policy_waits_for_room(self):
+        queue = CommandQueue(maxsize=1, policy=CommandQueue.BLOCK, put_timeout=2)
+        queue.put("PC;")
+        threading.Timer(0.05, queue.get).start()
+        self.assertTrue(queue.put("TX;"))
+        self.assertEqual(queue.get(timeout=0), "TX;")
+
+    def test_drop_oldest_evicts_telemetry(self):
+        queue = CommandQueue(maxsize=2, policy=CommandQueue.DROP_OLDEST)
+        queue.put("RM6;", telemetry=True)
+        queue.put("PC010;")
+        self.assertTrue(queue.put("TX1;"))
+        self.assertEqual(queue.get(timeout=0), "PC010;")
+        self.assertEqual(queue.get(timeout=0), "TX1;")
+        self.assertEqual(queue.stats()["dropped"], 1)
+
+    def test_drop_oldest_drops_new_telemetry(self):
+        queue = CommandQueue(maxsize=1, policy=CommandQueue.DROP_OLDEST)
+        queue.put("PC010;")
+        self.assertFalse(queue.put("RM6;", telemetry=True))
+        self.assertEqual(queue.qsize(), 1)
+
+    def test_high_water_mark(self):
+        queue = CommandQueue(maxsize=10)
+        for _ in range(4):
+            queue.put("RM5;", telemetry=True)
+        for _ in range(4):
+            queue.get(timeout=0)
+        queue.put("RM5;", telemetry=True)
+        self.assertEqual(queue.stats()["high_water_mark"], 4)
+
+    def test_join_timeout(self):
+        queue = CommandQueue(maxsize=10)
+        queue.put("TX0;")
+        self.assertFalse(queue.join(timeout=0.01))
+        queue.get(timeout=0)
+        queue.task_done()
+        self.assertTrue(queue.join(timeout=0.01))
+
+
+if __name__ == "__main__":
+    unittest.main()
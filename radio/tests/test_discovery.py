@@ -0,0 +1,87 @@
+import unittest
+import tempfile
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.discovery import discover, load_cached, save_cached
+from radio.simulator import SimulatedRig
+
+
+class MockPorts:
+    """
+    Opens a SimulatedRig for the port and baud rate the radio is on, a silent one
+    for the other existing ports, and fails for everything else.
+    """
+
+    def __init__(self, ports, radio_port, radio_baudrate):
+        self.ports = ports
+        self.radio_port = radio_port
+        self.radio_baudrate = radio_baudrate
+        self.opened = []
+
+    def __call__(self, port, baudrate, timeout):
+        if port not in self.ports:
+            raise OSError("No such port: " + port)
+        self.opened.append((port, baudrate))
+        if (port, baudrate) == (self.radio_port, self.radio_baudrate):
+            return SimulatedRig(baudrate=baudrate, turnaround=0.001, timeout=timeout)
+        return SimulatedRig(baudrate=baudrate, turnaround=60, timeout=timeout)
+
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.directory.name, "cache.json")
+        self.ports = MockPorts(["COM1", "COM3", "COM7"], "COM7", 19200)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_finds_port_and_baudrate(self):
+        result = discover(
+            self.ports.ports,
+            probe_timeout=0.05,
+            cache_path=self.cache,
+            opener=self.ports,
+        )
+        self.assertEqual(result.port, "COM7")
+        self.assertEqual(result.baudrate, 19200)
+        self.assertEqual(result.radio_id, "0761")
+        self.assertEqual(load_cached(self.cache), ("COM7", 19200))
+
+    def test_ports_are_probed_in_parallel(self):
+        result = discover(
+            self.ports.ports,
+            probe_timeout=0.05,
+            cache_path=None,
+            opener=self.ports,
+        )
+        # Sequentially COM7 would only be reached after 2 ports x 4 baud rates
+        self.assertLess(result.elapsed, 0.3)
+
+    def test_cached_pair_is_tried_first(self):
+        save_cached("COM7", 19200, self.cache)
+        result = discover(
+            self.ports.ports, probe_timeout=0.05, cache_path=self.cache, opener=self.ports
+        )
+        self.assertEqual(result.port, "COM7")
+        self.assertEqual(self.ports.opened, [("COM7", 19200)])
+
+    def test_nothing_found(self):
+        ports = MockPorts(["COM1"], "COM9", 38400)
+        result = discover(
+            ports.ports, deadline=0.5, probe_timeout=0.05, cache_path=None, opener=ports
+        )
+        self.assertIsNone(result)
+
+
+if __name__ == "__main__":
+    unittest.main()
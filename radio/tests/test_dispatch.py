@@ -0,0 +1,87 @@
+import unittest
+import threading
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.dispatch import AsyncListener
+from radio.listener import RadioListener
+from radio.radioparser import RadioParser
+from radio.events import SWRMeterEvent, TXPowerEvent
+
+
+class BlockedListener(RadioListener):
+    """
+    Listener that does not return until released.
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.events = []
+
+    def on_swr_meter(self, event: SWRMeterEvent):
+        self.release.wait(5)
+        self.events.append(event)
+
+    def on_tx_power(self, event: TXPowerEvent):
+        self.release.wait(5)
+        self.events.append(event)
+
+
+class TestAsyncListener(unittest.TestCase):
+    def setUp(self):
+        self.parser = RadioParser()
+        self.listener = BlockedListener()
+
+    def tearDown(self):
+        self.listener.release.set()
+
+    def attach(self, **options):
+        dispatcher = AsyncListener(self.listener, **options)
+        dispatcher.attach(self.parser)
+        return dispatcher
+
+    def test_events_are_delivered(self):
+        dispatcher = self.attach()
+        self.listener.release.set()
+        self.parser.parse(b"PC010;")
+        self.parser.parse(b"RM6030000;")
+        dispatcher.stop()
+        self.assertEqual([e.value for e in self.listener.events], [10, 30])
+        self.assertEqual(dispatcher.stats()["delivered"], 2)
+
+    def test_slow_listener_does_not_block_parser(self):
+        dispatcher = self.attach(maxsize=4)
+        for _ in range(100):
+            self.parser.parse(b"PC010;")
+        self.assertGreater(dispatcher.stats()["dropped"], 0)
+        self.assertLessEqual(dispatcher.stats()["queued"], 4)
+
+    def test_meters_are_conflated(self):
+        dispatcher = self.attach()
+        self.parser.parse(b"PC010;")  # Occupies the listener thread
+        for value in range(10, 20):
+            self.parser.parse(b"RM6%03d000;" % value)
+        self.listener.release.set()
+        dispatcher.stop()
+        swr = [e.value for e in self.listener.events if isinstance(e, SWRMeterEvent)]
+        self.assertEqual(swr[-1], 19)
+        self.assertLessEqual(len(swr), 2)
+        self.assertGreater(dispatcher.stats()["conflated"], 0)
+
+    def test_detach(self):
+        dispatcher = self.attach()
+        dispatcher.detach(self.parser)
+        self.assertFalse(self.parser.is_subscribed(SWRMeterEvent))
+        dispatcher.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
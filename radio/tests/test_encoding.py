@@ -0,0 +1,98 @@
+import unittest
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.encoding import CommandEncoder
+from radio.protocol import FTDX10, Command, Field, Protocol
+from radio.radioparser import RadioParser
+
+
+class TestCommandEncoder(unittest.TestCase):
+    def setUp(self):
+        self.parser = RadioParser()
+        self.encoder = CommandEncoder()
+
+    def assertSame(self, encoded: bytes, generated: str):
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(encoded, generated.encode())
+
+    def test_matches_parser_commands(self):
+        parser, encoder = self.parser, self.encoder
+        for vfo in (parser.VFO_A, parser.VFO_B):
+            self.assertSame(
+                encoder.GET_FREQUENCY[vfo], parser.generate_get_frequency(vfo)
+            )
+            self.assertSame(encoder.GET_INFO[vfo], parser.generate_get_info(vfo))
+            self.assertSame(
+                encoder.SET_ACTIVE_VFO[vfo], parser.generate_set_active_vfo(vfo)
+            )
+            self.assertSame(
+                encoder.set_frequency(vfo, 14074000),
+                parser.generate_set_frequency(vfo, 14074000),
+            )
+        for flag in (False, True):
+            self.assertSame(
+                encoder.SET_TRANSMIT[flag], parser.generate_set_transmit(flag)
+            )
+            self.assertSame(
+                encoder.SET_AUTO_INFORMATION[flag],
+                parser.generate_set_auto_information(flag),
+            )
+        self.assertSame(encoder.GET_MODE, parser.generate_get_mode())
+        self.assertSame(encoder.GET_TRANSMIT, parser.generate_get_transmit())
+        self.assertSame(encoder.GET_TXPOWER, parser.generate_get_txpower())
+        self.assertSame(encoder.GET_ACTIVE_VFO, parser.generate_get_active_vfo())
+        self.assertSame(encoder.GET_METER["swr"], parser.generate_get_swr_meter())
+        self.assertSame(encoder.GET_METER["s"], parser.generate_get_s_meter())
+        for mode in parser.mode_codes:
+            self.assertSame(encoder.set_mode(mode), parser.generate_set_mode(mode))
+        for po in (-5, 0, 5, 50, 100, 150):
+            self.assertSame(encoder.set_txpower(po), parser.generate_set_txpower(po))
+
+    def test_set_mode(self):
+        self.assertEqual(self.encoder.set_mode("FM"), b"MD04;")
+        with self.assertRaises(ValueError):
+            self.encoder.set_mode("wfm")
+
+    def test_meter_batches(self):
+        batch = self.encoder.get_meters(["swr", "po", "alc"])
+        self.assertEqual(batch, b"RM6;RM5;RM4;")
+        self.assertIs(self.encoder.get_meters(("swr", "po", "alc")), batch)
+        with self.assertRaises(ValueError):
+            self.encoder.get_meters(["swr", "dB"])
+
+    def test_sibling_model(self):
+        # The FTDX10 table with a 200 W PC command, the encoder follows it
+        commands = dict(FTDX10.commands)
+        commands["PC"] = Command(
+            "PC",
+            "PC;",
+            args=(Field("txpower", 2, 5),),
+            set_format="PC%03d;",
+            limits=(5, 200),
+        )
+        protocol = Protocol("200W", FTDX10.enums, commands.values())
+        encoder = CommandEncoder(protocol)
+        self.assertEqual(encoder.set_txpower(150), b"PC150;")
+        self.assertEqual(RadioParser(protocol).generate_set_txpower(150), "PC150;")
+        self.assertEqual(encoder.set_txpower(250), b"PC200;")
+        self.assertEqual(self.encoder.set_txpower(150), b"PC100;")
+        self.assertEqual(encoder.GET_METER, self.encoder.GET_METER)
+        self.assertEqual(encoder.SET_MODE, self.encoder.SET_MODE)
+
+    def test_count_queries_bytes(self):
+        self.assertEqual(self.parser.count_queries(b"VS;MD0;PC;MD04;PC010;TX1;RM6;"), 4)
+        self.assertEqual(self.parser.count_queries(b"VS;MD0;PC;MD04;PC010;TX1;RM6;"), 4)
+        self.assertTrue(self.parser.transmit_command(b"MD04;TX1;"))
+
+
+if __name__ == "__main__":
+    unittest.main()
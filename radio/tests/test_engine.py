@@ -0,0 +1,112 @@
+import unittest
+import threading
+import time
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.engine import SerialEngine, SharedRadioState
+
+
+class TestSharedRadioState(unittest.TestCase):
+    def setUp(self):
+        self.state = SharedRadioState.create()
+        self.view = SharedRadioState.attach(self.state.name)
+
+    def tearDown(self):
+        self.view.close()
+        self.state.close()
+        self.state.unlink()
+
+    def test_update_and_read(self):
+        self.state.update(frequency_vfo_a=14074000, mode_vfo_a="usb", transmit=1)
+        self.state.update_meter("swr", 30)
+        self.state.update_meter("swr", 31)
+        state = self.view.read()
+        self.assertEqual(state["frequency_vfo_a"], 14074000)
+        self.assertEqual(state["mode_vfo_a"], "usb")
+        self.assertIsNone(state["mode_vfo_b"])
+        self.assertEqual(state["transmit"], 1)
+        self.assertEqual(state["meters"]["swr"], 31)
+        self.assertEqual(state["meter_counts"]["swr"], 2)
+        self.assertEqual(state["meters"]["po"], -1)
+        self.assertEqual(state["sequence"] % 2, 0)
+
+    def test_reader_never_sees_a_torn_write(self):
+        stop = threading.Event()
+
+        def write():
+            value = 0
+            while not stop.is_set():
+                value += 1
+                self.state.update(frequency_vfo_a=value, frequency_vfo_b=value)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            for _ in range(2000):
+                state = self.view.read()
+                self.assertEqual(state["frequency_vfo_a"], state["frequency_vfo_b"])
+        finally:
+            stop.set()
+            writer.join()
+
+
+class TestSerialEngine(unittest.TestCase):
+    def test_tune_in_engine_process(self):
+        engine = SerialEngine("sim", 38400, simulate=True, poll_interval=0.02)
+        try:
+            state = engine.read_state()
+            self.assertEqual(state["status"], SharedRadioState.RUNNING)
+            self.assertEqual(state["mode_vfo_a"], "usb")
+
+            result = engine.start_tune("fm", 10)
+            self.assertTrue(result.transmit)
+            deadline = time.monotonic() + 2
+            while engine.read_state()["meter_counts"]["swr"] == 0:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            self.assertEqual(engine.read_state()["transmit"], 1)
+
+            engine.stop_tune()
+            self.assertEqual(engine.read_state()["transmit"], 0)
+            with self.assertRaises(AttributeError):
+                engine.call("no_such_method")
+        finally:
+            engine.close()
+        self.assertEqual(engine.process.exitcode, 0)
+
+    def test_watchdog_in_engine_process(self):
+        engine = SerialEngine(
+            "sim", 38400, simulate=True, max_key_down=30, heartbeat_timeout=0.3
+        )
+        try:
+            engine.start_tune("fm", 10)
+            # Fed by the heartbeats, the radio stays keyed
+            for _ in range(20):
+                engine.heartbeat()
+                time.sleep(0.05)
+            state = engine.read_state()
+            self.assertEqual(state["watchdog_trips"], 0)
+            self.assertEqual(state["transmit"], 1)
+
+            # Without them it is unkeyed
+            deadline = time.monotonic() + 3
+            while engine.read_state()["transmit"] != 0:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            self.assertEqual(engine.read_state()["watchdog_trips"], 1)
+            self.assertFalse(engine.call("get_transmit", True))
+        finally:
+            engine.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.events import TXPowerEvent
+from radio.framer import Framer
+from radio.radioparser import RadioParser
+
+
+class TestFramer(unittest.TestCase):
+    def setUp(self):
+        self.framer = Framer(RadioParser().parsers, max_frame=32)
+
+    def test_frames_split_across_reads(self):
+        self.assertEqual(self.framer.feed(b"PC05"), [])
+        self.assertEqual(self.framer.feed(b"0;TX1;RM6"), ["PC050;", "TX1;"])
+        self.assertEqual(self.framer.feed(b"030000;"), ["RM6030000;"])
+        self.assertEqual(self.framer.stats()["frames"], 3)
+
+    def test_error_reply(self):
+        self.assertEqual(self.framer.feed(b"?;"), ["?;"])
+
+    def test_noise_before_frame_is_dropped(self):
+        self.assertEqual(self.framer.feed(b"\xff\x00PC050;TX0;"), ["PC050;", "TX0;"])
+        self.assertEqual(self.framer.recovered, 1)
+        self.assertEqual(self.framer.dropped_bytes, 2)
+
+    def test_garbage_frame_is_dropped(self):
+        self.assertEqual(self.framer.feed(b"P\xfeC0;TX1;"), ["TX1;"])
+        self.assertEqual(self.framer.dropped_frames, 1)
+        self.assertEqual(self.framer.dropped_bytes, 5)
+
+    def test_buffer_is_capped(self):
+        self.framer.feed(b"\x55" * 1000)
+        self.assertLess(len(self.framer.buffer), 32)
+        self.assertEqual(self.framer.feed(b"PC050;"), ["PC050;"])
+
+    def test_partial_frame_survives_overflow(self):
+        self.framer.feed(b"x" * 40 + b"RM60")
+        self.assertEqual(self.framer.feed(b"30000;"), ["RM6030000;"])
+
+
+class TestParserGuards(unittest.TestCase):
+    def setUp(self):
+        self.parser = RadioParser()
+        self.events = []
+        self.parser.subscribe(TXPowerEvent, self.events.append)
+
+    def test_non_ascii_byte_does_not_raise(self):
+        self.assertEqual(self.parser.parse(b"PC\xff50;PC050;"), 6)
+        self.assertEqual(self.parser.malformed, 1)
+        self.parser.parse(b"PC050;")
+        self.assertEqual(self.events[-1].value, 50)
+
+    def test_truncated_frame_is_counted(self):
+        self.parser.parse_frame("PC;")
+        self.assertEqual(self.parser.malformed, 1)
+        self.assertEqual(self.events, [])
+
+    def test_failing_listener_does_not_stop_parsing(self):
+        def fail(event):
+            raise RuntimeError("listener bug")
+
+        self.parser.subscribe(TXPowerEvent, fail)
+        self.parser.parse_frame("PC010;")
+        self.assertEqual(self.events[-1].value, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
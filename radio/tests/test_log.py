@@ -0,0 +1,63 @@
+import unittest
+import logging
+import queue
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.log import DeferredQueueHandler, RateLimitFilter
+
+
+def make_record(msg, *args):
+    return logging.LogRecord("radio", logging.WARNING, __file__, 1, msg, args, None)
+
+
+class TestRateLimitFilter(unittest.TestCase):
+    def test_repeats_are_suppressed(self):
+        rate_limit = RateLimitFilter(interval=60)
+        self.assertTrue(rate_limit.filter(make_record("Unsupported: %s", "XY1;")))
+        self.assertFalse(rate_limit.filter(make_record("Unsupported: %s", "XY1;")))
+        self.assertFalse(rate_limit.filter(make_record("Unsupported: %s", "XY1;")))
+        self.assertEqual(rate_limit.suppressed, 2)
+
+    def test_different_arguments_pass(self):
+        rate_limit = RateLimitFilter(interval=60)
+        self.assertTrue(rate_limit.filter(make_record("Unsupported: %s", "XY1;")))
+        self.assertTrue(rate_limit.filter(make_record("Unsupported: %s", "XY2;")))
+
+    def test_suppressed_count_is_reported(self):
+        rate_limit = RateLimitFilter(interval=0)
+        rate_limit.filter(make_record("Unsupported: %s", "XY1;"))
+        rate_limit.interval = 60
+        rate_limit.filter(make_record("Unsupported: %s", "XY1;"))
+        rate_limit.interval = 0
+        record = make_record("Unsupported: %s", "XY1;")
+        self.assertTrue(rate_limit.filter(record))
+        self.assertEqual(record.getMessage(), "Unsupported: XY1; (suppressed 1 times)")
+
+
+class TestDeferredQueueHandler(unittest.TestCase):
+    def test_record_is_queued_unformatted(self):
+        handler = DeferredQueueHandler(queue.Queue())
+        record = make_record("Received: %r", b"TX1;")
+        handler.handle(record)
+        queued = handler.queue.get_nowait()
+        self.assertIs(queued, record)
+        self.assertEqual(queued.args, (b"TX1;",))
+
+    def test_full_queue_drops(self):
+        handler = DeferredQueueHandler(queue.Queue(1))
+        handler.handle(make_record("first"))
+        handler.handle(make_record("second"))
+        self.assertEqual(handler.dropped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
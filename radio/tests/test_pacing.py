@@ -0,0 +1,140 @@
+import threading
+import time
+import unittest
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.commandqueue import CommandQueue
+from radio.pacing import AdaptivePacer
+from radio.radio import Radio
+from radio.radioparser import RadioParser
+from radio.simulator import SimulatedRig
+
+
+class TestAdaptivePacer(unittest.TestCase):
+    def setUp(self):
+        self.pacer = AdaptivePacer(initial_delay=0.1, max_delay=0.2)
+
+    def test_on_time_replies_shrink_delay(self):
+        now = 0.0
+        for _ in range(10):
+            self.pacer.sent(1, now)
+            self.pacer.received(now + 0.01)
+            now += 0.1
+        self.assertLess(self.pacer.next_delay(now), 0.01)
+        self.assertAlmostEqual(self.pacer.turnaround, 0.01)
+        self.assertEqual(self.pacer.samples, 10)
+
+    def test_late_reply_backs_off(self):
+        for i in range(5):
+            self.pacer.sent(1, i)
+            self.pacer.received(i + 0.01)
+        delay = self.pacer.delay
+        self.pacer.sent(1, 10)
+        self.pacer.received(10.5)
+        self.assertEqual(self.pacer.late, 1)
+        self.assertEqual(self.pacer.delay, max(0.01, delay * 2))
+
+    def test_missing_reply_backs_off(self):
+        self.pacer.sent(1, 0)
+        self.assertEqual(self.pacer.next_delay(0.01), 0.1)
+        self.assertEqual(self.pacer.next_delay(10), 0.2)
+        self.assertEqual(self.pacer.missing, 1)
+        self.assertEqual(self.pacer.stats()["pending"], 0)
+
+    def test_batch_is_sampled_once(self):
+        self.pacer.sent(3, 0)
+        for t in (0.01, 0.02, 0.03):
+            self.pacer.received(t)
+        self.assertEqual(self.pacer.samples, 1)
+        self.assertEqual(self.pacer.stats()["pending"], 0)
+
+    def test_queueing_is_late(self):
+        # Written every ms, answered every 10 ms: the replies queue up on the wire
+        for i in range(50):
+            self.pacer.sent(1, i * 0.001)
+        for i in range(50):
+            self.pacer.received((i + 1) * 0.01)
+        stats = self.pacer.stats()
+        self.assertAlmostEqual(stats["min_turnaround"], 0.01)
+        self.assertEqual(stats["late"], 45)  # All slower than 0.05 s
+        self.assertAlmostEqual(stats["max_rate"], 100.0)
+        self.assertEqual(self.pacer.delay, 0.2)
+
+    def test_window_throttles(self):
+        pacer = AdaptivePacer(window=2)
+        pacer.sent(5)
+
+        def answer():
+            for _ in range(3):
+                pacer.received()
+
+        timer = threading.Timer(0.05, answer)
+        timer.start()
+        started = time.perf_counter()
+        try:
+            pacer.next_delay()
+        finally:
+            timer.join()
+        self.assertGreaterEqual(time.perf_counter() - started, 0.04)
+        self.assertEqual(pacer.throttled, 1)
+        self.assertEqual(pacer.stats()["pending"], 2)
+        self.assertEqual(pacer.next_delay(), 0.0)  # Within the window
+
+    def test_count_queries(self):
+        parser = RadioParser()
+        self.assertEqual(parser.count_queries("VS;MD0;PC;MD04;PC010;TX1;RM6;"), 4)
+        self.assertEqual(parser.count_queries("FA014074000;"), 0)
+
+
+class TestRadioPacing(unittest.TestCase):
+    def test_delay_adapts_to_rig(self):
+        rig = SimulatedRig(turnaround=0.002)
+        radio = Radio("sim", 38400, command_delay=0.1, serial_port=rig)
+        try:
+            for _ in range(10):
+                radio.sync()
+            stats = radio.get_pacing_stats()
+            self.assertLess(stats["delay"], 0.01)
+            self.assertLess(stats["turnaround"], 0.05)
+            self.assertEqual(stats["missing"], 0)
+        finally:
+            radio.disconnect()
+
+    def test_saturated_link(self):
+        # Meter polls as fast as the caller can queue them, at 9600 baud
+        rig = SimulatedRig(turnaround=0.002, baudrate=9600)
+        radio = Radio(
+            "sim",
+            9600,
+            command_delay=0.01,
+            queue_size=8,
+            overflow_policy=CommandQueue.DROP_OLDEST,
+            serial_port=rig,
+        )
+        try:
+            end = time.monotonic() + 1.0
+            while time.monotonic() < end:
+                radio.poll_meters(("swr", "po", "alc"))
+                time.sleep(0.001)
+            stats = radio.get_pacing_stats()
+            # Bounded by the window and one more batch
+            self.assertLessEqual(stats["pending"], radio.pacer.window + 3)
+            self.assertGreater(stats["late"], 0)
+            # RM replies are 10 bytes, the link carries 96 of them per second
+            self.assertGreater(stats["max_rate"], 60)
+            self.assertLess(stats["max_rate"], 120)
+        finally:
+            radio.disconnect()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.encoding import CommandEncoder
+from radio.events import ModeEvent, TransceiverInfoEvent, TXPowerEvent
+from radio.protocol import FTDX10, Command, Enum, Field, Protocol, ENUM
+from radio.radioparser import RadioParser
+
+
+class TestProtocol(unittest.TestCase):
+    def setUp(self):
+        self.parser = RadioParser()
+        self.events = []
+
+    def record(self, event_type: type):
+        self.parser.subscribe(event_type, self.events.append)
+
+    def test_all_modes(self):
+        self.record(ModeEvent)
+        modes = FTDX10.enums["mode"]
+        for code, name in modes.pairs:
+            self.parser.parse(b"MD0" + code.encode() + b";")
+            self.assertEqual(self.events[-1].mode, name)
+            self.assertEqual(
+                CommandEncoder().set_mode(name), b"MD0" + code.encode() + b";"
+            )
+            self.assertEqual(self.parser.generate_set_mode(name), "MD0%s;" % code)
+        self.assertEqual(len(self.events), 15)
+        self.assertEqual(self.events[9].mode, "pktfm")
+
+        self.parser.parse(b"MD00;")
+        self.assertEqual(self.events[-1].mode, "none")
+
+    def test_info_hex_mode(self):
+        self.record(TransceiverInfoEvent)
+        self.parser.parse(b"OI001014074000+015010C00000;")
+        event = self.events[-1]
+        self.assertEqual(event.vfo, self.parser.VFO_B)
+        self.assertEqual(event.frequency, 14074000)
+        self.assertEqual(event.mode, "pktusb")
+        self.assertEqual(event.clarifier, 150)
+        self.assertTrue(event.rx_clarifier)
+        self.assertFalse(event.tx_clarifier)
+
+    def test_enum(self):
+        enum = Enum((("0", "off"), ("1", "on")))
+        self.assertEqual(enum.name("1"), "on")
+        self.assertEqual(enum.code("off"), "0")
+        self.assertIsNone(enum.name("2"))
+        with self.assertRaises(KeyError):
+            enum.code("auto")
+
+    def test_set_command(self):
+        self.assertEqual(FTDX10.set_command("MD", "usb"), "MD02;")
+        self.assertEqual(FTDX10.set_command("VS", self.parser.VFO_B), "VS1;")
+        self.assertEqual(FTDX10.set_command("FA", 7074000), "FA007074000;")
+        self.assertEqual(FTDX10.set_command("TX", True), "TX1;")
+        with self.assertRaises(ValueError):
+            FTDX10.set_command("MD", "wfm")
+        with self.assertRaises(ValueError):
+            FTDX10.set_command("ID", 1)
+        self.assertEqual(FTDX10.commands["RM"].select_query("6"), "RM6;")
+
+    def test_custom_protocol(self):
+        # A sibling model that reports the power in "PC" and a new "NB" command
+        protocol = Protocol(
+            "test",
+            enums={"onoff": Enum((("0", False), ("1", True)))},
+            commands=(
+                Command("PC", "PC;", TXPowerEvent, (Field("txpower", 2, 5),)),
+                Command(
+                    "NB",
+                    "NB0;",
+                    ModeEvent,
+                    (Field("on", 3, kind=ENUM, enum="onoff"), Field("vfo", 2)),
+                ),
+            ),
+        )
+        parser = RadioParser(protocol)
+        self.assertEqual(set(parser.parsers), {"PC", "NB"})
+        self.assertEqual(parser.count_queries("NB0;PC;NB01;FA;"), 2)
+
+        parser.subscribe(ModeEvent, self.events.append)
+        parser.parse(b"NB01;")
+        parser.parse(b"NB02;")  # Unknown code, not decoded
+        self.assertEqual(len(self.events), 1)
+        self.assertIs(self.events[0].mode, True)
+        self.assertEqual(self.events[0].vfo, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,6 +24,8 @@ from radio.events import (
     COMPMeterEvent,
     ALCMeterEvent,
     NotSupportedEvent,
+    TXPowerEvent,
+    TransceiverInfoEvent,
 )
 
 
@@ -64,6 +66,9 @@ class MockListener(RadioListener):
     def on_not_supported(self, event: NotSupportedEvent):
         self.event = event
 
+    def on_transceiver_info(self, event: TransceiverInfoEvent):
+        self.event = event
+
 
 class TestRadioParser(unittest.TestCase):
     def setUp(self):
@@ -74,13 +79,13 @@ class TestRadioParser(unittest.TestCase):
     def test_parse_frequency_vfo_a(self):
         self.radio.parse(b"FA144100000;")
         self.assertIsInstance(self.listener.event, FrequencyEvent)
-        self.assertEqual(self.listener.event.frequency, "144100000")
+        self.assertEqual(self.listener.event.frequency, 144100000)
         self.assertEqual(self.listener.event.vfo, RadioParser.VFO_A)
 
     def test_parse_frequency_vfo_b(self):
         self.radio.parse(b"FB144100000;")
         self.assertIsInstance(self.listener.event, FrequencyEvent)
-        self.assertEqual(self.listener.event.frequency, "144100000")
+        self.assertEqual(self.listener.event.frequency, 144100000)
         self.assertEqual(self.listener.event.vfo, RadioParser.VFO_B)
 
     def test_parse_mode(self):
@@ -88,6 +93,29 @@ class TestRadioParser(unittest.TestCase):
         self.assertIsInstance(self.listener.event, ModeEvent)
         self.assertEqual(self.listener.event.mode, "lsb")
 
+    def test_parse_info_vfo_a(self):
+        self.radio.parse(b"IF001014070000-015010200001;")
+        self.assertIsInstance(self.listener.event, TransceiverInfoEvent)
+        self.assertEqual(self.listener.event.vfo, RadioParser.VFO_A)
+        self.assertEqual(self.listener.event.frequency, 14070000)
+        self.assertEqual(self.listener.event.clarifier, -150)
+        self.assertTrue(self.listener.event.rx_clarifier)
+        self.assertFalse(self.listener.event.tx_clarifier)
+        self.assertEqual(self.listener.event.mode, "usb")
+        self.assertEqual(self.listener.event.memory_mode, TransceiverInfoEvent.VFO)
+        self.assertEqual(self.listener.event.shift, TransceiverInfoEvent.SHIFT_PLUS)
+
+    def test_parse_info_vfo_b(self):
+        self.radio.parse(b"OI117145500000+000000411002;")
+        self.assertIsInstance(self.listener.event, TransceiverInfoEvent)
+        self.assertEqual(self.listener.event.vfo, RadioParser.VFO_B)
+        self.assertEqual(self.listener.event.frequency, 145500000)
+        self.assertEqual(self.listener.event.mode, "fm")
+        self.assertEqual(self.listener.event.memory_channel, 117)
+        self.assertEqual(self.listener.event.memory_mode, TransceiverInfoEvent.MEMORY)
+        self.assertEqual(self.listener.event.ctcss, 1)
+        self.assertEqual(self.listener.event.shift, TransceiverInfoEvent.SHIFT_MINUS)
+
     def test_parse_txpower(self):
         self.radio.parse(b"PC056;")
         self.assertIsInstance(self.listener.event, ModeEvent)
@@ -199,5 +227,52 @@ class TestRadioParser(unittest.TestCase):
         self.assertEqual(command, "RM4;")
 
 
+class TestRadioParserSubscriptions(unittest.TestCase):
+    def setUp(self):
+        self.radio = RadioParser()
+        self.events = []
+
+    def test_subscribe_event_type(self):
+        self.radio.subscribe(TXPowerEvent, self.events.append)
+        self.radio.parse(b"PC056;")
+        self.radio.parse(b"RM6030000;")
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0].value, 56)
+
+    def test_subscribe_meter(self):
+        self.radio.subscribe_meter(6, self.events.append)
+        self.radio.parse(b"RM5017000;")
+        self.radio.parse(b"RM6030000;")
+        self.assertEqual(len(self.events), 1)
+        self.assertIsInstance(self.events[0], SWRMeterEvent)
+        self.assertEqual(self.events[0].value, 30)
+
+    def test_unsubscribe(self):
+        self.radio.subscribe(TXPowerEvent, self.events.append)
+        self.radio.unsubscribe(TXPowerEvent, self.events.append)
+        self.radio.parse(b"PC056;")
+        self.assertEqual(self.events, [])
+        self.assertFalse(self.radio.is_subscribed(TXPowerEvent))
+
+    def test_unsubscribed_frames_are_not_decoded(self):
+        # Would raise ValueError if the parser tried to decode it
+        self.assertEqual(self.radio.parse(b"PCxyz;"), 6)
+
+    def test_listener_gets_only_overridden_events(self):
+        class SWRListener(RadioListener):
+            def on_swr_meter(self, event):
+                pass
+
+        self.radio.add_listener(SWRListener())
+        self.assertTrue(self.radio.is_subscribed(SWRMeterEvent))
+        self.assertFalse(self.radio.is_subscribed(SMeterEvent))
+
+    def test_remove_listener(self):
+        listener = MockListener()
+        self.radio.add_listener(listener)
+        self.radio.remove_all_listener(listener)
+        self.assertEqual(self.radio.dispatch, {})
+
+
 if __name__ == "__main__":
     unittest.main()
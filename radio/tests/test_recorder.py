@@ -0,0 +1,73 @@
+import unittest
+import shutil
+import tempfile
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.events import SWRMeterEvent
+from radio.recorder import MeterFile, MeterRecorder, list_files, read_range
+
+
+class TestMeterRecorder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_records_are_readable_while_recording(self):
+        recorder = MeterRecorder(self.directory, capacity=100)
+        recorder.on_swr_meter(SWRMeterEvent(30))
+        recorder.record("po", 85, timestamp=1000.0)
+        meter_file = MeterFile(recorder.path)
+        self.assertEqual(len(meter_file), 2)
+        recorder.record("po", 86, timestamp=1001.0)
+        self.assertEqual(len(meter_file), 3)
+        self.assertEqual(meter_file.slice(meters=["swr"])[0][1:], ("swr", 30))
+        meter_file.close()
+        recorder.close()
+
+    def test_slice_time_range(self):
+        recorder = MeterRecorder(self.directory, capacity=1000)
+        for i in range(1000):
+            recorder.record("swr" if i % 2 else "po", i % 256, timestamp=float(i))
+        recorder.close()
+
+        meter_file = MeterFile(list_files(self.directory)[0])
+        records = meter_file.slice(100.0, 110.0)
+        self.assertEqual([t for t, _, _ in records], [float(i) for i in range(100, 110)])
+        records = meter_file.slice(100.0, 110.0, meters=["swr"])
+        self.assertEqual([value for _, _, value in records], [101, 103, 105, 107, 109])
+        self.assertEqual(len(meter_file.slice(end=10.0)), 10)
+        self.assertEqual(meter_file.slice(2000.0), [])
+        meter_file.close()
+
+    def test_rollover(self):
+        recorder = MeterRecorder(self.directory, capacity=10, max_files=3)
+        for i in range(45):
+            recorder.record("vdd", 190, timestamp=float(i))
+        recorder.close()
+
+        files = list_files(self.directory)
+        self.assertEqual(len(files), 3)
+        self.assertTrue(files[-1].endswith("meters-000005.bin"))
+        records = read_range(self.directory, 18.0, 33.0)
+        self.assertEqual([t for t, _, _ in records], [float(i) for i in range(20, 33)])
+
+    def test_new_recorder_continues_numbering(self):
+        MeterRecorder(self.directory, capacity=10).close()
+        recorder = MeterRecorder(self.directory, capacity=10)
+        self.assertTrue(recorder.path.endswith("meters-000002.bin"))
+        recorder.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import threading
+import time
+import unittest
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.commandqueue import CommandQueue
+from radio.exceptions import RadioException
+from radio.radio import Radio
+from radio.session import RadioSession
+from radio.simulator import SimulatedRig
+
+
+class TestRadioSession(unittest.TestCase):
+    def setUp(self):
+        self.rig = SimulatedRig(turnaround=0.001)
+        self.rig.mode = "2"  # USB
+        self.rig.txpower = 50
+        self.session = RadioSession("sim", 38400, serial_port=self.rig)
+        self.session.connect()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_connect_reads_state(self):
+        self.assertEqual(self.session.current_mode(), "usb")
+        self.assertEqual(self.session.radio.txpower, 50)
+
+    def test_start_and_stop_tune(self):
+        result = self.session.start_tune("FM", 10)
+        self.assertGreater(result.total, 0)
+        self.assertTrue(self.rig.transmit)
+        self.assertEqual(self.rig.mode, "4")
+        self.assertEqual(self.rig.txpower, 10)
+
+        self.session.stop_tune()
+        self.assertFalse(self.rig.transmit)
+        self.assertEqual(self.rig.mode, "2")
+        self.assertEqual(self.rig.txpower, 50)
+
+    def test_tune_reuses_port(self):
+        radio = self.session.radio
+        for _ in range(3):
+            self.session.start_tune("FM", 10)
+            self.session.stop_tune()
+        self.assertIs(self.session.radio, radio)
+        self.assertEqual(self.session.latency_stats()["count"], 3)
+
+    def test_close_unkeys(self):
+        self.session.start_tune("FM", 10)
+        self.session.close()
+        self.assertFalse(self.rig.transmit)
+
+
+class TestRadioTune(unittest.TestCase):
+    def setUp(self):
+        self.rig = SimulatedRig(turnaround=0.001)
+        self.rig.mode = "1"  # LSB
+        self.rig.txpower = 40
+        self.radio = Radio("sim", 38400, command_delay=0, serial_port=self.rig)
+
+    def tearDown(self):
+        self.radio.disconnect()
+
+    def test_tune_saves_state_and_confirms(self):
+        result = self.radio.tune("FM", 10)
+        self.assertTrue(self.rig.transmit)
+        self.assertEqual(self.radio.saved_mode, "lsb")
+        self.assertEqual(self.radio.saved_txpower, 40)
+        for step in ("send", "save", "mode", "txpower", "transmit"):
+            self.assertIn(step, result.steps)
+        self.assertGreaterEqual(result.total, result.steps["transmit"])
+
+    def test_untune_restores_state(self):
+        self.radio.tune("FM", 10)
+        result = self.radio.untune()
+        self.assertFalse(result.transmit)
+        self.assertFalse(self.rig.transmit)
+        self.assertEqual(self.rig.mode, "1")
+        self.assertEqual(self.rig.txpower, 40)
+
+    def test_untune_unkeys_when_restore_fails(self):
+        self.radio.tune("FM", 10)
+        self.radio.saved_mode = "none"  # Reported for a mode code the radio lacks
+        with self.assertRaises(ValueError):
+            self.radio.untune()
+        self.radio.command_queue.join(1)
+        self.assertFalse(self.rig.transmit)
+
+    def test_tune_power_is_clamped(self):
+        result = self.radio.tune("FM", 500)
+        self.assertEqual(result.txpower, 100)
+
+    def test_tune_timeout_unkeys(self):
+        self.rig.turnaround = 0.5
+        with self.assertRaises(TimeoutError):
+            self.radio.tune("FM", 10, timeout=0.05)
+        self.radio.command_queue.join(1)
+        self.assertFalse(self.rig.transmit)
+
+    def test_tune_unkeys_past_a_full_queue(self):
+        rig = SimulatedRig(turnaround=0.5)
+        radio = Radio(
+            "sim",
+            38400,
+            command_delay=0.3,  # The writer sleeps after the tune batch
+            queue_size=1,
+            overflow_policy=CommandQueue.REJECT,
+            serial_port=rig,
+            adaptive_pacing=False,
+        )
+        # A meter poll fills the queue while tune() waits for its replies
+        poll = threading.Timer(0.02, radio.get_swr_meter)
+        try:
+            poll.start()
+            with self.assertRaises(TimeoutError):
+                radio.tune("FM", 10, timeout=0.05)
+            self.assertFalse(rig.transmit)
+        finally:
+            poll.join()
+            radio.disconnect()
+
+    def test_sync_reads_state_in_one_write(self):
+        self.rig.frequency_vfo_a = 7074000
+        received = self.rig.commands_received
+        state = self.radio.sync(meters=("swr", "vdd"))
+        self.assertEqual(self.rig.commands_received - received, 7)
+        self.assertEqual(state.active_vfo, 0)
+        self.assertEqual(state.frequency, 7074000)
+        self.assertEqual(state.mode, "lsb")
+        self.assertEqual(state.txpower, 40)
+        self.assertFalse(state.transmit)
+        self.assertEqual(state.meters, {"swr": 0, "vdd": 190})
+        self.assertEqual(self.radio.frequency_vfo_a, 7074000)
+
+    def test_poll_tune_meters_rotates_secondary_meters(self):
+        counts = {"swr": 4, "po": 4, "alc": 1, "comp": 1, "idd": 1, "vdd": 1}
+        expected = self.radio._expect_replies(counts)
+        for count in range(4):
+            self.radio.poll_tune_meters(count)
+        replies = self.radio._await_replies(expected, time.perf_counter() + 1)
+        self.assertEqual({key: len(values) for key, values in replies.items()}, counts)
+
+    def test_await_replies_picks_the_expected_ones(self):
+        expected = self.radio._expect_replies({"swr": 2})
+        for value in range(10):
+            self.radio._record_reply("swr", value)
+        replies = self.radio._await_replies(expected, time.perf_counter() + 1)
+        self.assertEqual([value for value, _ in replies["swr"]], [0, 1])
+
+        expected = self.radio._expect_replies({"swr": 1})
+        for value in range(20):  # More than the log keeps
+            self.radio._record_reply("swr", value)
+        with self.assertRaises(RadioException):
+            self.radio._await_replies(expected, time.perf_counter() + 1)
+
+    def test_sync_timeout(self):
+        self.rig.turnaround = 0.5
+        with self.assertRaises(TimeoutError):
+            self.radio.sync(timeout=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import json
+import os
+import tempfile
+
+import sys
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.radio import Radio
+from radio.simulator import SimulatedRig
+from radio.tracing import Tracer
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.radio = Radio(
+            "sim", 38400, command_delay=0.01, serial_port=SimulatedRig(turnaround=0.002)
+        )
+
+    def tearDown(self):
+        self.radio.disconnect()
+
+    def test_blocking_getter_stages(self):
+        tracer = Tracer()
+        self.radio.set_tracer(tracer)
+        self.assertEqual(self.radio.get_txpower(blocking=True), 100)
+        self.radio.set_tracer(None)
+
+        names = [event[1] for event in tracer.events]
+        for name in (
+            "enqueue",
+            "queued",
+            "write",
+            "frame",
+            "parse PC",
+            "Radio.on_tx_power",
+            "wait txpower",
+        ):
+            self.assertIn(name, names)
+        # The queue wait is opened by the caller and closed by the writer thread
+        phases = [event[0] for event in tracer.events if event[1] == "queued"]
+        self.assertEqual(phases, ["b", "e"])
+
+    def test_export_chrome_trace(self):
+        tracer = Tracer()
+        self.radio.set_tracer(tracer)
+        self.radio.sync()
+        self.radio.set_tracer(None)
+
+        path = os.path.join(tempfile.mkdtemp(), "trace.json")
+        tracer.export(path)
+        with open(path) as f:
+            trace = json.load(f)
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+        events = trace["traceEvents"]
+        threads = {e["args"]["name"] for e in events if e["ph"] == "M"}
+        self.assertTrue(any("_read_from_radio" in name for name in threads))
+        spans = [e for e in events if e["ph"] == "X"]
+        self.assertTrue(all(e["dur"] >= 0 for e in spans))
+        self.assertIn("parse IF", {e["name"] for e in spans})
+
+    def test_disabled_records_nothing(self):
+        tracer = Tracer()
+        self.radio.set_tracer(tracer)
+        self.radio.set_tracer(None)
+        self.radio.get_txpower(blocking=True)
+        self.assertEqual(len(tracer.events), 0)
+
+    def test_buffer_is_bounded(self):
+        tracer = Tracer(max_events=10)
+        for i in range(100):
+            tracer.instant("tick", i=i)
+        self.assertEqual(len(tracer.events), 10)
+        self.assertEqual(tracer.to_chrome()["traceEvents"][-1]["args"], {"i": 99})
+
+
+if __name__ == "__main__":
+    unittest.main()
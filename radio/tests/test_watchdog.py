@@ -0,0 +1,103 @@
+import unittest
+import threading
+import time
+
+import sys
+import os
+
+# Get the directory of the current script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Get the parent directory of the script directory
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+
+sys.path.append(os.path.dirname(PARENT_DIR))
+
+from radio.radio import Radio
+from radio.radioparser import RadioParser
+from radio.simulator import SimulatedRig
+from radio.watchdog import TXWatchdog
+
+
+class TestTXWatchdog(unittest.TestCase):
+    def setUp(self):
+        self.rig = SimulatedRig(turnaround=0.002)
+        self.radio = Radio("sim", 38400, command_delay=0.01, serial_port=self.rig)
+
+    def tearDown(self):
+        self.radio.disconnect()
+
+    def wait_unkeyed(self, timeout: float = 2.0):
+        deadline = time.monotonic() + timeout
+        # The key-up is written by the writer thread, it may not have happened yet
+        while self.rig.keyed_at is None and time.monotonic() < deadline:
+            time.sleep(0.005)
+        while self.rig.transmit and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def test_max_key_down(self):
+        trips = []
+        watchdog = TXWatchdog(self.radio, max_key_down=0.2, on_trip=trips.append)
+        self.radio.set_transmit(True)
+        time.sleep(0.1)
+        self.assertTrue(self.rig.transmit)
+        self.wait_unkeyed()
+        self.assertFalse(self.rig.transmit)
+        self.assertGreaterEqual(self.rig.unkeyed_at - self.rig.keyed_at, 0.2)
+        self.assertLess(self.rig.unkeyed_at - self.rig.keyed_at, 0.3)
+        self.assertEqual(trips, [TXWatchdog.MAX_KEY_DOWN])
+        self.assertLess(watchdog.worst_unkey_latency, 0.05)
+
+    def test_heartbeat(self):
+        watchdog = TXWatchdog(self.radio, max_key_down=10, heartbeat_timeout=0.1)
+        self.radio.set_transmit(True)
+        for _ in range(20):
+            watchdog.heartbeat()
+            time.sleep(0.02)
+        self.assertTrue(self.rig.transmit)
+        self.wait_unkeyed()
+        self.assertFalse(self.rig.transmit)
+        self.assertEqual(watchdog.last_reason, TXWatchdog.HEARTBEAT)
+
+    def test_unkey_is_not_delayed_by_polling(self):
+        watchdog = TXWatchdog(self.radio, max_key_down=0.2)
+        stop = threading.Event()
+        parser = self.radio.parser
+
+        def poll():
+            # Keep the command queue full of meter requests
+            while not stop.is_set():
+                self.radio.send_batch(
+                    [parser.generate_get_swr_meter(), parser.generate_get_po_meter()],
+                    telemetry=True,
+                )
+
+        self.radio.set_transmit(True)
+        poller = threading.Thread(target=poll)
+        poller.start()
+        try:
+            self.wait_unkeyed()
+        finally:
+            stop.set()
+            poller.join()
+        self.assertFalse(self.rig.transmit)
+        self.assertEqual(watchdog.trips, 1)
+        self.assertLess(watchdog.worst_unkey_latency, 0.05)
+
+    def test_unkeying_disarms(self):
+        watchdog = TXWatchdog(self.radio, max_key_down=0.1)
+        self.radio.set_transmit(True)
+        self.radio.set_transmit(False)
+        self.radio.command_queue.join(1)
+        time.sleep(0.2)
+        self.assertEqual(watchdog.trips, 0)
+        self.assertIsNone(watchdog.deadline())
+
+    def test_transmit_command(self):
+        parser = RadioParser()
+        self.assertTrue(parser.transmit_command("MD04;PC010;TX1;"))
+        self.assertFalse(parser.transmit_command("TX1;TX0;PC050;"))
+        self.assertIsNone(parser.transmit_command("TX;RM6;"))
+
+
+if __name__ == "__main__":
+    unittest.main()
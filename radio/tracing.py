@@ -0,0 +1,163 @@
+"""
+Timeline tracing of the command and reply path.
+
+A Tracer given to Radio.set_tracer() records a span for every stage a command goes
+through - waiting in the command queue, the serial write, the pacing pause, the
+read, framing, decoding and every listener callback - and the time callers spend
+waiting for replies. The spans are kept in memory and exported in the Chrome trace
+event format, which chrome://tracing and https://ui.perfetto.dev open.
+
+Without a tracer the hooks cost one attribute test each.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class TracedCommand(str):
+    """
+    Command string that remembers when and under which id it was queued, so that
+    the writer can close its queue wait span.
+    """
+
+    __slots__ = ("trace_id", "queued_at")
+
+
+class TracedBytes(bytes):
+    """
+    TracedCommand for commands given as bytes (see radio.encoding).
+    """
+
+
+def command_text(command) -> str:
+    """
+    :return: The command as str for the trace, whether given as str or bytes.
+    """
+    if isinstance(command, bytes):
+        return command.decode("ascii", "replace")
+    return str(command)
+
+
+class Tracer:
+    """
+    Bounded in-memory buffer of trace events; the oldest are discarded when full.
+
+    Times are time.perf_counter() values in seconds.
+    """
+
+    def __init__(self, max_events: int = 1000000):
+        """
+        :param max_events: Number of events kept.
+        """
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}  # threading.get_ident() -> thread name
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        """
+        :return: A new id for async_begin()/async_end().
+        """
+        return next(self._ids)
+
+    def complete(
+        self, name: str, start: float, end: float = None, category="radio", **args
+    ) -> None:
+        """
+        Records a span of the current thread that started at start and ends at end
+        (now by default).
+        """
+        if end is None:
+            end = time.perf_counter()
+        self.events.append(("X", name, category, start, end, self._tid(), None, args))
+
+    def instant(self, name: str, category="radio", **args) -> None:
+        self.events.append(
+            ("i", name, category, time.perf_counter(), None, self._tid(), None, args)
+        )
+
+    def async_begin(
+        self, name: str, trace_id: int, start: float = None, category="radio", **args
+    ) -> None:
+        """
+        Opens a span that may end on another thread, see async_end().
+        """
+        if start is None:
+            start = time.perf_counter()
+        self.events.append(
+            ("b", name, category, start, None, self._tid(), trace_id, args)
+        )
+
+    def async_end(
+        self, name: str, trace_id: int, end: float = None, category="radio", **args
+    ) -> None:
+        if end is None:
+            end = time.perf_counter()
+        self.events.append(
+            ("e", name, category, end, None, self._tid(), trace_id, args)
+        )
+
+    @contextmanager
+    def span(self, name: str, category="radio", **args):
+        """
+        Records the with block as a span of the current thread.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.complete(name, start, category=category, **args)
+
+    def clear(self) -> None:
+        self.events.clear()
+
+    def to_chrome(self) -> dict:
+        """
+        :return: The events in the Chrome trace event format (JSON object format).
+        """
+        pid = os.getpid()
+        trace = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in list(self.thread_names.items())
+        ]
+        for phase, name, category, start, end, tid, trace_id, args in list(self.events):
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": phase,
+                "ts": start * 1e6,  # Microseconds
+                "pid": pid,
+                "tid": tid,
+            }
+            if phase == "X":
+                event["dur"] = (end - start) * 1e6
+            elif phase == "i":
+                event["s"] = "t"
+            else:
+                event["id"] = trace_id
+            if args:
+                event["args"] = args
+            trace.append(event)
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def export(self, path: str) -> None:
+        """
+        Writes the events to a JSON file for chrome://tracing or Perfetto.
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_chrome(), f)
+
+    def _tid(self) -> int:
+        tid = threading.get_ident()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        return tid
@@ -0,0 +1,169 @@
+"""
+Transmitter watchdog.
+
+TXWatchdog unkeys the radio when it has been transmitting for longer than allowed or
+when its owner (e.g. the GUI) stops sending heartbeats. It runs on a thread of its
+own and writes TX0; straight to the serial port, so a full command queue, a slow
+writer or a hung GUI cannot delay the unkey.
+"""
+import logging
+import threading
+import time
+from overrides import overrides
+from radio.events import *
+from radio.listener import RadioListener
+
+
+class TXWatchdog(RadioListener):
+    """
+    Unkeys the radio at a deadline: max_key_down seconds after it was keyed, or
+    heartbeat_timeout seconds after the last heartbeat() while keyed.
+
+    The watchdog learns about the keying from the commands the radio writes and from
+    the transmit status it reports (TX replies), so a radio keyed by its own PTT is
+    covered as soon as the status is queried.
+
+    The latency of an unkey is measured from the deadline to the end of the write of
+    TX0; - worst_unkey_latency is the figure to check under heavy polling.
+    """
+
+    MAX_KEY_DOWN = "max key-down time"
+    HEARTBEAT = "heartbeat lost"
+
+    def __init__(
+        self,
+        radio,
+        max_key_down: float = 120.0,
+        heartbeat_timeout: float = None,
+        on_trip=None,
+    ):
+        """
+        :param radio: The radio.radio.Radio to watch, the watchdog attaches itself.
+        :param max_key_down: Seconds the radio may transmit without interruption.
+        :param heartbeat_timeout: Seconds without heartbeat() after which a keyed
+                                  radio is unkeyed, None to ignore the heartbeat.
+        :param on_trip: Called as on_trip(reason) on the watchdog thread after it has
+                        unkeyed the radio.
+        """
+        self.radio = radio
+        self.max_key_down = max_key_down
+        self.heartbeat_timeout = heartbeat_timeout
+        self.on_trip = on_trip
+        self.keyed_at = None  # time.perf_counter() when the radio was keyed
+        self.last_heartbeat = time.perf_counter()
+        self.trips = 0
+        self.last_reason = None
+        self.last_unkey_latency = None
+        self.worst_unkey_latency = 0.0
+        self._running = True
+        self._condition = threading.Condition()
+        radio.watchdog = self
+        radio.add_listener(self, asynchronous=False)
+        self._thread = threading.Thread(target=self._run, name="TXWatchdog")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def transmitting(self, keyed: bool) -> None:
+        """
+        Tells the watchdog that the radio has been keyed or unkeyed.
+        """
+        with self._condition:
+            if not keyed:
+                self.keyed_at = None
+            elif self.keyed_at is None:
+                self.keyed_at = time.perf_counter()
+                self._condition.notify()
+
+    def heartbeat(self) -> None:
+        """
+        Tells the watchdog that its owner is still alive. Cheap enough to be called
+        on every GUI update.
+        """
+        # Deadlines only move later, the thread does not need to wake up for this
+        self.last_heartbeat = time.perf_counter()
+
+    def deadline(self):
+        """
+        :return: (time.perf_counter() deadline, reason) for the unkey, None when the
+                 radio is not transmitting.
+        """
+        keyed_at = self.keyed_at
+        if keyed_at is None:
+            return None
+        deadline = (keyed_at + self.max_key_down, self.MAX_KEY_DOWN)
+        if self.heartbeat_timeout is not None:
+            # Keying counts as a heartbeat, an owner that was quiet before gets a grace
+            alive = max(self.last_heartbeat, keyed_at) + self.heartbeat_timeout
+            if alive < deadline[0]:
+                deadline = (alive, self.HEARTBEAT)
+        return deadline
+
+    def stats(self) -> dict:
+        return {
+            "trips": self.trips,
+            "last_reason": self.last_reason,
+            "last_unkey_latency": self.last_unkey_latency,
+            "worst_unkey_latency": self.worst_unkey_latency,
+            "transmitting": self.keyed_at is not None,
+        }
+
+    def stop(self) -> None:
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        if self.radio.watchdog is self:
+            self.radio.watchdog = None
+        self.radio.remove_listener(self)
+
+    @overrides
+    def on_transmit(self, event: TransmitEvent) -> None:
+        self.transmitting(event.transmit)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                deadline = self.deadline()
+                if deadline is None:
+                    self._condition.wait()
+                    continue
+                remaining = deadline[0] - time.perf_counter()
+                if remaining > 0:
+                    # Woken early by a new keying, or re-evaluated after a heartbeat
+                    self._condition.wait(remaining)
+                    continue
+            self._unkey(*deadline)
+
+    def _unkey(self, deadline: float, reason: str) -> None:
+        try:
+            self.radio.write_now(self.radio.encoder.SET_TRANSMIT[False])
+        except Exception as e:
+            # Try again on the next round rather than giving up on a keyed radio
+            logging.error("TX watchdog failed to unkey the radio: %s", e)
+            time.sleep(0.05)
+            return
+        latency = time.perf_counter() - deadline
+        with self._condition:
+            self.keyed_at = None
+        self.trips += 1
+        self.last_reason = reason
+        self.last_unkey_latency = latency
+        self.worst_unkey_latency = max(self.worst_unkey_latency, latency)
+        # Queued commands were meant for the transmission we just ended (and could
+        # key the radio again)
+        discarded = self.radio.command_queue.clear()
+        logging.error(
+            "TX watchdog unkeyed the radio (%s) %.1f ms after the deadline, "
+            "%d queued commands discarded",
+            reason,
+            latency * 1000,
+            discarded,
+        )
+        if self.on_trip:
+            try:
+                self.on_trip(reason)
+            except Exception as e:
+                logging.error("Exception in TX watchdog callback: %s", e)